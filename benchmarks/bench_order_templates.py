@@ -0,0 +1,89 @@
+"""
+Benchmark: latência de envio de ordens com e sem modelos pré-serializados.
+
+Compara o caminho padrão (Buyv3.async_call -> json.dumps -> lock -> send)
+com o caminho de modelos (prepare_order -> render -> send_frame) usando um
+websocket nulo, medindo apenas o custo local até o frame ser escrito.
+
+Uso:
+    python benchmarks/bench_order_templates.py --iterations 20000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.ws.channels.buyv3 import Buyv3
+
+
+class NullWebsocket(object):
+    """Websocket que descarta os frames enviados."""
+
+    async def send(self, message):
+        pass
+
+
+def summarize(samples_ns):
+    """Resume as amostras (ns) em microssegundos."""
+    ordered = sorted(samples_ns)
+    return {
+        "mean_us": statistics.fmean(ordered) / 1000,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[int(len(ordered) * 0.99)] / 1000,
+    }
+
+
+async def bench_default(api, iterations):
+    buyv3 = Buyv3(api)
+    samples = []
+    for req_id in range(iterations):
+        start = time.perf_counter_ns()
+        await buyv3.async_call(10, "EURUSD_otc", "call", 60, req_id)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+async def bench_template(api, iterations):
+    template = api.prepare_order(10, "EURUSD_otc", "call", 60)
+    samples = []
+    for req_id in range(iterations):
+        start = time.perf_counter_ns()
+        await api.fire_order(template, req_id)
+        samples.append(time.perf_counter_ns() - start)
+    return samples
+
+
+async def run(iterations):
+    global_value.DEMO = True
+    global_value.websocket_is_connected = True
+    api = PocketOptionAPI()
+    api.websocket.websocket = NullWebsocket()
+
+    # Aquecimento
+    await bench_default(api, 1000)
+    await bench_template(api, 1000)
+
+    return {
+        "default": summarize(await bench_default(api, iterations)),
+        "template": summarize(await bench_template(api, iterations)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.iterations))
+    for name, stats in results.items():
+        print(f"{name:>8}: média {stats['mean_us']:.2f}µs | p50 {stats['p50_us']:.2f}µs | p99 {stats['p99_us']:.2f}µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+Benchmark: carga sintética no despacho de mensagens recebidas.
+
+Gera frames de ``updateStream``, lista de ativos, ``loadHistoryPeriod`` e
+``successcloseOrder`` nas taxas e tamanhos configurados e os entrega ao
+``WebsocketClient.on_message`` enquanto mede, para cada degrau de taxa de ticks:
+
+- atraso do event loop (quanto um timer dispara depois do previsto, que é o
+  atraso somado a qualquer ordem enviada naquele momento);
+- latência de despacho (do instante em que o frame deveria chegar até o fim
+  do ``on_message``; cresce quando o cliente não acompanha a taxa);
+- crescimento de memória (RSS e, com ``--tracemalloc``, memória alocada).
+
+A maior taxa com atraso p99 dentro de ``--lag-budget`` e taxa entregue de pelo
+menos 95% da pedida é o orçamento seguro do processo, também expresso em
+ativos assinados (``--asset-tick-rate`` ticks/s por ativo).
+
+Com ``--server`` os ticks vêm do MockPocketOptionServer (em outra thread, com
+seu próprio event loop) por uma conexão real; a taxa é ajustada pelo número
+de ativos assinados e pelo intervalo entre frames do servidor.
+
+Uso:
+    python benchmarks/load_generator.py --rates 1000,5000,20000,50000
+    python benchmarks/load_generator.py --batch 10 --deal-rate 50 --output load.json
+    python benchmarks/load_generator.py --server --rates 200,1000,5000 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from loguru import logger
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.testing import MockPocketOptionServer
+
+SSID = '42["auth",{"session":"load_session","isDemo":1,"uid":123456,"platform":2}]'
+DEFAULT_RATES = (1000, 5000, 20000, 50000)
+
+
+def header(event):
+    """Cabeçalho 451 de um evento com anexo binário."""
+    return f'451-["{event}",{{"_placeholder":true,"num":0}}]'
+
+
+class FrameFactory(object):
+    """Frames sintéticos no formato enviado pelo servidor."""
+
+    def __init__(self, assets=50, batch=1, history_size=1000, deals=1, asset_list_size=150, seed=1):
+        self.random = random.Random(seed)
+        self.assets = [f"ASSET{index}_otc" for index in range(assets)]
+        self.prices = {asset: 1.0 + self.random.random() for asset in self.assets}
+        self.batch = batch
+        self.history_size = history_size
+        self.deals = deals
+        self.asset_list_size = asset_list_size
+        self._next = 0
+        self._deal_id = 0
+
+    def stream(self, now):
+        """updateStream com ``batch`` ticks (ativos em rodízio)."""
+        ticks = []
+        for _ in range(self.batch):
+            asset = self.assets[self._next % len(self.assets)]
+            self._next += 1
+            price = self.prices[asset] = round(self.prices[asset] * (1 + self.random.gauss(0, 1e-4)), 5)
+            ticks.append([asset, round(now, 3), price])
+        return header("updateStream"), json.dumps(ticks).encode()
+
+    def asset_list(self, now):
+        """Lista de ativos (o cliente a reconhece pelo primeiro item, #AAPL)."""
+        items = [[5, "#AAPL", "Apple", "stock", 2, 85, 60, 30, 3, 0, 170, 0, [], 1743724800, True, [], 0, 0]]
+        for index in range(1, self.asset_list_size):
+            items.append([index + 5, f"ASSET{index}_otc", f"Ativo {index}", "currency", 2,
+                          self.random.randint(60, 92), 60, 30, 3, 0, 170, 0, [], 1743724800, True, [], 0, 0])
+        return header("updateAssets"), json.dumps(items, separators=(",", ":")).encode()
+
+    def history(self, now):
+        """loadHistoryPeriod com ``history_size`` pontos."""
+        asset = self.random.choice(self.assets)
+        price = self.prices[asset]
+        data = [{"time": int(now) - index, "price": round(price, 5)} for index in range(self.history_size)]
+        return header("loadHistoryPeriod"), json.dumps({"asset": asset, "period": 60, "data": data}).encode()
+
+    def closed_deals(self, now):
+        """successcloseOrder com ``deals`` ordens fechadas (ids novos: o livro de ordens cresce)."""
+        deals = []
+        for _ in range(self.deals):
+            self._deal_id += 1
+            deals.append({"id": f"load-{self._deal_id}", "asset": self.random.choice(self.assets), "amount": 1,
+                          "profit": self.random.choice((0.92, -1)), "openTimestamp": int(now) - 60,
+                          "closeTimestamp": int(now), "command": self.random.randint(0, 1)})
+        profit = round(sum(deal["profit"] for deal in deals), 2)
+        return header("successcloseOrder"), json.dumps({"profit": profit, "deals": deals}).encode()
+
+
+class NullWebsocket(object):
+    """Websocket que descarta os frames enviados."""
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+class LoopLagMonitor(object):
+    """Mede o atraso do event loop acordando a cada ``interval`` segundos."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = []
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    def reset(self):
+        samples, self.samples = self.samples, []
+        return samples
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, loop.time() - expected))
+
+
+def percentiles(samples, scale=1e3):
+    """p50/p99/max (em ms por padrão) das amostras em segundos."""
+    if not samples:
+        return {"p50": None, "p99": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "p50": ordered[len(ordered) // 2] * scale,
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * scale,
+        "max": ordered[-1] * scale,
+    }
+
+
+def rss_bytes():
+    """Memória residente do processo (Linux: /proc; demais: pico do getrusage)."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+class MemoryProbe(object):
+    """Crescimento de memória durante um degrau."""
+
+    def __init__(self, use_tracemalloc):
+        self.use_tracemalloc = use_tracemalloc
+        self._rss = self._traced = 0
+
+    def start(self):
+        self._rss = rss_bytes()
+        if self.use_tracemalloc:
+            tracemalloc.reset_peak()
+            self._traced = tracemalloc.get_traced_memory()[0]
+
+    def stop(self):
+        result = {"rss_growth_mb": (rss_bytes() - self._rss) / 2 ** 20}
+        if self.use_tracemalloc:
+            current, peak = tracemalloc.get_traced_memory()
+            result["traced_growth_mb"] = (current - self._traced) / 2 ** 20
+            result["traced_peak_mb"] = peak / 2 ** 20
+        return result
+
+
+# ----------------------------------------------------------------------
+# Entrega direta no on_message
+
+
+async def run_step_direct(client, factory, rate, args):
+    """Entrega os frames de um degrau no on_message; retorna ticks entregues e latências."""
+    loop = asyncio.get_running_loop()
+    # (frames/s, gerador) de cada tipo de frame
+    sources = [(rate / factory.batch, factory.stream), (args.assets_rate, factory.asset_list),
+               (args.history_rate, factory.history), (args.deal_rate, factory.closed_deals)]
+    sources = [(frame_rate, make) for frame_rate, make in sources if frame_rate > 0]
+    sent = [0] * len(sources)
+    delivered = 0
+    latencies = []
+    start = loop.time()
+    end = start + args.duration
+
+    while loop.time() < end:
+        # Frames que já deveriam ter chegado, na ordem do instante previsto
+        now = loop.time()
+        due = []
+        for index, (frame_rate, make) in enumerate(sources):
+            target = int((now - start) * frame_rate)
+            due.extend((start + count / frame_rate, index) for count in range(sent[index], target))
+            sent[index] = target
+        due.sort()
+        for arrival, index in due:
+            # Acima da capacidade o atraso acumulado fica sem entregar no fim do degrau
+            if loop.time() >= end:
+                break
+            first, second = sources[index][1](time.time())
+            await client.on_message(first)
+            await client.on_message(second)
+            latencies.append(loop.time() - arrival)
+            if index == 0:
+                delivered += factory.batch
+        await asyncio.sleep(args.slice)
+
+    return delivered / (loop.time() - start), latencies
+
+
+async def run_direct(args):
+    api = PocketOptionAPI()
+    client = api.websocket_client
+    client.websocket = NullWebsocket()
+    factory = FrameFactory(args.assets, args.batch, args.history_size, args.deals, seed=args.seed)
+
+    # Aquecimento: ativos e histórico já conhecidos antes do primeiro degrau
+    for make in (factory.asset_list, factory.history, factory.stream):
+        for frame in make(time.time()):
+            await client.on_message(frame)
+
+    monitor = LoopLagMonitor(args.lag_interval)
+    memory = MemoryProbe(args.tracemalloc)
+    monitor.start()
+    steps = []
+    try:
+        for rate in args.rates:
+            memory.start()
+            monitor.reset()
+            achieved, latencies = await run_step_direct(client, factory, rate, args)
+            steps.append(step_result(rate, achieved, monitor.reset(), latencies, memory.stop()))
+            print_step(steps[-1])
+    finally:
+        await monitor.stop()
+    return steps
+
+
+# ----------------------------------------------------------------------
+# Pelo servidor local
+
+
+def start_server_thread(args):
+    """Inicia o servidor local em uma thread com event loop próprio."""
+    ready = threading.Event()
+    state = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        state["loop"] = loop
+        state["server"] = loop.run_until_complete(
+            MockPocketOptionServer(tick_interval=1.0, seed=args.seed).start())
+        ready.set()
+        loop.run_forever()
+        loop.run_until_complete(state["server"].stop())
+        loop.close()
+
+    thread = threading.Thread(target=run, name="mock-server", daemon=True)
+    thread.start()
+    ready.wait(10)
+    return state["server"], state["loop"], thread
+
+
+async def run_server(args):
+    server, server_loop, thread = start_server_thread(args)
+    REGION.override(server.url)
+    pocket = PocketOption(SSID, True)
+    latencies = []
+    arrived = asyncio.Event()
+
+    def on_tick(asset, timestamp, price):
+        latencies.append(time.time() - timestamp)
+        arrived.set()
+
+    monitor = LoopLagMonitor(args.lag_interval)
+    memory = MemoryProbe(args.tracemalloc)
+    steps = []
+    try:
+        if not await pocket.connect() or not await pocket.wait_session_ready(10):
+            raise RuntimeError("Servidor local não autenticou a sessão")
+        for index in range(args.assets):
+            await pocket.api.change_symbol.async_call(f"ASSET{index}_otc", 60)
+        pocket.api.candle_builder.add_tick_listener(on_tick)
+        monitor.start()
+
+        for rate in args.rates:
+            # O servidor envia um frame com todos os ativos a cada tick_interval
+            server.tick_interval = args.assets / rate
+            await asyncio.sleep(min(1.0, server.tick_interval * 2))
+            # Medição entre chegadas de frames: conta frames inteiros
+            arrived.clear()
+            await arrived.wait()
+            memory.start()
+            monitor.reset()
+            latencies.clear()
+            start = time.perf_counter()
+            await asyncio.sleep(args.duration)
+            arrived.clear()
+            await arrived.wait()
+            elapsed = time.perf_counter() - start
+            achieved = len(latencies) / elapsed
+            steps.append(step_result(rate, achieved, monitor.reset(), list(latencies), memory.stop()))
+            print_step(steps[-1])
+    finally:
+        await monitor.stop()
+        await pocket.disconnect()
+        REGION.override(None)
+        global_value.websocket_is_connected = False
+        server_loop.call_soon_threadsafe(server_loop.stop)
+        thread.join(10)
+    return steps
+
+
+# ----------------------------------------------------------------------
+# Resultado
+
+
+def step_result(rate, achieved, lag_samples, latencies, memory):
+    return {
+        "offered_ticks_per_second": rate,
+        "achieved_ticks_per_second": achieved,
+        "loop_lag_ms": percentiles(lag_samples),
+        "dispatch_latency_ms": percentiles(latencies),
+        "frames": len(latencies),
+        **memory,
+    }
+
+
+def print_step(step):
+    lag, dispatch = step["loop_lag_ms"], step["dispatch_latency_ms"]
+    print(f"📶 {step['offered_ticks_per_second']:>9.0f} ticks/s pedidos, "
+          f"{step['achieved_ticks_per_second']:>9.0f} entregues | "
+          f"lag p50 {fmt(lag['p50'])} p99 {fmt(lag['p99'])} max {fmt(lag['max'])} ms | "
+          f"despacho p99 {fmt(dispatch['p99'])} ms | RSS {step['rss_growth_mb']:+.1f} MB", file=sys.stderr)
+
+
+def fmt(value):
+    return "-" if value is None else f"{value:.2f}"
+
+
+def safe_budget(steps, lag_budget, asset_tick_rate):
+    """Maior taxa que cumpre o orçamento de atraso e foi entregue (>= 95%)."""
+    safe = None
+    for step in steps:
+        lag = step["loop_lag_ms"]["p99"]
+        if lag is None or lag > lag_budget:
+            break
+        if step["achieved_ticks_per_second"] < 0.95 * step["offered_ticks_per_second"]:
+            break
+        safe = step["offered_ticks_per_second"]
+    return {
+        "lag_budget_ms": lag_budget,
+        "ticks_per_second": safe,
+        "subscriptions": int(safe // asset_tick_rate) if safe is not None else 0,
+        "asset_tick_rate": asset_tick_rate,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rates", type=lambda value: [float(rate) for rate in value.split(",")],
+                        default=list(DEFAULT_RATES), help="Degraus de ticks/s (ex.: 1000,5000,20000)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos por degrau")
+    parser.add_argument("--assets", type=int, default=50, help="Ativos distintos nos ticks")
+    parser.add_argument("--batch", type=int, default=1, help="Ticks por frame do updateStream")
+    parser.add_argument("--assets-rate", type=float, default=0.2, help="Frames/s da lista de ativos")
+    parser.add_argument("--history-rate", type=float, default=1.0, help="Frames/s de loadHistoryPeriod")
+    parser.add_argument("--history-size", type=int, default=1000, help="Pontos por loadHistoryPeriod")
+    parser.add_argument("--deal-rate", type=float, default=5.0, help="Frames/s de successcloseOrder")
+    parser.add_argument("--deals", type=int, default=1, help="Ordens por successcloseOrder")
+    parser.add_argument("--slice", type=float, default=0.001,
+                        help="Segundos entre lotes de entrega (o loop roda outras tarefas entre eles)")
+    parser.add_argument("--lag-interval", type=float, default=0.005, help="Intervalo do monitor de atraso")
+    parser.add_argument("--lag-budget", type=float, default=5.0, help="Atraso p99 tolerado (ms)")
+    parser.add_argument("--asset-tick-rate", type=float, default=2.0,
+                        help="Ticks/s de um ativo assinado (converte o orçamento em assinaturas)")
+    parser.add_argument("--server", action="store_true", help="Receber os ticks do servidor local")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Medir também a memória alocada (mais lento)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    args = parser.parse_args()
+
+    logger.disable("pocketoptionapi")
+    if args.tracemalloc:
+        tracemalloc.start()
+    steps = asyncio.run(run_server(args) if args.server else run_direct(args))
+    budget = safe_budget(steps, args.lag_budget, args.asset_tick_rate)
+
+    if budget["ticks_per_second"] is None:
+        print(f"⚠️ Nenhum degrau dentro de {args.lag_budget} ms de atraso p99")
+    else:
+        print(f"✅ Orçamento seguro: {budget['ticks_per_second']:.0f} ticks/s "
+              f"(~{budget['subscriptions']} ativos a {args.asset_tick_rate:g} ticks/s) "
+              f"com atraso p99 <= {args.lag_budget} ms")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump({"mode": "server" if args.server else "direct", "args": vars(args),
+                       "steps": steps, "budget": budget}, fh, indent=2)
+        print(f"💾 Resultados gravados em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Benchmark: suíte dos caminhos críticos do cliente, sem rede.
+
+Mede:
+
+- ``on_message``: frames/s com payloads sintéticos ou de uma gravação do
+  FrameRecorder (``--recording``);
+- ``_process_candles_to_ohlc``, ``process_data_history`` e ``process_candle``
+  com 10^4 a 10^7 pontos (``--sizes``);
+- ``GetPayout`` com a lista de ativos carregada;
+- ``process_ssid_input``;
+- tempo de conexão até a autenticação contra o MockPocketOptionServer.
+
+Os resultados são gravados em JSON (``--output``) para comparar versões; com
+``--compare`` o resultado é confrontado com um JSON anterior e o processo sai
+com código 1 se alguma métrica piorar além de ``--threshold``.
+
+Uso:
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --only ohlc --sizes 10000,10000000
+    python benchmarks/suite.py --compare bench.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from loguru import logger
+
+import pocketoptionapi
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.recorder import FrameReplayer
+from pocketoptionapi.ssid_parser import process_ssid_input
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.testing import MockPocketOptionServer
+
+SSID = '42["auth",{"session":"benchmark_session","isDemo":1,"uid":123456,"platform":2}]'
+DEFAULT_SIZES = (10 ** 4, 10 ** 5, 10 ** 6)
+STREAM_HEADER = '451-["updateStream",{"_placeholder":true,"num":0}]'
+
+
+def summarize(samples_ns):
+    """Resume as amostras (ns) em microssegundos."""
+    ordered = sorted(samples_ns)
+    return {
+        "mean_us": statistics.fmean(ordered) / 1000,
+        "p50_us": ordered[len(ordered) // 2] / 1000,
+        "p99_us": ordered[int(len(ordered) * 0.99)] / 1000,
+    }
+
+
+def result(metric, value, higher_is_better, **extra):
+    """Resultado de um benchmark: métrica principal (comparada entre versões) e detalhes."""
+    return {"metric": metric, "value": value, "higher_is_better": higher_is_better, **extra}
+
+
+def best_of(func, repeat):
+    """Menor tempo (segundos) entre ``repeat`` execuções de ``func``."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_ticks(count, start=1700000000, step=0.5, seed=1):
+    """Ticks (timestamp, preço) em passeio aleatório."""
+    rng = random.Random(seed)
+    price = 1.1
+    ticks = []
+    for index in range(count):
+        price += rng.gauss(0, 0.0001)
+        ticks.append((start + index * step, round(price, 5)))
+    return ticks
+
+
+def synthetic_frames(count, assets=("EURUSD_otc", "GBPUSD_otc", "AUDNZD_otc")):
+    """Frames de updateStream como o servidor envia: cabeçalho 451 e anexo binário."""
+    frames = []
+    for index, (timestamp, price) in enumerate(synthetic_ticks(count)):
+        frames.append(STREAM_HEADER)
+        frames.append(json.dumps([[assets[index % len(assets)], timestamp, price]]).encode())
+    return frames
+
+
+def synthetic_payout_data(count=150):
+    """Lista de ativos no formato bruto recebido do servidor."""
+    rng = random.Random(1)
+    return json.dumps([[index, f"ASSET{index}_otc", f"Ativo {index}", "currency", 2, rng.randint(60, 92)]
+                       for index in range(count)])
+
+
+class NullWebsocket(object):
+    """Websocket que descarta os frames enviados."""
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+def make_pocket():
+    return PocketOption(SSID, True)
+
+
+# ----------------------------------------------------------------------
+# Benchmarks
+
+
+async def bench_on_message(args):
+    """Frames/s no on_message (updateStream sintético ou gravação)."""
+    if args.recording:
+        frames = [frame.payload for frame in FrameReplayer(args.recording).frames()]
+        source = args.recording
+    else:
+        frames = synthetic_frames(args.frames // 2)
+        source = "synthetic updateStream"
+
+    api = PocketOptionAPI()
+    client = api.websocket_client
+    client.websocket = NullWebsocket()
+    for message in frames[:1000]:  # Aquecimento
+        await client.on_message(message)
+
+    start = time.perf_counter()
+    for message in frames:
+        await client.on_message(message)
+    elapsed = time.perf_counter() - start
+    return {"on_message": result("frames_per_second", len(frames) / elapsed, True,
+                                 frames=len(frames), source=source)}
+
+
+async def bench_ohlc(args):
+    """Agregação OHLC e limpeza de velas com 10^4 a 10^7 pontos."""
+    pocket = make_pocket()
+    results = {}
+    for size in args.sizes:
+        ticks = synthetic_ticks(size)
+        points = [{"time": timestamp, "price": price} for timestamp, price in ticks]
+        history = {"history": ticks}
+        candles = pocket._process_candles_to_ohlc(points, 60)
+        candle_rows = [dict(candle, time=int(candle["time"].timestamp())) for candle in candles]
+        repeat = max(1, min(args.repeat, 10 ** 6 // size))
+
+        elapsed = best_of(lambda: pocket._process_candles_to_ohlc(points, 60), repeat)
+        results[f"process_candles_to_ohlc[{size}]"] = result(
+            "points_per_second", size / elapsed, True, points=size, seconds=elapsed)
+
+        elapsed = best_of(lambda: pocket.process_data_history(history, 1), repeat)
+        results[f"process_data_history[{size}]"] = result(
+            "points_per_second", size / elapsed, True, points=size, seconds=elapsed)
+
+        elapsed = best_of(lambda: pocket.process_candle(candle_rows, 60), repeat)
+        results[f"process_candle[{size}]"] = result(
+            "candles_per_second", len(candle_rows) / elapsed, True, candles=len(candle_rows), seconds=elapsed)
+        del ticks, points, history, candles, candle_rows
+    return results
+
+
+async def bench_payout(args):
+    """GetPayout do último ativo da lista (pior caso da busca)."""
+    pocket = make_pocket()
+    global_value.PayoutData = synthetic_payout_data()
+    samples = []
+    for _ in range(args.iterations // 10):
+        start = time.perf_counter_ns()
+        await pocket.GetPayout("ASSET149_otc")
+        samples.append(time.perf_counter_ns() - start)
+    stats = summarize(samples)
+    return {"GetPayout": result("mean_us", stats["mean_us"], False, **stats)}
+
+
+async def bench_ssid(args):
+    """process_ssid_input com SSID completo e com session id puro."""
+    results = {}
+    for name, ssid in (("full", SSID), ("session_id", "a" * 32)):
+        samples = []
+        for _ in range(args.iterations):
+            start = time.perf_counter_ns()
+            process_ssid_input(ssid, force_demo=True)
+            samples.append(time.perf_counter_ns() - start)
+        stats = summarize(samples)
+        results[f"process_ssid_input[{name}]"] = result("mean_us", stats["mean_us"], False, **stats)
+    return results
+
+
+async def bench_connect(args):
+    """Tempo do início da conexão até a sessão autenticada, contra o servidor local."""
+    samples = []
+    async with MockPocketOptionServer(tick_interval=60) as server:
+        REGION.override(server.url)
+        try:
+            for _ in range(args.connections):
+                pocket = PocketOption(SSID, True)
+                start = time.perf_counter_ns()
+                connecting = asyncio.ensure_future(pocket.api.async_connect())
+                if not await pocket.wait_session_ready(10):
+                    raise RuntimeError("Servidor local não autenticou a sessão")
+                samples.append(time.perf_counter_ns() - start)
+                await pocket.api.async_close()
+                connecting.cancel()
+                await asyncio.gather(connecting, return_exceptions=True)
+        finally:
+            REGION.override(None)
+            global_value.websocket_is_connected = False
+    stats = {key: value / 1000 for key, value in summarize(samples).items()}
+    return {"connect_to_auth": result("mean_ms", stats["mean_us"], False, mean_ms=stats["mean_us"],
+                                      p50_ms=stats["p50_us"], p99_ms=stats["p99_us"])}
+
+
+BENCHMARKS = {
+    "on_message": bench_on_message,
+    "ohlc": bench_ohlc,
+    "payout": bench_payout,
+    "ssid": bench_ssid,
+    "connect": bench_connect,
+}
+
+
+# ----------------------------------------------------------------------
+# Execução, JSON e comparação
+
+
+def metadata():
+    """Versão, commit e ambiente da execução."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(__file__), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "version": pocketoptionapi.__version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def run(args):
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"⏱️  {name}...", file=sys.stderr)
+        results.update(await BENCHMARKS[name](args))
+    return {"meta": metadata(), "results": results}
+
+
+def compare(current, baseline, threshold):
+    """
+    Compara as métricas principais com um resultado anterior.
+
+    :returns: Lista de (nome, anterior, atual, variação) das métricas que pioraram além do limite.
+    """
+    regressions = []
+    for name, entry in current["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous or previous.get("metric") != entry["metric"] or not previous["value"]:
+            continue
+        change = (entry["value"] - previous["value"]) / previous["value"]
+        worse = -change if entry["higher_is_better"] else change
+        if worse > threshold:
+            regressions.append((name, previous["value"], entry["value"], change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="Executar apenas este benchmark (pode repetir)")
+    parser.add_argument("--sizes", type=lambda value: [int(size) for size in value.split(",")],
+                        default=list(DEFAULT_SIZES), help="Pontos dos benchmarks de OHLC (ex.: 10000,10000000)")
+    parser.add_argument("--frames", type=int, default=100000, help="Frames sintéticos do on_message")
+    parser.add_argument("--recording", help="Gravação do FrameRecorder usada no on_message")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5, help="Repetições (vale a melhor) dos benchmarks de OHLC")
+    parser.add_argument("--connections", type=int, default=20, help="Conexões no benchmark de conexão")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Piora relativa tolerada (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logger.disable("pocketoptionapi")
+    report = asyncio.run(run(args))
+
+    for name, entry in report["results"].items():
+        print(f"{name:>40}: {entry['value']:>14.2f} {entry['metric']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"💾 Resultados gravados em {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(report, baseline, args.threshold)
+        for name, previous, current, change in regressions:
+            print(f"📉 {name}: {previous:.2f} -> {current:.2f} ({change:+.1%})")
+        if regressions:
+            sys.exit(1)
+        print(f"✅ Nenhuma regressão acima de {args.threshold:.0%} em relação a {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
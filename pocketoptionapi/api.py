@@ -10,6 +10,7 @@ import threading
 import requests
 import ssl
 import atexit
+import itertools
 from collections import deque
 from loguru import logger
 from pocketoptionapi.ws.client import WebsocketClient
@@ -19,7 +20,13 @@ from pocketoptionapi.ws.channels.candles import GetCandles
 from pocketoptionapi.ws.channels.buyv3 import *
 from pocketoptionapi.ws.objects.timesync import TimeSync
 from pocketoptionapi.ws.objects.candles import Candles
+from pocketoptionapi.ws.objects.order_book import OrderBook
+from pocketoptionapi.ws.objects.candle_builder import CandleBuilder
+from pocketoptionapi.ws.session import SessionState
+from pocketoptionapi.ws.region_health import RegionMonitor
 import pocketoptionapi.global_value as global_value
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.metrics import LatencyRecorder
 from pocketoptionapi.ws.channels.change_symbol import ChangeSymbol
 from collections import defaultdict
 from pocketoptionapi.ws.objects.time_sync import TimeSynchronizer
@@ -104,9 +111,44 @@ class PocketOptionAPI(object):
         # Se for False, a última falhou
         # Se for True, a última ordem de compra foi bem-sucedida
         self.buy_successful = None
+        # Ordens aguardando confirmação, indexadas pelo requestId enviado
+        self.buy_multi_option = {}
+        self._order_ack_listeners = []
+        self.order_book = OrderBook()
+        self.latency = LatencyRecorder()
+        self.order_book.add_close_listener(self.latency.order_closed)
+        # Velas em tempo real construídas a partir do updateStream
+        self.candle_builder = CandleBuilder()
+        # Assinaturas e requisições reenviadas quando a conexão é retomada
+        self.session = SessionState()
+        # RTT e saúde por região, usados para ordenar as conexões
+        self.region_health = RegionMonitor()
+        self._request_ids = itertools.count(int(time.time() * 1000))
+        # Estado por instância: os atributos de classe seriam compartilhados
+        # entre as sessões que rodam no mesmo processo
+        self.time_sync = TimeSync()
+        self.sync = TimeSynchronizer()
+        self.candles = Candles()
+        self.socket_option_opened = {}
+        self.traders_mood = {}
+        self.top_assets_updated_data = {}
+        self.instrument_quites_generated_data = nested_dict(2, dict)
+        self.instrument_quotes_generated_raw_data = nested_dict(2, dict)
+        self.instrument_quites_generated_timestamp = nested_dict(2, dict)
+        self.live_deal_data = nested_dict(3, deque)
+        self.subscribe_commission_changed_data = nested_dict(2, dict)
+        self.real_time_candles = nested_dict(3, dict)
+        self.real_time_candles_maxdict_table = nested_dict(2, dict)
+        self.candle_generated_check = nested_dict(2, dict)
+        self.candle_generated_all_size_check = nested_dict(1, dict)
         self.loop = asyncio.get_event_loop()
         self.websocket_client = WebsocketClient(self)
 
+    @property
+    def region_name(self):
+        """Nome da região do servidor conectado."""
+        return REGION.get_region_name(self.websocket_client.url)
+
     @property
     def websocket(self):
         """Propriedade para obter websocket.
@@ -134,6 +176,10 @@ class PocketOptionAPI(object):
 
         data = f'42{json.dumps(msg)}'
 
+        # Após uma queda, aguardar a sessão ser retomada no novo socket
+        await self._wait_session_resumed()
+        self.session.track(msg, data)
+
         # Usar locks async-safe quando disponíveis, senão fallback para legacy
         try:
             write_lock = await global_value.get_write_lock()
@@ -153,9 +199,26 @@ class PocketOptionAPI(object):
                     await self.websocket.send_message(data)
             finally:
                 global_value.ssl_Mutual_exclusion_write = False
+
+        if request_id:
+            self.latency.order_written(request_id)
         
         logger.debug(data)
 
+    async def send_frame(self, data):
+        """Envia um frame já serializado diretamente no websocket.
+
+        Caminho rápido para ordens pré-serializadas: o websocket já serializa
+        a escrita de cada frame, então não há json.dumps nem lock global aqui.
+        """
+        await self._wait_session_resumed()
+        await self.websocket.websocket.send(data)
+
+    async def _wait_session_resumed(self):
+        """Aguarda a retomada da sessão após uma queda; ConnectionError se ela não voltar."""
+        if self.session.resuming and not await self.session.wait_ready():
+            raise ConnectionError("Sessão websocket não foi retomada")
+
     async def start_websocket(self):
         """Inicia websocket de forma assíncrona."""
         return await self._async_start_websocket()
@@ -221,6 +284,89 @@ class PocketOptionAPI(object):
         buyv3_instance = Buyv3(self)
         await buyv3_instance.async_call(amount, active, action, expirations, req_id)
 
+    def prepare_order(self, amount, active, action, expirations):
+        """Pré-serializa uma ordem (ver :class:`OrderTemplate`)."""
+        return Buyv3.prepare(amount, active, action, expirations)
+
+    async def async_buyv3_by_raw_expired(self, amount, active, action, expired, req_id):
+        """Envia uma ordem com expiração absoluta (timestamp do servidor)."""
+        await Buyv3_by_raw_expired(self).async_call(amount, active, action, expired, req_id)
+
+    async def fire_order(self, template, req_id):
+        """Envia uma ordem pré-serializada com o requestId informado."""
+        await Buyv3(self).async_fire(template, req_id)
+
+    def next_request_id(self):
+        """Gera um requestId único para uma nova ordem."""
+        return next(self._request_ids)
+
+    def register_order_request(self, request_id):
+        """Registra uma ordem pendente e retorna o future que recebe a resposta do servidor.
+
+        :param request_id: O requestId enviado no openOrder.
+        :returns: Um :class:`asyncio.Future` resolvido com os dados da ordem.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.buy_multi_option[str(request_id)] = future
+        return future
+
+    def add_order_ack_listener(self, callback):
+        """Registra uma função chamada com cada resposta de ordem (com requestId).
+
+        A função é chamada mesmo quando ninguém aguarda mais o requestId (timeout
+        ou cancelamento), para que reservas feitas antes do envio sejam conciliadas.
+
+        :param callback: Função síncrona que recebe os dados da ordem.
+        """
+        self._order_ack_listeners.append(callback)
+
+    def discard_order_request(self, request_id):
+        """Remove uma ordem pendente (timeout ou falha no envio)."""
+        self.latency.order_discarded(request_id)
+        future = self.buy_multi_option.pop(str(request_id), None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    def resolve_order_request(self, order_data, ack_ns=None):
+        """Entrega a resposta do servidor à ordem pendente com o mesmo requestId.
+
+        :param dict order_data: Dados da ordem recebidos do servidor.
+        :param int ack_ns: perf_counter_ns da chegada do successopenOrder, para métricas.
+        :returns: True se havia uma ordem aguardando esta resposta.
+        """
+        request_id = order_data.get("requestId")
+        for callback in self._order_ack_listeners:
+            callback(order_data)
+        future = self.buy_multi_option.pop(str(request_id), None)
+        if future is None or future.done():
+            return False
+        if "error" in order_data:
+            self.latency.order_discarded(request_id)
+        else:
+            self.latency.order_confirmed(request_id, order_data.get("id"), ack_ns)
+        future.set_result(order_data)
+        return True
+
+    def reject_order_request(self, order_data):
+        """Entrega um failopenOrder à ordem pendente.
+
+        O servidor nem sempre repete o requestId na rejeição; sem ele, a
+        rejeição vai para a ordem pendente mais antiga, já que o servidor
+        responde às ordens na ordem em que foram enviadas.
+
+        :param dict order_data: Anexo do failopenOrder.
+        :returns: True se havia uma ordem aguardando esta resposta.
+        """
+        order_data = dict(order_data)
+        order_data.setdefault("error", "failopenOrder")
+        if order_data.get("requestId") is None:
+            request_id = next((request_id for request_id, future in self.buy_multi_option.items()
+                               if not future.done()), None)
+            if request_id is None:
+                return False
+            order_data["requestId"] = request_id
+        return self.resolve_order_request(order_data)
+
     @property
     def getcandles(self):
         """Propriedade para obter o canal websocket de velas da Pocket Option.
@@ -246,10 +392,13 @@ class PocketOptionAPI(object):
 
     @property
     def synced_datetime(self):
+        """Datetime (UTC) do servidor; para leituras frequentes use :meth:`server_time_ns`."""
         try:
-            if self.time_sync is not None:
-                self.sync.synchronize(self.time_sync.server_timestamp)
+            if self.sync.synchronized:
                 self.sync_datetime = self.sync.get_synced_datetime()
+            elif self.time_sync is not None:
+                self.sync_datetime = datetime.datetime.fromtimestamp(
+                    self.time_sync.server_timestamp, datetime.timezone.utc)
             else:
                 logging.error("timesync não está definido")
                 self.sync_datetime = None
@@ -259,6 +408,30 @@ class PocketOptionAPI(object):
 
         return self.sync_datetime
 
+    def server_time(self):
+        """Timestamp atual do servidor em segundos (sem criar objetos datetime)."""
+        try:
+            return self.sync.server_time()
+        except ValueError:
+            return self.time_sync.server_timestamp
+
+    def server_time_ns(self):
+        """Timestamp atual do servidor em nanossegundos (inteiro)."""
+        try:
+            return self.sync.server_time_ns()
+        except ValueError:
+            return int(self.time_sync.server_timestamp * 1_000_000_000)
+
+    def server_now(self):
+        """Timestamp atual do servidor e incerteza da estimativa, em segundos.
+
+        Antes da primeira amostra retorna o último timestamp conhecido com incerteza infinita.
+        """
+        try:
+            return self.sync.server_now()
+        except ValueError:
+            return self.time_sync.server_timestamp, float("inf")
+
     async def async_connect(self):
         """Método assíncrono para conexão com a API da Pocket Option."""
         global_value.ssl_Mutual_exclusion = False
@@ -299,6 +472,8 @@ class PocketOptionAPI(object):
     async def async_close(self):
         """Método assíncrono para fechar conexão."""
         try:
+            self.websocket.closing = True
+            self.session.close()
             if hasattr(self.websocket, 'websocket') and self.websocket.websocket:
                 await self.websocket.websocket.close()
             global_value.websocket_is_connected = False
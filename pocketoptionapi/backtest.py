@@ -0,0 +1,624 @@
+"""
+Autor: AdminhuDev
+Backtest de estratégias sobre histórico armazenado, em tempo virtual.
+
+:class:`BacktestPocketOption` implementa a superfície de operação da
+:class:`PocketOption` (``buy``, ``check_win``, ``get_candles``, ``GetPayout``,
+``get_balance``...) sobre um :class:`History`. A ordem abre no preço do
+instante atual e é liquidada pelo preço histórico no vencimento, com o mesmo
+:class:`OrderBook` e :class:`RiskEngine` da sessão real.
+
+:class:`Backtest` executa a estratégia em um :class:`VirtualTimeLoop`, um
+event loop mínimo em Python puro: o relógio é o timestamp do histórico e,
+quando não há nada pronto para executar, avança direto para o próximo timer ou
+vencimento de ordem; as ordens vencidas são liquidadas ali mesmo, em lote e de
+forma síncrona. A corrotina da estratégia é conduzida diretamente pelo loop,
+sem uma Task, e ``check_win`` espera direto pelo vencimento conhecido da ordem,
+sem timer de timeout. Cada ``asyncio.sleep`` custa ~4µs e cada ordem ~15µs
+(OrderBook e RiskEngine): um ano de velas de 1 minuto com uma ordem por vela
+leva 10-15s de CPU em uma máquina lenta (~3x mais lenta que um desktop atual).
+A estratégia não deve depender de threads nem de I/O real.
+"""
+import asyncio
+import contextvars
+import gzip
+import heapq
+import itertools
+import json
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.risk import RiskEngine, RiskLimits
+from pocketoptionapi.ws.objects.order_book import OrderBook
+
+# Espaçamento (segundos) dos pontos pedidos pelo get_candles real (loadHistoryPeriod)
+HISTORY_STEP = 30
+
+
+class History(object):
+    """Séries de preços por ativo, ordenadas pelo timestamp."""
+
+    def __init__(self):
+        # ativo -> (timestamps, preços)
+        self.series: Dict[str, Tuple[array, array]] = {}
+
+    @classmethod
+    def from_ticks(cls, asset, ticks: Iterable[Tuple[float, float]], history=None):
+        """Cria (ou completa) o histórico com ticks (timestamp, preço)."""
+        history = history or cls()
+        for timestamp, price in ticks:
+            history.add_tick(asset, timestamp, price)
+        return history
+
+    @classmethod
+    def from_candles(cls, asset, candles, period, history=None):
+        """
+        Cria (ou completa) o histórico com velas OHLC (ex.: retorno do ``get_candles``).
+
+        O preço em cada fronteira de vela é o fechamento da vela que termina
+        nela; a abertura da primeira vela marca o início da série.
+        """
+        history = history or cls()
+        for index, candle in enumerate(sorted(candles, key=lambda candle: _timestamp(candle["time"]))):
+            start = _timestamp(candle["time"])
+            if index == 0:
+                history.add_tick(asset, start, candle["open"])
+            history.add_tick(asset, start + period, candle["close"])
+        return history
+
+    def add_tick(self, asset, timestamp, price):
+        """Acrescenta um tick (ticks fora de ordem são descartados)."""
+        series = self.series.get(asset)
+        if series is None:
+            series = self.series[asset] = (array("d"), array("d"))
+        times, prices = series
+        if times and timestamp < times[-1]:
+            return
+        times.append(timestamp)
+        prices.append(price)
+
+    def attach(self, pocket):
+        """Passa a guardar os ticks recebidos pela sessão real (updateStream)."""
+        pocket.api.candle_builder.add_tick_listener(self.add_tick)
+
+    @property
+    def assets(self):
+        return list(self.series)
+
+    def bounds(self, asset=None) -> Tuple[float, float]:
+        """Primeiro e último timestamp do ativo (ou de todos os ativos)."""
+        series = [self.series[asset]] if asset else list(self.series.values())
+        return min(times[0] for times, _ in series), max(times[-1] for times, _ in series)
+
+    def price_at(self, asset, timestamp) -> Optional[float]:
+        """Último preço conhecido no instante ``timestamp`` (None antes do início)."""
+        series = self.series.get(asset)
+        if series is None:
+            return None
+        times, prices = series
+        index = bisect_right(times, timestamp) - 1
+        return prices[index] if index >= 0 else None
+
+    def window(self, asset, start, end):
+        """Ticks com ``start <= timestamp <= end``."""
+        times, prices = self.series[asset]
+        first, last = bisect_left(times, start), bisect_right(times, end)
+        return times[first:last], prices[first:last]
+
+    def save(self, path):
+        """Grava o histórico em JSON comprimido."""
+        data = {asset: [times.tolist(), prices.tolist()] for asset, (times, prices) in self.series.items()}
+        with gzip.open(path, "wt", encoding="utf-8") as fh:
+            json.dump(data, fh)
+
+    @classmethod
+    def load(cls, path):
+        """Carrega um histórico gravado com :meth:`save`."""
+        with gzip.open(path, "rt", encoding="utf-8") as fh:
+            data = json.load(fh)
+        history = cls()
+        for asset, (times, prices) in data.items():
+            history.series[asset] = (array("d", times), array("d", prices))
+        return history
+
+
+def _timestamp(value):
+    return value.timestamp() if isinstance(value, datetime) else float(value)
+
+
+class _Handle(object):
+    """Callback agendado no :class:`VirtualTimeLoop` (mesma interface pública do ``asyncio.TimerHandle``)."""
+
+    __slots__ = ("_when", "_callback", "_args", "_context", "_cancelled")
+
+    def __init__(self, when, callback, args, context):
+        self._when = when
+        self._callback = callback
+        self._args = args
+        self._context = contextvars.copy_context() if context is None else context
+        self._cancelled = False
+
+    def when(self):
+        return self._when
+
+    def cancel(self):
+        self._cancelled = True
+
+    def cancelled(self):
+        return self._cancelled
+
+
+class VirtualTimeLoop(asyncio.AbstractEventLoop):
+    """
+    Event loop mínimo, em Python puro, cujo relógio (``loop.time()``) é virtual
+    e começa em ``start``.
+
+    Não há I/O: sem callbacks prontos o relógio avança direto para o próximo
+    timer ou vencimento de ordem. ``settler`` (opcional) é um objeto com
+    ``next_expiry()`` e ``settle_expired(now)``: o relógio para em cada
+    vencimento e as ordens vencidas são liquidadas ali mesmo, em lote, sem um
+    timer por ordem.
+
+    :meth:`run_until_complete` conduz a corrotina principal diretamente
+    (``coro.send``), sem uma :class:`asyncio.Task`: retomar a estratégia não
+    passa pela fila de callbacks. Por isso ``asyncio.current_task()`` é None
+    nela (use ``asyncio.wait_for``, não ``asyncio.timeout``); tarefas criadas
+    pela estratégia rodam normalmente.
+    """
+
+    def __init__(self, start=0.0):
+        self.virtual_time = float(start)
+        self.settler = None
+        self._ready = deque()
+        # heap de (instante, seq, _Handle): tuplas são comparadas em C; os cancelados saem ao chegar no topo
+        self._scheduled = []
+        self._seq = itertools.count()
+        self._running = False
+        self._closed = False
+        self._debug = False
+        self._exception_handler = None
+        self._task_factory = None
+
+    def time(self):
+        return self.virtual_time
+
+    # ------------------------------------------------------------------
+    # Callbacks, futures e tarefas
+
+    def call_soon(self, callback, *args, context=None):
+        handle = _Handle(None, callback, args, context)
+        self._ready.append(handle)
+        return handle
+
+    call_soon_threadsafe = call_soon
+
+    def call_at(self, when, callback, *args, context=None):
+        timer = _Handle(when, callback, args, context)
+        heapq.heappush(self._scheduled, (when, next(self._seq), timer))
+        return timer
+
+    def call_later(self, delay, callback, *args, context=None):
+        when = self.virtual_time + delay
+        timer = _Handle(when, callback, args, context)
+        heapq.heappush(self._scheduled, (when, next(self._seq), timer))
+        return timer
+
+    def create_future(self):
+        return asyncio.Future(loop=self)
+
+    def create_task(self, coro, *, name=None, context=None):
+        if self._task_factory is not None:
+            return self._task_factory(self, coro)
+        if context is None:
+            return asyncio.Task(coro, loop=self, name=name)
+        return asyncio.Task(coro, loop=self, name=name, context=context)
+
+    def set_task_factory(self, factory):
+        self._task_factory = factory
+
+    def get_task_factory(self):
+        return self._task_factory
+
+    def get_exception_handler(self):
+        return self._exception_handler
+
+    def set_exception_handler(self, handler):
+        self._exception_handler = handler
+
+    def default_exception_handler(self, context):
+        logger.error(f"❌ Erro no backtest: {context.get('message')} {context.get('exception') or ''}")
+
+    def call_exception_handler(self, context):
+        if self._exception_handler is not None:
+            self._exception_handler(self, context)
+        else:
+            self.default_exception_handler(context)
+
+    def get_debug(self):
+        return self._debug
+
+    def set_debug(self, enabled):
+        self._debug = enabled
+
+    def is_running(self):
+        return self._running
+
+    def is_closed(self):
+        return self._closed
+
+    def close(self):
+        if self._running:
+            raise RuntimeError("Não é possível fechar um event loop em execução")
+        self._closed = True
+        self._ready.clear()
+        self._scheduled.clear()
+        self.settler = None
+
+    async def shutdown_asyncgens(self):
+        pass
+
+    async def shutdown_default_executor(self):
+        pass
+
+    # ------------------------------------------------------------------
+    # Execução
+
+    def run_until_complete(self, future, until=None):
+        """
+        Executa até ``future`` terminar e retorna seu resultado.
+
+        :param until: (opcional) Instante virtual limite. O relógio não passa
+            dele: ao atingi-lo a corrotina principal é encerrada (``close()``)
+            e :class:`asyncio.TimeoutError` é levantado.
+        """
+        if self._closed:
+            raise RuntimeError("Event loop fechado")
+        if self._running:
+            raise RuntimeError("O event loop já está em execução")
+        self._running = True
+        asyncio._set_running_loop(self)
+        try:
+            if asyncio.iscoroutine(future):
+                return self._drive(future, until)
+            future = asyncio.ensure_future(future, loop=self)
+            while not future.done():
+                if not self._run_once(until):
+                    raise asyncio.TimeoutError()
+            return future.result()
+        finally:
+            self._running = False
+            asyncio._set_running_loop(None)
+
+    def _drive(self, coro, until):
+        """Conduz a corrotina principal: ela só é retomada quando o que aguarda termina."""
+        ready = self._ready
+        try:
+            while True:
+                waiting = coro.send(None)
+                if waiting is None:
+                    # asyncio.sleep(0): os callbacks prontos rodam antes de retomar
+                    if ready:
+                        self._run_once(until)
+                    continue
+                if getattr(waiting, "_asyncio_future_blocking", None) is None:
+                    coro.close()
+                    raise RuntimeError(f"Valor inválido aguardado no backtest: {waiting!r}")
+                waiting._asyncio_future_blocking = False
+                while not waiting.done():
+                    if not self._run_once(until):
+                        coro.close()
+                        raise asyncio.TimeoutError()
+        except StopIteration as stop:
+            return stop.value
+
+    def _run_once(self, until=None):
+        """
+        Executa os callbacks prontos; sem nenhum, avança o relógio até o
+        próximo timer ou vencimento e liquida as ordens vencidas.
+
+        :returns: False ao atingir ``until`` (o relógio para nele).
+        """
+        ready = self._ready
+        if not ready:
+            scheduled = self._scheduled
+            while scheduled and scheduled[0][2]._cancelled:
+                heapq.heappop(scheduled)
+            settler = self.settler
+            expiry = settler.next_expiry() if settler is not None else None
+            if scheduled:
+                when = scheduled[0][0]
+                if expiry is not None and expiry < when:
+                    when = expiry
+            elif expiry is not None:
+                when = expiry
+            else:
+                raise RuntimeError("Backtest parado: nenhuma tarefa ou timer agendado")
+            now = self.virtual_time = max(self.virtual_time, when if until is None else min(when, until))
+            if expiry is not None and expiry <= now:
+                settler.settle_expired(now)
+            if until is not None and when >= until:
+                # Fim: as ordens vencidas até ``until`` são liquidadas, mas nada mais roda
+                return False
+            while scheduled and scheduled[0][0] <= now:
+                timer = heapq.heappop(scheduled)[2]
+                if not timer._cancelled:
+                    ready.append(timer)
+        for _ in range(len(ready)):
+            handle = ready.popleft()
+            if handle._cancelled:
+                continue
+            try:
+                handle._context.run(handle._callback, *handle._args)
+            except (SystemExit, KeyboardInterrupt):
+                raise
+            except BaseException as exc:
+                self.call_exception_handler({"message": f"Erro no callback {handle._callback!r}",
+                                             "exception": exc, "handle": handle})
+        return True
+
+
+class BacktestPocketOption(object):
+    """Superfície de operação da PocketOption sobre um :class:`History`."""
+
+    def __init__(self, history: History, balance=10000.0, payout=92, payouts=None,
+                 risk_limits: Optional[RiskLimits] = None):
+        """
+        :param history: Histórico de preços.
+        :param balance: Saldo inicial.
+        :param payout: Percentual pago nas ordens vencedoras.
+        :param payouts: (opcional) Payout por ativo, sobrepondo ``payout``.
+        :param risk_limits: (opcional) Limites do :class:`RiskEngine`.
+        """
+        self.history = history
+        self.balance = float(balance)
+        self.payout = payout
+        self.payouts = payouts or {}
+        self.order_book = OrderBook()
+        self.risk = RiskEngine(risk_limits)
+        self.order_book.add_close_listener(self.risk.on_order_closed)
+        self.deals = []
+        # heap de (closeTimestamp, id, deal) das ordens abertas
+        self._expiring = []
+        self._ids = itertools.count(1)
+        self._request_ids = itertools.count(1)
+
+    # ------------------------------------------------------------------
+    # Conexão e conta
+
+    async def connect(self):
+        return True
+
+    async def disconnect(self):
+        pass
+
+    async def wait_session_ready(self, timeout=10):
+        return True
+
+    @staticmethod
+    async def check_connect():
+        return True
+
+    async def get_balance(self):
+        return round(self.balance, 2)
+
+    async def GetPayout(self, pair):
+        if pair not in self.history.series:
+            return None
+        return self.payouts.get(pair, self.payout)
+
+    def get_server_timestamp(self):
+        """Timestamp do histórico no instante atual da simulação."""
+        return asyncio.get_running_loop().time()
+
+    def get_server_time_ns(self):
+        return int(self.get_server_timestamp() * 1e9)
+
+    def get_server_datetime(self):
+        return datetime.fromtimestamp(self.get_server_timestamp(), tz=timezone.utc)
+
+    # ------------------------------------------------------------------
+    # Ordens
+
+    async def buy(self, amount, active, action, expirations):
+        """
+        Abre uma ordem no preço atual do histórico.
+
+        Returns:
+            tuple: (True, order_id) em caso de sucesso ou (False, None) em caso de falha
+        """
+        now = asyncio.get_running_loop().time()
+        open_price = self.history.price_at(active, now)
+        if open_price is None or action not in ("call", "put"):
+            return False, None
+        if amount > self.balance:
+            return False, None
+        req_id = str(next(self._request_ids))
+        if await self.risk.acquire(req_id, amount, active, action, expirations):
+            return False, None
+
+        deal = {
+            "id": next(self._ids),
+            "asset": active,
+            "amount": amount,
+            "command": 0 if action == "call" else 1,
+            "openPrice": open_price,
+            "openTimestamp": now,
+            "closeTimestamp": now + expirations,
+            "percentProfit": self.payouts.get(active, self.payout),
+        }
+        self.balance -= amount
+        self.risk.confirm(req_id, deal["id"])
+        self.order_book.on_open(deal)
+        heapq.heappush(self._expiring, (deal["closeTimestamp"], deal["id"], deal))
+        return True, deal["id"]
+
+    def next_expiry(self):
+        """Vencimento da próxima ordem aberta (None sem ordens abertas)."""
+        return self._expiring[0][0] if self._expiring else None
+
+    def settle_expired(self, now):
+        """Liquida em lote, pelo preço histórico no vencimento, as ordens vencidas até ``now``."""
+        expiring = self._expiring
+        price_at = self.history.price_at
+        settled = []
+        while expiring and expiring[0][0] <= now:
+            deal = heapq.heappop(expiring)[2]
+            close_price = price_at(deal["asset"], deal["closeTimestamp"])
+            direction = 1 if deal["command"] == 0 else -1
+            if close_price is None or close_price == deal["openPrice"]:
+                profit = 0
+            elif (close_price - deal["openPrice"]) * direction > 0:
+                profit = round(deal["amount"] * deal["percentProfit"] / 100, 2)
+            else:
+                profit = -deal["amount"]
+            self.balance += deal["amount"] + profit
+            deal["closePrice"] = close_price
+            deal["profit"] = profit
+            settled.append(deal)
+        self.deals.extend(settled)
+        self.order_book.on_close(settled)
+
+    async def check_win(self, id_number, timeout=120):
+        """
+        Aguarda (em tempo virtual) o resultado de uma ordem.
+
+        O vencimento de cada ordem é conhecido: sem timer de timeout, a espera
+        vai direto até a liquidação ou, se ela cai depois do prazo, até o prazo.
+
+        Returns:
+            tuple: (profit, status) ou (None, "timeout")
+        """
+        order = self.order_book.get(id_number)
+        if order is not None and order.closed:
+            return order.profit, order.status
+        close_at = order.data.get("closeTimestamp") if order is not None else None
+        if close_at is None or close_at > asyncio.get_running_loop().time() + timeout:
+            await asyncio.sleep(timeout)
+            return None, "timeout"
+        return await order.result()
+
+    # ------------------------------------------------------------------
+    # Dados de mercado
+
+    async def get_candles(self, active, period, start_time=None, count=6000, count_request=1):
+        """
+        Velas OHLC até o instante atual (ou ``start_time``), no formato do ``get_candles`` real.
+
+        Como na sessão real, cada requisição cobre ``count`` pontos de 30s antes
+        do fim; nada posterior ao instante atual da simulação é retornado.
+        """
+        now = self.get_server_timestamp()
+        end = min(now, start_time) if start_time is not None else (now // period) * period
+        if active not in self.history.series:
+            return None
+        times, prices = self.history.window(active, end - count * count_request * HISTORY_STEP, end)
+
+        candles = []
+        current = None
+        for timestamp, price in zip(times, prices):
+            start = (timestamp // period) * period
+            if current is None or start != current["start"]:
+                current = {"start": start, "open": price, "high": price, "low": price, "close": price}
+                candles.append(current)
+            else:
+                if price > current["high"]:
+                    current["high"] = price
+                elif price < current["low"]:
+                    current["low"] = price
+                current["close"] = price
+        return [{"time": datetime.fromtimestamp(candle.pop("start"), tz=timezone.utc), **candle}
+                for candle in candles]
+
+
+class Backtest(object):
+    """Executa uma estratégia sobre o histórico em tempo virtual."""
+
+    def __init__(self, history: History, strategy, start=None, end=None, **options):
+        """
+        :param history: Histórico de preços.
+        :param strategy: Corrotina ``strategy(api)`` que recebe a :class:`BacktestPocketOption`.
+        :param start: (opcional) Timestamp inicial; por padrão o início do histórico.
+        :param end: (opcional) Timestamp final; por padrão o fim do histórico.
+        :param options: Repassados à :class:`BacktestPocketOption` (balance, payout...).
+        """
+        first, last = history.bounds()
+        self.history = history
+        self.strategy = strategy
+        self.start = first if start is None else start
+        self.end = last if end is None else end
+        self.options = options
+        self.api = None
+
+    def run(self):
+        """
+        Executa a estratégia até ela terminar ou o histórico acabar.
+
+        :returns: Relatório (ver :meth:`report`).
+        """
+        loop = VirtualTimeLoop(self.start)
+        started = time.perf_counter()
+        try:
+            # Contexto próprio: o estado global da simulação não vaza para quem chamou
+            contextvars.copy_context().run(self._run, loop)
+        finally:
+            loop.close()
+        report = self.report(time.perf_counter() - started, loop.virtual_time)
+        logger.info(f"📈 Backtest: {report['trades']} ordens, profit {report['profit']:.2f}, "
+                    f"{report['virtual_seconds'] / 86400:.1f} dias em {report['elapsed']:.2f}s")
+        return report
+
+    def _run(self, loop):
+        try:
+            loop.run_until_complete(self._main(), until=self.end)
+        except asyncio.TimeoutError:
+            pass
+        # Tarefas deixadas pela estratégia são canceladas sem avançar o relógio
+        tasks = asyncio.all_tasks(loop)
+        if tasks:
+            for task in tasks:
+                task.cancel()
+            try:
+                loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True), until=loop.time())
+            except asyncio.TimeoutError:
+                pass
+
+    async def _main(self):
+        # Estado global isolado: o livro de ordens registra as ordens em global_value
+        global_value.bind()
+        self.api = BacktestPocketOption(self.history, **self.options)
+        asyncio.get_running_loop().settler = self.api
+        await self.strategy(self.api)
+
+    def report(self, elapsed, virtual_end):
+        """Resumo das ordens liquidadas."""
+        deals = self.api.deals
+        wins = sum(1 for deal in deals if deal["profit"] > 0)
+        draws = sum(1 for deal in deals if deal["profit"] == 0)
+        initial = float(self.options.get("balance", 10000.0))
+
+        equity, peak, max_drawdown = initial, initial, 0.0
+        for deal in deals:
+            equity += deal["profit"]
+            peak = max(peak, equity)
+            max_drawdown = max(max_drawdown, peak - equity)
+
+        return {
+            "trades": len(deals),
+            "wins": wins,
+            "losses": len(deals) - wins - draws,
+            "draws": draws,
+            "open": self.api.risk.open_orders,
+            "win_rate": wins / len(deals) if deals else 0.0,
+            "profit": round(sum(deal["profit"] for deal in deals), 2),
+            "balance": round(self.api.balance, 2),
+            "max_drawdown": round(max_drawdown, 2),
+            "virtual_seconds": virtual_end - self.start,
+            "elapsed": elapsed,
+        }
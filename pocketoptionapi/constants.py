@@ -3,6 +3,7 @@ Autor: AdminhuDev
 """
 
 from typing import Dict, List
+import os
 import random
 
 ACTIVES = {
@@ -228,6 +229,27 @@ class REGION:
         "SERVER4": "wss://api-us-south.po.market/socket.io/?EIO=4&transport=websocket",
     }
 
+    # URLs usadas no lugar de todas as regiões (ex.: servidor local de testes).
+    # Também pode ser definido pela variável POCKETOPTION_WS_URL (separada por vírgulas).
+    OVERRIDE = None
+
+    @classmethod
+    def override(cls, urls):
+        """Conecta em ``urls`` no lugar das regiões reais (None restaura as regiões)."""
+        if isinstance(urls, str):
+            urls = [urls]
+        cls.OVERRIDE = list(urls) if urls else None
+
+    @classmethod
+    def get_override(cls):
+        """URLs que substituem as regiões, ou None."""
+        if cls.OVERRIDE:
+            return list(cls.OVERRIDE)
+        env_urls = os.getenv("POCKETOPTION_WS_URL", "").strip()
+        if env_urls:
+            return [url.strip() for url in env_urls.split(",") if url.strip()]
+        return None
+
     @classmethod
     def get_all(cls, randomize: bool = True) -> List[str]:
         """Get all region URLs"""
@@ -250,9 +272,20 @@ class REGION:
         """Get specific region URL"""
         return cls.REGIONS.get(region_name.upper())
 
+    @classmethod
+    def get_region_name(cls, url: Optional[str]) -> str:
+        """Get region name for a URL (the URL itself if unknown)"""
+        for name, region_url in cls.REGIONS.items():
+            if region_url == url:
+                return name
+        return url or "UNKNOWN"
+
     @classmethod
     def get_demo_regions(cls) -> List[str]:
         """Get demo region URLs in priority order"""
+        override = cls.get_override()
+        if override:
+            return override
         demo_urls = []
         priority_demos = ["DEMO", "DEMO_2"]
         
@@ -265,6 +298,9 @@ class REGION:
     @classmethod
     def get_priority_regions(cls) -> List[str]:
         """Get production regions in priority order - Europa first"""
+        override = cls.get_override()
+        if override:
+            return override
         priority_order = [
             "EUROPA",
             "SEYCHELLES", 
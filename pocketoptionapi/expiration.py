@@ -1,80 +1,163 @@
 """
 Utilitários para manipulação de datas e timestamps.
+
+As expirações são calculadas com aritmética inteira sobre timestamps (sem
+objetos datetime). :class:`ExpirationGrid` usa o relógio sincronizado do
+servidor e recalcula a grade de expirações válidas apenas uma vez por minuto.
 """
 import time
-from datetime import datetime, timedelta
+
+# Expirações de 1 a 5 minutos e marcas de 15 minutos oferecidas pela plataforma
+FIXED_EXPIRATIONS = 5
+QUARTER_EXPIRATIONS = 11
+QUARTER = 15 * 60
+# Antecedência mínima (segundos) para uma marca de 15 minutos ser válida
+QUARTER_MIN_LEAD = 5 * 60
+# Depois deste segundo do minuto a expiração de 1 minuto passa para o minuto seguinte
+FIXED_CUTOFF = 30
+
 
 def date_to_timestamp(date):
     """Converte um objeto datetime para timestamp."""
     return int(date.timestamp())
 
+
 def get_expiration_time(timestamp, duration):
     """
     Calcula o tempo de expiração mais próximo baseado em um timestamp dado e uma duração.
     O tempo de expiração sempre terminará no segundo :30 do minuto.
 
+    Mantém o deslocamento legado de duas horas; para expirações no relógio do
+    servidor use :class:`ExpirationGrid`.
+
     :param timestamp: O timestamp inicial para o cálculo.
     :param duration: A duração desejada em minutos.
     """
-    # Converter o timestamp dado para um objeto datetime
-    now_date = datetime.fromtimestamp(timestamp)
-
-    # Ajustar os segundos para :30 se não estiverem já, caso contrário, passar para o próximo :30
-    if now_date.second < 30:
-        exp_date = now_date.replace(second=30, microsecond=0)
+    minute = int(timestamp) - int(timestamp) % 60
+    if timestamp - minute < 30:
+        expiration = minute + 30
     else:
-        exp_date = (now_date + timedelta(minutes=1)).replace(second=30, microsecond=0)
+        expiration = minute + 90
 
-    # Calcular o tempo de expiração considerando a duração
     if duration > 1:
-        # Se a duração for mais de um minuto, calcular o tempo final adicionando a duração
-        # menos um minuto, já que já ajustamos para terminar em :30 segundos.
-        exp_date += timedelta(minutes=duration - 1)
+        expiration += (duration - 1) * 60
 
-    # Adicionar duas horas ao tempo de expiração
-    exp_date += timedelta(hours=2)
-    # Converter o tempo de expiração para timestamp
-    expiration_timestamp = date_to_timestamp(exp_date)
+    # Deslocamento legado de duas horas
+    return expiration + 2 * 3600
 
-    return expiration_timestamp
 
 def get_remaning_time(timestamp):
     """
     Calcula os tempos de expiração restantes.
-    
+
     :param timestamp: O timestamp inicial para o cálculo.
     :return: Lista de tuplas com (duração, tempo restante).
     """
-    now_date = datetime.fromtimestamp(timestamp)
-    exp_date = now_date.replace(second=0, microsecond=0)
-    if (int(date_to_timestamp(exp_date+timedelta(minutes=1)))-timestamp) > 30:
-        exp_date = exp_date+timedelta(minutes=1)
-    else:
-        exp_date = exp_date+timedelta(minutes=2)
-    
-    exp = []
-    for _ in range(5):
-        exp.append(date_to_timestamp(exp_date))
-        exp_date = exp_date+timedelta(minutes=1)
-    
-    idx = 11
-    index = 0
-    now_date = datetime.fromtimestamp(timestamp)
-    exp_date = now_date.replace(second=0, microsecond=0)
-    
-    while index < idx:
-        if int(exp_date.strftime("%M")) % 15 == 0 and (int(date_to_timestamp(exp_date))-int(timestamp)) > 60*5:
-            exp.append(date_to_timestamp(exp_date))
-            index = index+1
-        exp_date = exp_date+timedelta(minutes=1)
-
-    remaning = []
-
-    for idx, t in enumerate(exp):
-        if idx >= 5:
-            dr = 15*(idx-4)
-        else:
-            dr = idx+1
-        remaning.append((dr, int(t)-int(time.time())))
-
-    return remaning
\ No newline at end of file
+    now = int(time.time())
+    return [(duration, expiration - now) for duration, expiration in ExpirationGrid.compute(timestamp)]
+
+
+class ExpirationGrid(object):
+    """Grade de expirações válidas no relógio do servidor."""
+
+    def __init__(self, clock=time.time):
+        """
+        :param clock: Função que retorna o timestamp atual do servidor em segundos.
+        """
+        self.clock = clock
+        self._minute = None
+        self._fixed = ()
+        self._quarters = ()
+
+    @staticmethod
+    def compute(timestamp):
+        """
+        Calcula as expirações válidas para um timestamp.
+
+        :param timestamp: O timestamp do servidor.
+        :return: Lista de tuplas (duração em minutos, timestamp de expiração).
+        """
+        grid = ExpirationGrid(clock=lambda: timestamp)
+        return grid.expirations()
+
+    def _refresh(self, now):
+        minute = int(now) - int(now) % 60
+        if minute == self._minute:
+            return minute
+        # Marcas de minuto a partir do próximo minuto (uma extra para depois do corte)
+        self._fixed = tuple(minute + 60 * (index + 1) for index in range(FIXED_EXPIRATIONS + 1))
+        # Primeira marca de 15 minutos com mais de QUARTER_MIN_LEAD de antecedência
+        first_quarter = minute - minute % QUARTER
+        while first_quarter - minute <= QUARTER_MIN_LEAD:
+            first_quarter += QUARTER
+        self._quarters = tuple(first_quarter + QUARTER * index for index in range(QUARTER_EXPIRATIONS))
+        self._minute = minute
+        return minute
+
+    def _fixed_offset(self, now, minute):
+        return 0 if now - minute < FIXED_CUTOFF else 1
+
+    def expirations(self, now=None):
+        """
+        Lista as expirações válidas.
+
+        :param now: (opcional) Timestamp do servidor; padrão é o relógio.
+        :return: Lista de tuplas (duração em minutos, timestamp de expiração).
+        """
+        if now is None:
+            now = self.clock()
+        minute = self._refresh(now)
+        offset = self._fixed_offset(now, minute)
+        fixed = [(index + 1, self._fixed[offset + index]) for index in range(FIXED_EXPIRATIONS)]
+        quarters = [(15 * (index + 1), expiration) for index, expiration in enumerate(self._quarters)]
+        return fixed + quarters
+
+    def next_expiries(self, count=FIXED_EXPIRATIONS, now=None):
+        """
+        Próximas expirações de minuto.
+
+        :param count: Quantidade de expirações.
+        :return: Lista de timestamps de expiração.
+        """
+        if now is None:
+            now = self.clock()
+        minute = self._refresh(now)
+        first = self._fixed[self._fixed_offset(now, minute)]
+        return [first + 60 * index for index in range(count)]
+
+    def expiration_for(self, duration, now=None):
+        """
+        Timestamp de expiração para uma duração em minutos.
+
+        Durações múltiplas de 15 minutos usam a grade de 15 minutos; as demais
+        contam a partir da próxima expiração de minuto.
+
+        :param duration: A duração desejada em minutos.
+        """
+        if now is None:
+            now = self.clock()
+        minute = self._refresh(now)
+        if duration % 15 == 0 and duration // 15 <= QUARTER_EXPIRATIONS:
+            return self._quarters[duration // 15 - 1]
+        return self._fixed[self._fixed_offset(now, minute)] + 60 * (duration - 1)
+
+    def seconds_to_expiry(self, duration, now=None):
+        """
+        Segundos até a expiração de uma duração em minutos.
+
+        :param duration: A duração desejada em minutos.
+        """
+        if now is None:
+            now = self.clock()
+        return self.expiration_for(duration, now) - now
+
+    def expirations_for(self, durations, now=None):
+        """
+        Forma vetorizada de :meth:`expiration_for`: uma leitura do relógio para todas as ordens.
+
+        :param durations: Durações em minutos.
+        :return: Lista de timestamps de expiração, na mesma ordem.
+        """
+        if now is None:
+            now = self.clock()
+        return [self.expiration_for(duration, now) for duration in durations]
@@ -1,53 +1,116 @@
 """
 Autor: AdminhuDev
 Async-safe global state management
+
+O estado fica em um :class:`SessionValues`. Por padrão todas as sessões do
+processo usam o mesmo (comportamento original); para rodar várias contas no
+mesmo event loop, cada sessão recebe o seu com :func:`bind`. Como o contexto
+(contextvars) é herdado pelas tasks criadas a partir dali, ``global_value.balance``
+e os demais atributos passam a ler e escrever o estado da sessão corrente.
 """
 import asyncio
+import contextvars
+import sys
+import types
 from threading import Lock
 
-# Estado de conexão
-websocket_is_connected = False
 
-# Mutex async-safe para controle de concorrência
-_connection_lock = asyncio.Lock()
-_write_lock = asyncio.Lock()
+class SessionValues(object):
+    """Estado de uma sessão (conexão, saldo, ordens e payouts)."""
+
+    def __init__(self):
+        # Estado de conexão
+        self.websocket_is_connected = False
+
+        # Mutex async-safe para controle de concorrência
+        self._connection_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+
+        # Legacy - mantido para compatibilidade
+        self.ssl_Mutual_exclusion = False
+        self.ssl_Mutual_exclusion_write = False
+
+        self.SSID = None
+
+        self.check_websocket_if_error = False
+        self.websocket_error_reason = None
+
+        self.balance_id = None
+        self.balance = None
+        self.balance_type = None
+        self.balance_updated = None
+        self.result = None
+
+        # Estado das ordens com locks para thread-safety
+        self._order_lock = Lock()
+        self.order_data = {}
+        self.order_open = set()  # ids das ordens abertas
+        self.order_closed = set()  # ids das ordens fechadas
+        self.stat = {}  # id da ordem -> profit
+        self.DEMO = None
+
+        # Para obter os dados de pagamento para os diferentes pares
+        self.PayoutData = None
+        self.ParsedAssets = {}  # Dados de ativos processados pelo parser
 
-# Legacy - mantido para compatibilidade
-ssl_Mutual_exclusion = False
-ssl_Mutual_exclusion_write = False
 
-SSID = None
+_default = SessionValues()
+_current = contextvars.ContextVar("pocketoption_session_values", default=None)
+_FIELDS = frozenset(vars(_default))
 
-check_websocket_if_error = False
-websocket_error_reason = None
 
-balance_id = None
-balance = None
-balance_type = None
-balance_updated = None
-result = None
+def current():
+    """Retorna o estado da sessão do contexto corrente."""
+    values = _current.get()
+    return _default if values is None else values
 
-# Estado das ordens com locks para thread-safety
-_order_lock = Lock()
-order_data = {}
-order_open = []
-order_closed = []
-stat = []
-DEMO = None
 
-# Para obter os dados de pagamento para os diferentes pares
-PayoutData = None
-ParsedAssets = {}  # Dados de ativos processados pelo parser
+def bind(values=None):
+    """
+    Associa um estado de sessão ao contexto corrente.
+
+    :param values: (opcional) SessionValues a usar; por padrão um novo.
+    :returns: O SessionValues associado.
+    """
+    if values is None:
+        values = SessionValues()
+    _current.set(values)
+    return values
+
 
 # Funções helper async-safe
 async def get_connection_lock():
     """Retorna o lock de conexão assíncrono"""
-    return _connection_lock
+    return current()._connection_lock
 
 async def get_write_lock():
     """Retorna o lock de escrita assíncrono"""
-    return _write_lock
+    return current()._write_lock
 
 def get_order_lock():
     """Retorna o lock de ordens síncrono"""
-    return _order_lock
\ No newline at end of file
+    return current()._order_lock
+
+
+class _SessionModule(types.ModuleType):
+    """Redireciona os atributos de estado do módulo para a sessão corrente."""
+
+    def __getattr__(self, name):
+        if name in _FIELDS:
+            return getattr(current(), name)
+        raise AttributeError(f"module {self.__name__!r} has no attribute {name!r}")
+
+    def __setattr__(self, name, value):
+        if name in _FIELDS:
+            setattr(current(), name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        if name in _FIELDS:
+            delattr(current(), name)
+        else:
+            super().__delattr__(name)
+
+
+sys.modules[__name__].__class__ = _SessionModule
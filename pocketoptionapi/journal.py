@@ -0,0 +1,169 @@
+"""
+Diário (journal) append-only das ordens para recuperação após falhas.
+
+Cada linha é um registro JSON: intenção de ordem (antes do envio), confirmação
+do servidor e resultado. As linhas são entregues ao sistema operacional a cada
+registro (sobrevivem à queda do processo) e o fsync é feito em lotes.
+"""
+import json
+import os
+import time
+from typing import Any, Dict
+
+from loguru import logger
+
+# Margem (segundos) além da expiração para descartar intenções sem confirmação
+STALE_INTENT_GRACE = 60
+
+
+class JournalState(object):
+    """Estado reconstruído a partir do diário."""
+
+    def __init__(self):
+        # order_id -> dados da confirmação, para ordens ainda sem resultado
+        self.open_orders: Dict[Any, Dict[str, Any]] = {}
+        # requestId -> intenção sem confirmação (a ordem pode ou não ter sido aceita)
+        self.pending_intents: Dict[str, Dict[str, Any]] = {}
+
+    def apply(self, record: Dict[str, Any]) -> None:
+        """Aplica um registro ao estado."""
+        kind = record.get("type")
+        if kind == "intent":
+            self.pending_intents[str(record["requestId"])] = record
+        elif kind == "confirm":
+            self.pending_intents.pop(str(record.get("requestId")), None)
+            self.open_orders[record["id"]] = record
+        elif kind == "result":
+            self.open_orders.pop(record["id"], None)
+        elif kind == "discard":
+            self.pending_intents.pop(str(record["requestId"]), None)
+
+
+class OrderJournal(object):
+    """Diário append-only de intenções, confirmações e resultados de ordens."""
+
+    def __init__(self, path: str, sync_every: int = 16, sync_interval: float = 1.0):
+        """
+        :param path: Caminho do arquivo do diário.
+        :param sync_every: Número de registros entre fsyncs.
+        :param sync_interval: Tempo máximo em segundos entre fsyncs.
+        """
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.state = JournalState()
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @classmethod
+    def open(cls, path: str, **kwargs) -> "OrderJournal":
+        """Abre o diário, reconstruindo o estado e compactando o arquivo.
+
+        Apenas ordens abertas e intenções sem confirmação são mantidas no
+        arquivo compactado; o resto do histórico já foi resolvido.
+        """
+        journal = cls(path, **kwargs)
+        journal.state = cls.replay(path)
+
+        # Intenções cuja expiração já passou não podem mais ser conciliadas
+        now = time.time()
+        journal.state.pending_intents = {
+            request_id: record for request_id, record in journal.state.pending_intents.items()
+            if record.get("ts", now) + record.get("time", 0) + STALE_INTENT_GRACE > now
+        }
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for record in journal.state.pending_intents.values():
+                fh.write(_encode(record))
+            for record in journal.state.open_orders.values():
+                fh.write(_encode(record))
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, path)
+
+        journal._file = open(path, "a", encoding="utf-8")
+        return journal
+
+    @staticmethod
+    def replay(path: str) -> JournalState:
+        """Lê o diário e reconstrói o estado das ordens.
+
+        Uma última linha truncada (queda no meio da escrita) é ignorada.
+        """
+        state = JournalState()
+        if not os.path.exists(path):
+            return state
+
+        with open(path, "r", encoding="utf-8") as fh:
+            for line in fh:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"⚠️ Registro inválido ignorado no diário {path}")
+                    continue
+                state.apply(record)
+        return state
+
+    def intent(self, request_id, amount, active, action, expirations) -> None:
+        """Registra a intenção de ordem antes do envio."""
+        self._append({
+            "type": "intent",
+            "requestId": request_id,
+            "amount": amount,
+            "asset": active,
+            "action": action,
+            "time": expirations,
+            "ts": time.time(),
+        })
+
+    def confirm(self, request_id, order_data: Dict[str, Any]) -> None:
+        """Registra a confirmação do servidor para a ordem."""
+        record = {"type": "confirm", "requestId": request_id}
+        for key in ("id", "asset", "amount", "command", "openTimestamp", "closeTimestamp", "isDemo"):
+            if key in order_data:
+                record[key] = order_data[key]
+        self._append(record)
+
+    def discard(self, request_id) -> None:
+        """Registra que a ordem foi rejeitada ou não teve resposta."""
+        self._append({"type": "discard", "requestId": request_id})
+
+    def result(self, order_id, profit) -> None:
+        """Registra o resultado de uma ordem presente no diário."""
+        if order_id in self.state.open_orders:
+            self._append({"type": "result", "id": order_id, "profit": profit})
+
+    def on_order_closed(self, order) -> None:
+        """Listener de fechamento para o :class:`OrderBook`."""
+        self.result(order.id, order.profit)
+
+    def sync(self) -> None:
+        """Força o fsync dos registros pendentes."""
+        if self._file is None or self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """Sincroniza e fecha o arquivo do diário."""
+        if self._file is not None and not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self.state.apply(record)
+        self._file.write(_encode(record))
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+
+def _encode(record: Dict[str, Any]) -> str:
+    return json.dumps(record, separators=(",", ":")) + "\n"
@@ -0,0 +1,144 @@
+"""
+Métricas de latência das ordens.
+
+Os tempos são capturados com time.perf_counter_ns em cada etapa da ordem e
+agregados em histogramas log-lineares (estilo HDR) por região do servidor.
+"""
+import time
+from collections import defaultdict
+from typing import Dict, Optional
+
+# Cada potência de 2 é dividida em 2**SUB_BUCKET_BITS faixas (erro relativo < 3.2%)
+SUB_BUCKET_BITS = 5
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+_EXACT_LIMIT = SUB_BUCKETS << 1
+
+# Etapas de uma ordem, na ordem em que acontecem
+STAGES = (
+    "send",        # buy() -> frame escrito no websocket
+    "ack",         # frame escrito -> successopenOrder
+    "payload",     # successopenOrder -> dados da ordem (requestId)
+    "round_trip",  # buy() -> dados da ordem
+    "close",       # dados da ordem -> fechamento
+)
+
+
+class LatencyHistogram(object):
+    """Histograma de latências em nanossegundos com registro O(1)."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * (64 * SUB_BUCKETS + _EXACT_LIMIT)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value):
+        if value < _EXACT_LIMIT:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return shift * SUB_BUCKETS + (value >> shift)
+
+    @staticmethod
+    def _value_at(index):
+        """Valor representativo (ponto médio) da faixa."""
+        if index < _EXACT_LIMIT:
+            return index
+        shift = index // SUB_BUCKETS - 1
+        top = index - shift * SUB_BUCKETS
+        return (top << shift) + ((1 << shift) >> 1)
+
+    def record(self, value_ns):
+        """Registra uma amostra em nanossegundos."""
+        if value_ns < 0:
+            value_ns = 0
+        self.counts[self._index(value_ns)] += 1
+        self.count += 1
+        self.total += value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def percentile(self, percent):
+        """Retorna o valor (ns) no percentil informado (0-100)."""
+        if not self.count:
+            return 0
+        target = max(1, int(round(self.count * percent / 100.0)))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            if bucket:
+                seen += bucket
+                if seen >= target:
+                    return min(self._value_at(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Resumo em milissegundos."""
+        return {
+            "count": self.count,
+            "mean": self.total / self.count / 1e6 if self.count else 0.0,
+            "p50": self.percentile(50) / 1e6,
+            "p99": self.percentile(99) / 1e6,
+            "p999": self.percentile(99.9) / 1e6,
+            "max": self.max / 1e6,
+        }
+
+
+class LatencyRecorder(object):
+    """Acompanha as etapas de cada ordem e agrega as latências por região."""
+
+    def __init__(self):
+        self.histograms = defaultdict(lambda: {stage: LatencyHistogram() for stage in STAGES})
+        # requestId -> [região, buy(), frame escrito]
+        self._requests = {}
+        # order_id -> (região, dados da ordem recebidos)
+        self._open_orders = {}
+
+    def order_started(self, request_id, region):
+        """buy() foi chamado."""
+        now = time.perf_counter_ns()
+        self._requests[str(request_id)] = [region, now, None]
+
+    def order_written(self, request_id):
+        """O frame da ordem foi escrito no websocket."""
+        stamps = self._requests.get(str(request_id))
+        if stamps is not None and stamps[2] is None:
+            stamps[2] = time.perf_counter_ns()
+            self.histograms[stamps[0]]["send"].record(stamps[2] - stamps[1])
+
+    def order_confirmed(self, request_id, order_id, ack_ns: Optional[int] = None):
+        """Os dados da ordem chegaram (ack_ns: chegada do successopenOrder)."""
+        stamps = self._requests.pop(str(request_id), None)
+        if stamps is None:
+            return
+        now = time.perf_counter_ns()
+        region, started, written = stamps
+        histograms = self.histograms[region]
+        histograms["round_trip"].record(now - started)
+        if written is not None and ack_ns is not None and ack_ns >= written:
+            histograms["ack"].record(ack_ns - written)
+            histograms["payload"].record(now - ack_ns)
+        if order_id is not None:
+            self._open_orders[order_id] = (region, now)
+
+    def order_discarded(self, request_id):
+        """A ordem falhou ou não teve resposta."""
+        self._requests.pop(str(request_id), None)
+
+    def order_closed(self, order):
+        """Listener de fechamento para o :class:`OrderBook`."""
+        opened = self._open_orders.pop(order.id, None)
+        if opened is not None:
+            self.histograms[opened[0]]["close"].record(time.perf_counter_ns() - opened[1])
+
+    def stats(self) -> Dict[str, Dict[str, dict]]:
+        """Resumo por região e etapa, em milissegundos."""
+        return {
+            region: {stage: histogram.summary() for stage, histogram in stages.items() if histogram.count}
+            for region, stages in self.histograms.items()
+        }
+
+    def reset(self):
+        """Descarta as amostras acumuladas."""
+        self.histograms.clear()
@@ -0,0 +1,247 @@
+"""
+Autor: AdminhuDev
+Paper trading: ordens registradas e liquidadas localmente pelo updateStream.
+
+:class:`PaperAccount` abre a ordem no último preço recebido do ativo, com o
+payout atual da lista de ativos, e a liquida pelo último tick com timestamp
+até o vencimento (``closeTimestamp``), no momento em que chega o primeiro tick
+posterior. Se o ativo parar de enviar ticks, a ordem é liquidada pelo último
+preço conhecido ``settle_grace`` segundos após o vencimento.
+
+Nenhuma ordem é enviada ao servidor: as contas de papel não consomem os
+limites de ordens da conta e várias delas (uma por variante de estratégia)
+podem operar ao mesmo tempo sobre a mesma conexão.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+
+from loguru import logger
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.ws.objects.order_book import OrderBook
+
+# Período usado no changeSymbol ao assinar o stream de um ativo sem ticks
+STREAM_PERIOD = 60
+
+_payout_cache = (None, {})
+
+
+def current_payout(pair):
+    """Payout atual do ativo na lista de ativos da sessão (None se desconhecido)."""
+    global _payout_cache
+    data = global_value.PayoutData
+    if not data or data == "{}":
+        return None
+    raw, table = _payout_cache
+    if raw is not data:
+        table = {}
+        try:
+            for item in json.loads(data):
+                if len(item) > 5:
+                    table[item[1]] = item[5]
+        except (json.JSONDecodeError, TypeError, IndexError):
+            pass
+        _payout_cache = (data, table)
+    return table.get(pair)
+
+
+class PaperAccount(object):
+    """Conta de papel sobre os ticks recebidos por uma :class:`PocketOptionAPI`."""
+
+    def __init__(self, api, order_book=None, balance=10000.0, settle_grace=5.0, price_timeout=5.0, pocket=None):
+        """
+        :param api: :class:`PocketOptionAPI` conectada (fonte dos ticks e do relógio do servidor).
+        :param order_book: (opcional) Livro de ordens onde registrar as ordens; por padrão um próprio.
+        :param balance: Saldo inicial da conta de papel.
+        :param settle_grace: Segundos após o vencimento para liquidar sem um tick posterior.
+        :param price_timeout: Segundos aguardando o primeiro tick de um ativo sem preço.
+        :param pocket: (opcional) :class:`PocketOption` para a qual os demais métodos
+            (``get_candles``, ``on_candle_close``...) são repassados.
+        """
+        self.api = api
+        self.order_book = order_book if order_book is not None else OrderBook()
+        self.balance = float(balance)
+        self.settle_grace = settle_grace
+        self.price_timeout = price_timeout
+        self.pocket = pocket
+        self.deals = []
+        # ativo -> (timestamp, preço) do último tick
+        self._prices = {}
+        # ativo -> heap de (closeTimestamp, seq, deal) das ordens abertas
+        self._pending = {}
+        self._price_waiters = {}
+        self._timers = {}
+        self._ids = itertools.count(1)
+        self._seq = itertools.count()
+        self._prefix = f"paper-{id(self):x}-"
+        api.candle_builder.add_tick_listener(self.on_tick)
+
+    def __getattr__(self, name):
+        pocket = self.__dict__.get("pocket")
+        if pocket is None:
+            raise AttributeError(name)
+        return getattr(pocket, name)
+
+    # ------------------------------------------------------------------
+    # Conta
+
+    async def get_balance(self):
+        return round(self.balance, 2)
+
+    async def GetPayout(self, pair):
+        return current_payout(pair)
+
+    def stats(self):
+        """Resumo das ordens liquidadas (para comparar variantes)."""
+        deals = self.deals
+        wins = sum(1 for deal in deals if deal["profit"] > 0)
+        draws = sum(1 for deal in deals if deal["profit"] == 0)
+        return {
+            "trades": len(deals),
+            "wins": wins,
+            "losses": len(deals) - wins - draws,
+            "draws": draws,
+            "open": len(self._timers),
+            "win_rate": wins / len(deals) if deals else 0.0,
+            "profit": round(sum(deal["profit"] for deal in deals), 2),
+            "balance": round(self.balance, 2),
+        }
+
+    def close(self):
+        """Para de acompanhar os ticks; ordens abertas ficam sem liquidação."""
+        self.api.candle_builder.remove_tick_listener(self.on_tick)
+        for timer in self._timers.values():
+            timer.cancel()
+        self._timers.clear()
+        self._pending.clear()
+
+    # ------------------------------------------------------------------
+    # Ordens
+
+    async def buy(self, amount, active, action, expirations):
+        """
+        Registra uma ordem de papel no último preço do ativo.
+
+        Returns:
+            tuple: (True, order_id) em caso de sucesso ou (False, None) em caso de falha
+        """
+        if action not in ("call", "put") or expirations <= 0:
+            logger.error(f"📝 Ordem de papel inválida: {action} {expirations}s")
+            return False, None
+        if amount > self.balance:
+            logger.error(f"📝 Saldo de papel insuficiente: {self.balance:.2f} < {amount}")
+            return False, None
+        payout = current_payout(active)
+        if payout is None:
+            logger.error(f"📝 Payout de {active} indisponível; ordem de papel rejeitada")
+            return False, None
+        tick = self._prices.get(active) or self.api.candle_builder.last_tick.get(active)
+        if tick is None:
+            tick = await self._wait_price(active)
+            if tick is None:
+                logger.error(f"📝 Sem ticks de {active} após {self.price_timeout}s; ordem de papel rejeitada")
+                return False, None
+
+        now = self.api.server_time()
+        deal = {
+            "id": self._prefix + str(next(self._ids)),
+            "asset": active,
+            "amount": amount,
+            "command": 0 if action == "call" else 1,
+            "openPrice": tick[1],
+            "openTimestamp": now,
+            "closeTimestamp": now + expirations,
+            "percentProfit": payout,
+            "isPaper": True,
+        }
+        self.balance -= amount
+        self._prices.setdefault(active, tick)
+        heapq.heappush(self._pending.setdefault(active, []), (deal["closeTimestamp"], next(self._seq), deal))
+        self._timers[deal["id"]] = asyncio.get_running_loop().call_later(
+            expirations + self.settle_grace, self._settle_late, deal)
+        self.order_book.on_open(deal)
+        logger.info(f"📝 Ordem de papel {deal['id']}: {action} {amount} {active} @ {tick[1]} ({expirations}s)")
+        return True, deal["id"]
+
+    async def check_win(self, id_number, timeout=120):
+        """
+        Aguarda o resultado de uma ordem de papel.
+
+        Returns:
+            tuple: (profit, status) ou (None, "timeout")
+        """
+        try:
+            return await asyncio.wait_for(self.order_book.result(id_number), timeout)
+        except asyncio.TimeoutError:
+            return None, "timeout"
+
+    async def _wait_price(self, active):
+        """Assina o stream do ativo e aguarda o primeiro tick."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._price_waiters.setdefault(active, []).append(waiter)
+
+        async def subscribe():
+            await self.api.change_symbol.async_call(active, STREAM_PERIOD)
+            return await waiter
+
+        try:
+            # O envio também entra no prazo: sem conexão ele aguarda a sessão ser retomada
+            return await asyncio.wait_for(subscribe(), self.price_timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            waiters = self._price_waiters.get(active)
+            if waiters and waiter in waiters:
+                waiters.remove(waiter)
+
+    # ------------------------------------------------------------------
+    # Liquidação
+
+    def on_tick(self, asset, timestamp, price):
+        """Listener de ticks do :class:`CandleBuilder`: liquida as ordens vencidas."""
+        pending = self._pending.get(asset)
+        if pending:
+            # Vencidas antes deste tick: vale o último preço até o vencimento
+            previous = self._prices.get(asset)
+            while pending and pending[0][0] < timestamp:
+                self._settle(heapq.heappop(pending)[2], previous[1])
+            self._prices[asset] = (timestamp, price)
+            while pending and pending[0][0] <= timestamp:
+                self._settle(heapq.heappop(pending)[2], price)
+        else:
+            self._prices[asset] = (timestamp, price)
+
+        waiters = self._price_waiters.pop(asset, None)
+        if waiters:
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result((timestamp, price))
+
+    def _settle_late(self, deal):
+        """Liquida pelo último preço conhecido quando não chega tick após o vencimento."""
+        pending = self._pending.get(deal["asset"])
+        if not pending or deal["id"] not in self._timers:
+            return
+        pending[:] = [entry for entry in pending if entry[2] is not deal]
+        heapq.heapify(pending)
+        logger.warning(f"📝 Sem ticks de {deal['asset']} após o vencimento; "
+                       f"ordem de papel {deal['id']} liquidada pelo último preço")
+        self._settle(deal, self._prices[deal["asset"]][1])
+
+    def _settle(self, deal, close_price):
+        timer = self._timers.pop(deal["id"], None)
+        if timer is not None:
+            timer.cancel()
+        direction = 1 if deal["command"] == 0 else -1
+        if close_price == deal["openPrice"]:
+            profit = 0
+        elif (close_price - deal["openPrice"]) * direction > 0:
+            profit = round(deal["amount"] * deal["percentProfit"] / 100, 2)
+        else:
+            profit = -deal["amount"]
+        self.balance += deal["amount"] + profit
+        deal.update(closePrice=close_price, profit=profit)
+        self.deals.append(deal)
+        self.order_book.on_close((deal,))
@@ -0,0 +1,225 @@
+"""
+Autor: AdminhuDev
+Gravação dos frames brutos do websocket e reprodução com a temporização original.
+
+O :class:`FrameRecorder` grava cada frame recebido (antes do parse do
+``on_message``) e cada frame enviado, com o timestamp monotônico, em um arquivo
+gzip append-only. Cada registro é o cabeçalho ``<QBI`` (``monotonic_ns``,
+flags e tamanho) seguido do payload; as flags indicam a direção e se o frame é
+binário. Cada abertura acrescenta um novo membro gzip ao arquivo, e os dados
+são descarregados em lotes (``Z_SYNC_FLUSH``), então uma queda do processo perde
+no máximo o último lote.
+
+O :class:`FrameReplayer` lê o arquivo e entrega os frames a um handler em 1x,
+Nx ou na velocidade máxima: no ``on_message`` de um cliente
+(:meth:`FrameReplayer.feed`) ou no servidor local
+(:meth:`MockPocketOptionServer.replay`).
+"""
+import asyncio
+import gzip
+import inspect
+import struct
+import time
+import zlib
+from typing import Iterator, NamedTuple, Optional, Union
+
+from loguru import logger
+
+RECORD_HEADER = struct.Struct("<QBI")
+
+INBOUND = 0
+OUTBOUND = 1
+# Bits das flags de cada registro
+_OUTBOUND = 1
+_BINARY = 2
+
+
+class Frame(NamedTuple):
+    """Frame gravado."""
+    timestamp_ns: int
+    direction: int
+    payload: Union[str, bytes]
+
+
+class FrameRecorder(object):
+    """Grava os frames do websocket em um arquivo gzip append-only."""
+
+    def __init__(self, path, flush_every=256, flush_interval=1.0, compresslevel=6):
+        """
+        :param path: Caminho do arquivo de gravação (acrescenta se já existir).
+        :param flush_every: Número de frames entre descargas do buffer.
+        :param flush_interval: Tempo máximo em segundos entre descargas.
+        :param compresslevel: Nível de compressão do gzip (1 = mais rápido).
+        """
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.frames = 0
+        self._file = gzip.open(path, "ab", compresslevel=compresslevel)
+        self._buffer = bytearray()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def record(self, message, direction=INBOUND):
+        """Grava um frame (str ou bytes) na direção indicada."""
+        if self._file is None:
+            return
+        if isinstance(message, str):
+            payload = message.encode("utf-8")
+            flags = 0
+        else:
+            payload = bytes(message)
+            flags = _BINARY
+        if direction == OUTBOUND:
+            flags |= _OUTBOUND
+        # Os frames são comprimidos em lote na descarga, não um a um
+        self._buffer += RECORD_HEADER.pack(time.monotonic_ns(), flags, len(payload))
+        self._buffer += payload
+        self.frames += 1
+
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def inbound(self, message):
+        self.record(message, INBOUND)
+
+    def outbound(self, message):
+        self.record(message, OUTBOUND)
+
+    def flush(self):
+        """Descarrega o buffer comprimido no arquivo (legível mesmo sem close)."""
+        if self._file is None:
+            return
+        self._file.write(self._buffer)
+        self._buffer.clear()
+        self._file.flush(zlib.Z_SYNC_FLUSH)
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def wrap(self, ws):
+        """Envolve a conexão para gravar os frames enviados."""
+        return RecordingWebSocket(ws, self)
+
+    def close(self):
+        if self._file is not None:
+            self._file.write(self._buffer)
+            self._file.close()
+            self._file = None
+            logger.info(f"🎞️ Gravação encerrada: {self.frames} frames em {self.path}")
+
+
+class RecordingWebSocket(object):
+    """Conexão websocket que grava cada ``send`` antes de enviá-lo."""
+
+    def __init__(self, ws, recorder):
+        self.ws = ws
+        self.recorder = recorder
+
+    def __getattr__(self, name):
+        return getattr(self.ws, name)
+
+    def __aiter__(self):
+        return self.ws.__aiter__()
+
+    async def send(self, message):
+        self.recorder.outbound(message)
+        await self.ws.send(message)
+
+
+class _DiscardSocket(object):
+    """Conexão sem rede usada ao reproduzir frames em um cliente desconectado."""
+
+    async def send(self, message):
+        pass
+
+    async def close(self):
+        pass
+
+
+class FrameReplayer(object):
+    """Reproduz um arquivo gravado pelo :class:`FrameRecorder`."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def frames(self, direction: Optional[int] = INBOUND) -> Iterator[Frame]:
+        """
+        Frames do arquivo na ordem gravada.
+
+        :param direction: INBOUND, OUTBOUND ou None para as duas direções.
+        """
+        with gzip.open(self.path, "rb") as fh:
+            while True:
+                try:
+                    header = fh.read(RECORD_HEADER.size)
+                    if len(header) < RECORD_HEADER.size:
+                        return
+                    timestamp_ns, flags, size = RECORD_HEADER.unpack(header)
+                    payload = fh.read(size)
+                except (EOFError, zlib.error):
+                    # Gravação interrompida: o último lote não foi finalizado
+                    return
+                if len(payload) < size:
+                    return
+                frame_direction = OUTBOUND if flags & _OUTBOUND else INBOUND
+                if direction is not None and frame_direction != direction:
+                    continue
+                yield Frame(timestamp_ns, frame_direction,
+                            payload if flags & _BINARY else payload.decode("utf-8"))
+
+    async def replay(self, handler, speed: Optional[float] = 1.0, direction: Optional[int] = INBOUND):
+        """
+        Entrega os frames ao ``handler`` respeitando os intervalos gravados.
+
+        :param handler: Função ou corrotina chamada com cada :class:`Frame`.
+        :param speed: 1.0 = tempo real, 10.0 = dez vezes mais rápido, None ou 0
+            = velocidade máxima (sem esperas).
+        :param direction: Direção dos frames reproduzidos (None = todas).
+        :returns: Dicionário com ``frames``, ``elapsed`` e ``frames_per_second``.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        previous = None
+        offset_ns = 0
+        count = 0
+        for frame in self.frames(direction):
+            if speed:
+                # Intervalos somados a partir do início, sem acumular o atraso de cada espera;
+                # entre gravações de processos diferentes o relógio monotônico pode voltar
+                if previous is not None:
+                    offset_ns += max(0, frame.timestamp_ns - previous)
+                previous = frame.timestamp_ns
+                delay = started + offset_ns / 1e9 / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            result = handler(frame)
+            if inspect.isawaitable(result):
+                await result
+            count += 1
+            if not speed and count % 1000 == 0:
+                await asyncio.sleep(0)  # não monopolizar o event loop
+
+        elapsed = loop.time() - started
+        return {"frames": count, "elapsed": elapsed,
+                "frames_per_second": count / elapsed if elapsed > 0 else float(count)}
+
+    async def feed(self, client, speed: Optional[float] = None):
+        """
+        Reproduz os frames recebidos no ``on_message`` de um :class:`WebsocketClient`.
+
+        Sem conexão aberta, os envios que o cliente faria em resposta são descartados.
+        """
+        if client.websocket is None:
+            client.websocket = _DiscardSocket()
+
+        async def deliver(frame):
+            try:
+                await client.on_message(frame.payload)
+            except Exception as e:
+                logger.error(f"❌ Erro ao processar frame reproduzido: {e}")
+
+        stats = await self.replay(deliver, speed)
+        logger.info(f"🎞️ {stats['frames']} frames reproduzidos em {stats['elapsed']:.3f}s "
+                    f"({stats['frames_per_second']:.0f} frames/s)")
+        return stats
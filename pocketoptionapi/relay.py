@@ -0,0 +1,329 @@
+"""
+Autor: AdminhuDev
+Relay de dados de mercado: uma conexão com a corretora, vários consumidores locais.
+
+O :class:`MarketDataRelay` usa uma única sessão :class:`PocketOption` e
+repassa ticks e velas fechadas a vários processos locais por um socket Unix.
+Cada ativo é assinado na corretora uma única vez, no primeiro pedido de um
+consumidor. Quem entra recebe primeiro um snapshot (último tick, última vela
+fechada e vela em formação) e fica atualizado imediatamente.
+
+Framing binário (little-endian): cabeçalho ``<BH`` (tipo, tamanho do payload)
+seguido do payload. Os ativos são identificados por um id de 16 bits
+anunciado em um frame ASSET antes do primeiro uso em cada conexão; um tick
+ocupa 21 bytes.
+"""
+import asyncio
+import os
+import stat
+import struct
+from collections import defaultdict
+from typing import Dict, Optional, Set
+
+from loguru import logger
+
+# Tipos de frame (relay -> consumidor)
+ASSET = 1      # id do ativo + nome
+TICK = 2       # id, timestamp, preço
+CANDLE = 3     # id, período, início, parcial, open, high, low, close
+SNAPSHOT = 4   # fim do snapshot do ativo
+ERROR = 5      # mensagem de erro
+# Tipos de frame (consumidor -> relay)
+SUBSCRIBE = 16    # período + nome do ativo
+UNSUBSCRIBE = 17  # período + nome do ativo
+
+HEADER = struct.Struct("<BH")
+TICK_BODY = struct.Struct("<Hdd")
+CANDLE_BODY = struct.Struct("<HIIBdddd")
+TICK_FRAME = struct.Struct("<BH" + TICK_BODY.format[1:])
+CANDLE_FRAME = struct.Struct("<BH" + CANDLE_BODY.format[1:])
+ASSET_ID = struct.Struct("<H")
+PERIOD = struct.Struct("<I")
+
+# Bytes pendentes no socket de um consumidor antes de ele ser desconectado
+MAX_BUFFER = 1 << 20
+
+
+def encode_frame(kind, payload=b""):
+    """Monta um frame com cabeçalho."""
+    return HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_tick(asset_id, timestamp, price):
+    return TICK_FRAME.pack(TICK, TICK_BODY.size, asset_id, timestamp, price)
+
+
+def encode_candle(asset_id, period, bar, partial=False):
+    return CANDLE_FRAME.pack(CANDLE, CANDLE_BODY.size, asset_id, period, int(bar["time"]),
+                             1 if partial else 0, bar["open"], bar["high"], bar["low"], bar["close"])
+
+
+def encode_subscription(kind, asset, period):
+    return encode_frame(kind, PERIOD.pack(period) + asset.encode())
+
+
+def decode_subscription(payload):
+    """Retorna (ativo, período) de um frame SUBSCRIBE/UNSUBSCRIBE."""
+    return payload[PERIOD.size:].decode(), PERIOD.unpack_from(payload)[0]
+
+
+async def read_frame(reader):
+    """Lê um frame do stream. Retorna (tipo, payload)."""
+    kind, size = HEADER.unpack(await reader.readexactly(HEADER.size))
+    payload = await reader.readexactly(size) if size else b""
+    return kind, payload
+
+
+class RelayConnection(object):
+    """Consumidor conectado ao relay."""
+
+    def __init__(self, writer):
+        self.writer = writer
+        # ids de ativos já anunciados nesta conexão
+        self.announced = set()
+        # (ativo, período) assinados
+        self.subscriptions = set()
+        self.closed = False
+
+
+class MarketDataRelay(object):
+    """Repassa os dados de mercado de uma sessão a consumidores locais."""
+
+    def __init__(self, pocket, path, max_buffer=MAX_BUFFER):
+        """
+        :param pocket: Sessão :class:`PocketOption` usada como fonte.
+        :param path: Caminho do socket Unix.
+        :param max_buffer: Bytes pendentes tolerados por consumidor; acima disso ele é desconectado.
+        """
+        self.pocket = pocket
+        self.path = path
+        self.max_buffer = max_buffer
+        self.builder = pocket.api.candle_builder
+        self.asset_ids: Dict[str, int] = {}
+        self.asset_frames: Dict[str, bytes] = {}
+        # (ativo, período) assinados na corretora
+        self.upstream = set()
+        # ativo -> consumidores que recebem os ticks
+        self.tick_subscribers: Dict[str, Set[RelayConnection]] = defaultdict(set)
+        # (ativo, período) -> consumidores que recebem as velas
+        self.candle_subscribers: Dict[tuple, Set[RelayConnection]] = defaultdict(set)
+        self.clients: Set[RelayConnection] = set()
+        self.server = None
+        self.ticks = 0
+        self.candles = 0
+        self.frames = 0
+        self.dropped = 0
+
+    async def start(self):
+        """Abre o socket Unix e passa a repassar os ticks da sessão."""
+        if os.path.exists(self.path) and stat.S_ISSOCK(os.stat(self.path).st_mode):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self._handle_client, path=self.path)
+        os.chmod(self.path, 0o600)
+        self.builder.add_tick_listener(self._on_tick)
+        logger.info(f"📡 Relay de mercado ouvindo em {self.path}")
+
+    async def stop(self):
+        """Fecha o socket e desconecta os consumidores."""
+        self.builder.remove_tick_listener(self._on_tick)
+        for asset, period in self.upstream:
+            self.pocket.remove_candle_close(asset, period, self._on_candle)
+        self.upstream.clear()
+        for client in list(self.clients):
+            self._drop(client)
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _asset_id(self, asset):
+        asset_id = self.asset_ids.get(asset)
+        if asset_id is None:
+            asset_id = self.asset_ids[asset] = len(self.asset_ids)
+            self.asset_frames[asset] = encode_frame(ASSET, ASSET_ID.pack(asset_id) + asset.encode())
+        return asset_id
+
+    def _send(self, client, frame):
+        """Escreve um frame no consumidor; consumidores lentos demais são desconectados."""
+        if client.closed:
+            return
+        if client.writer.transport.get_write_buffer_size() > self.max_buffer:
+            logger.warning("🐢 Consumidor do relay não acompanha o fluxo - desconectando")
+            self.dropped += 1
+            self._drop(client)
+            return
+        client.writer.write(frame)
+        self.frames += 1
+
+    def _drop(self, client):
+        if client.closed:
+            return
+        client.closed = True
+        self.clients.discard(client)
+        for asset, period in client.subscriptions:
+            self.tick_subscribers[asset].discard(client)
+            self.candle_subscribers[(asset, period)].discard(client)
+        client.writer.close()
+
+    def _on_tick(self, asset, timestamp, price):
+        self.ticks += 1
+        clients = self.tick_subscribers.get(asset)
+        if not clients:
+            return
+        frame = encode_tick(self.asset_ids[asset], timestamp, price)
+        for client in list(clients):
+            self._send(client, frame)
+
+    def _on_candle(self, asset, period, bar):
+        self.candles += 1
+        clients = self.candle_subscribers.get((asset, period))
+        if not clients:
+            return
+        frame = encode_candle(self.asset_ids[asset], period, bar)
+        for client in list(clients):
+            self._send(client, frame)
+
+    async def subscribe(self, client, asset, period):
+        """Assina o ativo para o consumidor e envia o snapshot."""
+        if (asset, period) not in self.upstream:
+            self.upstream.add((asset, period))
+            try:
+                await self.pocket.on_candle_close(asset, period, self._on_candle)
+            except Exception:
+                self.upstream.discard((asset, period))
+                raise
+        if client.closed:
+            return
+
+        asset_id = self._asset_id(asset)
+        if asset_id not in client.announced:
+            client.announced.add(asset_id)
+            self._send(client, self.asset_frames[asset])
+        client.subscriptions.add((asset, period))
+        self.tick_subscribers[asset].add(client)
+        self.candle_subscribers[(asset, period)].add(client)
+
+        # Snapshot: sem await até o fim, nenhum tick se intercala
+        last = self.builder.last_tick.get(asset)
+        if last is not None:
+            self._send(client, encode_tick(asset_id, last[0], last[1]))
+        closed = self.builder.closed.get((asset, period))
+        if closed is not None:
+            self._send(client, encode_candle(asset_id, period, closed))
+        bar = self.builder.bars.get((asset, period))
+        if bar is not None:
+            self._send(client, encode_candle(asset_id, period, bar, partial=True))
+        self._send(client, encode_frame(SNAPSHOT, ASSET_ID.pack(asset_id)))
+
+    def unsubscribe(self, client, asset, period):
+        """Remove a assinatura do consumidor (a assinatura na corretora é mantida)."""
+        client.subscriptions.discard((asset, period))
+        self.candle_subscribers[(asset, period)].discard(client)
+        if not any(subscribed == asset for subscribed, _ in client.subscriptions):
+            self.tick_subscribers[asset].discard(client)
+
+    async def _handle_client(self, reader, writer):
+        client = RelayConnection(writer)
+        self.clients.add(client)
+        logger.debug(f"🔌 Consumidor conectado ao relay ({len(self.clients)} conectados)")
+        try:
+            while not client.closed:
+                kind, payload = await read_frame(reader)
+                if kind == SUBSCRIBE:
+                    asset, period = decode_subscription(payload)
+                    try:
+                        await self.subscribe(client, asset, period)
+                    except ValueError as e:
+                        self._send(client, encode_frame(ERROR, str(e).encode()))
+                elif kind == UNSUBSCRIBE:
+                    self.unsubscribe(client, *decode_subscription(payload))
+                else:
+                    logger.warning(f"⚠️ Frame desconhecido no relay: {kind}")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._drop(client)
+
+    def stats(self):
+        """Contadores do relay."""
+        return {
+            "clients": len(self.clients),
+            "upstream": sorted(self.upstream),
+            "ticks": self.ticks,
+            "candles": self.candles,
+            "frames": self.frames,
+            "dropped_clients": self.dropped,
+        }
+
+
+class RelayClient(object):
+    """
+    Consumidor do :class:`MarketDataRelay`.
+
+    Uso:
+        client = RelayClient("/tmp/pocketoption.sock")
+        await client.connect()
+        await client.subscribe("EURUSD_otc", 60)
+        async for event in client:
+            print(event)
+
+    Eventos: ``("tick", ativo, timestamp, preço)``, ``("candle", ativo, período,
+    vela, parcial)``, ``("snapshot", ativo)`` e ``("error", mensagem)``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.reader = None
+        self.writer = None
+        self.assets: Dict[int, str] = {}
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+
+    async def subscribe(self, asset, period):
+        self.writer.write(encode_subscription(SUBSCRIBE, asset, period))
+        await self.writer.drain()
+
+    async def unsubscribe(self, asset, period):
+        self.writer.write(encode_subscription(UNSUBSCRIBE, asset, period))
+        await self.writer.drain()
+
+    async def read(self) -> Optional[tuple]:
+        """Próximo evento; None quando o relay fecha a conexão."""
+        while True:
+            try:
+                kind, payload = await read_frame(self.reader)
+            except asyncio.IncompleteReadError:
+                return None
+            if kind == ASSET:
+                self.assets[ASSET_ID.unpack_from(payload)[0]] = payload[ASSET_ID.size:].decode()
+            elif kind == TICK:
+                asset_id, timestamp, price = TICK_BODY.unpack(payload)
+                return "tick", self.assets[asset_id], timestamp, price
+            elif kind == CANDLE:
+                asset_id, period, start, partial, open_, high, low, close = CANDLE_BODY.unpack(payload)
+                bar = {"time": start, "open": open_, "high": high, "low": low, "close": close}
+                return "candle", self.assets[asset_id], period, bar, bool(partial)
+            elif kind == SNAPSHOT:
+                return "snapshot", self.assets[ASSET_ID.unpack(payload)[0]]
+            elif kind == ERROR:
+                return "error", payload.decode()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        event = await self.read()
+        if event is None:
+            raise StopAsyncIteration
+        return event
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
@@ -0,0 +1,170 @@
+"""
+Controle de risco pré-operação.
+
+Valida cada ordem localmente antes do envio (limites da API e limites do
+usuário) e acompanha a exposição aberta por ativo, por direção e da conta
+com contadores atualizados em tempo constante.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Optional
+
+from pocketoptionapi.constants import API_LIMITS
+
+
+class RiskLimits(object):
+    """Limites aplicados pelo :class:`RiskEngine`."""
+
+    def __init__(self,
+                 min_amount: float = API_LIMITS["min_order_amount"],
+                 max_amount: float = API_LIMITS["max_order_amount"],
+                 min_duration: int = API_LIMITS["min_duration"],
+                 max_duration: int = API_LIMITS["max_duration"],
+                 max_concurrent_orders: Optional[int] = API_LIMITS["max_concurrent_orders"],
+                 max_exposure: Optional[float] = None,
+                 max_asset_exposure: Optional[float] = None,
+                 max_direction_exposure: Optional[float] = None,
+                 queue_timeout: float = 0):
+        """
+        :param min_amount: Valor mínimo por ordem.
+        :param max_amount: Valor máximo por ordem.
+        :param min_duration: Duração mínima em segundos.
+        :param max_duration: Duração máxima em segundos.
+        :param max_concurrent_orders: Máximo de ordens abertas ao mesmo tempo (None = sem limite).
+        :param max_exposure: Valor máximo aberto na conta (None = sem limite).
+        :param max_asset_exposure: Valor máximo aberto por ativo (None = sem limite).
+        :param max_direction_exposure: Valor máximo aberto por direção call/put (None = sem limite).
+        :param queue_timeout: Segundos que uma ordem sem capacidade aguarda na fila
+            antes de ser rejeitada (0 = rejeita imediatamente).
+        """
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.min_duration = min_duration
+        self.max_duration = max_duration
+        self.max_concurrent_orders = max_concurrent_orders
+        self.max_exposure = max_exposure
+        self.max_asset_exposure = max_asset_exposure
+        self.max_direction_exposure = max_direction_exposure
+        self.queue_timeout = queue_timeout
+
+
+class RiskEngine(object):
+    """Acompanha a exposição aberta e aprova ou rejeita ordens antes do envio."""
+
+    def __init__(self, limits: Optional[RiskLimits] = None):
+        self.limits = limits or RiskLimits()
+        self.open_orders = 0
+        self.exposure = 0.0
+        self.asset_exposure = defaultdict(float)
+        self.direction_exposure = defaultdict(float)
+        # requestId ou order_id -> (valor, ativo, direção)
+        self._positions = {}
+        self._capacity_waiters = []
+
+    def check(self, amount, active, action, duration) -> Optional[str]:
+        """
+        Valida uma ordem sem reservá-la.
+
+        :returns: O motivo da rejeição ou None se a ordem é permitida.
+        """
+        return self._check_order(amount, duration) or self._check_capacity(amount, active, action)
+
+    async def acquire(self, request_id, amount, active, action, duration) -> Optional[str]:
+        """
+        Valida e reserva a exposição de uma ordem.
+
+        Sem capacidade (ordens simultâneas ou exposição), a ordem aguarda na fila
+        por até ``limits.queue_timeout`` segundos.
+
+        :returns: O motivo da rejeição ou None se a ordem foi reservada.
+        """
+        reason = self._check_order(amount, duration)
+        if reason:
+            return reason
+
+        reason = self._check_capacity(amount, active, action)
+        if reason and self.limits.queue_timeout:
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.limits.queue_timeout
+            while reason:
+                waiter = loop.create_future()
+                self._capacity_waiters.append(waiter)
+                try:
+                    await asyncio.wait_for(waiter, deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                finally:
+                    if waiter in self._capacity_waiters:
+                        self._capacity_waiters.remove(waiter)
+                reason = self._check_capacity(amount, active, action)
+        if reason:
+            return reason
+
+        self._open(request_id, amount, active, action)
+        return None
+
+    def confirm(self, request_id, order_id):
+        """A ordem foi aceita: a exposição passa a ser indexada pelo id da ordem."""
+        position = self._positions.pop(str(request_id), None)
+        if position is not None:
+            self._positions[order_id] = position
+
+    def release(self, request_id):
+        """A ordem foi rejeitada ou não teve resposta: libera a exposição reservada."""
+        self._close(str(request_id))
+
+    def restore(self, order_id, amount, active, action):
+        """Registra uma ordem aberta conhecida (ex.: retomada do diário)."""
+        if order_id not in self._positions:
+            self._open(order_id, amount, active, action, key=order_id)
+
+    def on_order_closed(self, order):
+        """Listener de fechamento para o :class:`OrderBook`."""
+        self._close(order.id)
+
+    def _check_order(self, amount, duration):
+        limits = self.limits
+        if amount < limits.min_amount:
+            return f"Valor {amount} abaixo do mínimo {limits.min_amount}"
+        if amount > limits.max_amount:
+            return f"Valor {amount} acima do máximo {limits.max_amount}"
+        if duration < limits.min_duration:
+            return f"Duração {duration}s abaixo do mínimo {limits.min_duration}s"
+        if duration > limits.max_duration:
+            return f"Duração {duration}s acima do máximo {limits.max_duration}s"
+        return None
+
+    def _check_capacity(self, amount, active, action):
+        limits = self.limits
+        if limits.max_concurrent_orders is not None and self.open_orders >= limits.max_concurrent_orders:
+            return f"Limite de {limits.max_concurrent_orders} ordens simultâneas atingido"
+        if limits.max_exposure is not None and self.exposure + amount > limits.max_exposure:
+            return f"Exposição da conta excederia {limits.max_exposure}"
+        if limits.max_asset_exposure is not None and \
+                self.asset_exposure[active] + amount > limits.max_asset_exposure:
+            return f"Exposição em {active} excederia {limits.max_asset_exposure}"
+        if limits.max_direction_exposure is not None and \
+                self.direction_exposure[action] + amount > limits.max_direction_exposure:
+            return f"Exposição em {action} excederia {limits.max_direction_exposure}"
+        return None
+
+    def _open(self, request_id, amount, active, action, key=None):
+        self._positions[str(request_id) if key is None else key] = (amount, active, action)
+        self.open_orders += 1
+        self.exposure += amount
+        self.asset_exposure[active] += amount
+        self.direction_exposure[action] += amount
+
+    def _close(self, key):
+        position = self._positions.pop(key, None)
+        if position is None:
+            return
+        amount, active, action = position
+        self.open_orders -= 1
+        self.exposure -= amount
+        self.asset_exposure[active] -= amount
+        self.direction_exposure[action] -= amount
+        for waiter in self._capacity_waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._capacity_waiters.clear()
@@ -0,0 +1,330 @@
+"""
+Autor: AdminhuDev
+Runner de múltiplas contas.
+
+As contas são distribuídas entre alguns processos worker e cada worker roda
+todas as suas sessões PocketOption em um único event loop. Cada sessão recebe
+o próprio estado em ``global_value`` (ver :func:`global_value.bind`), então
+saldo, ordens e conexão de uma conta não se misturam com os das outras.
+
+O :class:`Supervisor` inicia os workers, reinicia os que caírem (com espera
+exponencial) e agrega as métricas que cada worker publica periodicamente.
+
+A estratégia é uma corrotina ``strategy(pocket, account)`` definida no nível
+de um módulo, para poder ser enviada aos processos worker.
+"""
+import asyncio
+import multiprocessing
+import os
+import queue
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.stable_api import PocketOption
+
+# Intervalo (segundos) entre publicações de métricas de cada worker
+REPORT_INTERVAL = 5.0
+
+
+class Account(object):
+    """Conta operada pelo runner."""
+
+    def __init__(self, ssid, demo=True, name=None, **options):
+        """
+        :param ssid: SSID no formato completo 42["auth",{...}]
+        :param demo: Se True, usa conta demo
+        :param name: (opcional) Nome da conta nos logs e nas métricas.
+        :param options: Argumentos extras do :class:`PocketOption` (journal_path, risk_limits).
+        """
+        self.ssid = ssid
+        self.demo = demo
+        self.name = name or f"account-{zlib.crc32(ssid.encode()):08x}"
+        self.options = options
+
+
+class AccountSession(object):
+    """Sessão de uma conta dentro de um worker."""
+
+    def __init__(self, account):
+        self.account = account
+        self.values = None
+        self.pocket = None
+        self.restarts = 0
+        self.error = None
+        self.finished = False
+
+    def metrics(self):
+        """Métricas atuais da sessão."""
+        values = self.values or global_value.SessionValues()
+        stats = {
+            "connected": bool(values.websocket_is_connected),
+            "balance": values.balance,
+            "restarts": self.restarts,
+            "finished": self.finished,
+            "error": self.error,
+            "open_orders": 0,
+            "exposure": 0.0,
+            "rtt": None,
+        }
+        if self.pocket is not None:
+            stats["open_orders"] = self.pocket.risk.open_orders
+            stats["exposure"] = self.pocket.risk.exposure
+            heartbeat = self.pocket.api.websocket.heartbeat
+            stats["rtt"] = heartbeat.rtt * 1e3 if heartbeat.rtt is not None else None
+        return stats
+
+
+def shard(accounts, workers) -> List[List[Account]]:
+    """Distribui as contas entre ``workers`` grupos (round-robin)."""
+    workers = max(1, min(workers, len(accounts)))
+    return [list(accounts[index::workers]) for index in range(workers)]
+
+
+async def _run_account(session, strategy, session_factory, restart_delay, max_restart_delay):
+    """Roda uma conta até a estratégia terminar, reiniciando a sessão em caso de erro."""
+    account = session.account
+    # A task tem o próprio contexto: o estado vale para ela e para as tasks que ela criar
+    session.values = global_value.bind()
+    delay = restart_delay
+    with logger.contextualize(account=account.name):
+        while True:
+            pocket = None
+            try:
+                pocket = session.pocket = session_factory(account.ssid, account.demo, **account.options)
+                if await pocket.connect():
+                    delay = restart_delay
+                    await strategy(pocket, account)
+                    session.finished = True
+                    session.error = None
+                    return
+                session.error = "falha ao conectar"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                session.error = f"{type(e).__name__}: {e}"
+                logger.error(f"❌ Sessão {account.name} falhou: {session.error}")
+            finally:
+                if pocket is not None:
+                    await pocket.disconnect()
+
+            session.restarts += 1
+            logger.info(f"🔄 Reiniciando sessão {account.name} em {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, max_restart_delay)
+
+
+async def run_sessions(accounts, strategy, session_factory=PocketOption, report=None,
+                       report_interval=REPORT_INTERVAL, restart_delay=1.0, max_restart_delay=60.0):
+    """
+    Roda várias contas no event loop corrente, cada uma com o próprio estado.
+
+    :param accounts: Lista de :class:`Account`.
+    :param strategy: Corrotina ``strategy(pocket, account)`` executada em cada conta.
+    :param session_factory: Classe (ou função) que cria a sessão; por padrão :class:`PocketOption`.
+    :param report: (opcional) Função chamada com ``{nome: métricas}`` a cada ``report_interval``.
+    :returns: Dict nome -> :class:`AccountSession`.
+    """
+    sessions = {account.name: AccountSession(account) for account in accounts}
+    tasks = [asyncio.create_task(_run_account(session, strategy, session_factory,
+                                              restart_delay, max_restart_delay))
+             for session in sessions.values()]
+
+    def publish():
+        if report is not None:
+            report({name: session.metrics() for name, session in sessions.items()})
+
+    try:
+        pending = set(tasks)
+        while pending:
+            _, pending = await asyncio.wait(pending, timeout=report_interval)
+            publish()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return sessions
+
+
+def _worker_main(worker_id, accounts, strategy, metrics_queue, options):
+    """Ponto de entrada do processo worker."""
+    def report(metrics):
+        metrics_queue.put((worker_id, os.getpid(), time.time(), metrics))
+
+    logger.info(f"🚀 Worker {worker_id} (pid {os.getpid()}) iniciado com {len(accounts)} contas")
+    asyncio.run(run_sessions(accounts, strategy, report=report, **options))
+
+
+class WorkerState(object):
+    """Processo worker acompanhado pelo supervisor."""
+
+    def __init__(self, worker_id, accounts):
+        self.worker_id = worker_id
+        self.accounts = accounts
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.crashes = 0
+        self.restart_at = None
+        self.last_exitcode = None
+        self.metrics: Dict[str, dict] = {}
+        self.reported_at = None
+
+
+class Supervisor(object):
+    """Distribui as contas entre processos worker, reinicia os que caírem e agrega as métricas."""
+
+    def __init__(self, accounts, strategy, workers=None, session_factory=PocketOption,
+                 report_interval=REPORT_INTERVAL, restart_delay=1.0, max_restart_delay=60.0,
+                 stable_after=60.0, start_method="spawn"):
+        """
+        :param accounts: Lista de :class:`Account`.
+        :param strategy: Corrotina ``strategy(pocket, account)`` definida no nível de um módulo.
+        :param workers: (opcional) Número de processos; por padrão um por núcleo.
+        :param session_factory: Classe que cria as sessões nos workers.
+        :param report_interval: Segundos entre publicações de métricas dos workers.
+        :param restart_delay: Espera (segundos) antes de reiniciar um worker que caiu.
+        :param max_restart_delay: Espera máxima entre reinícios seguidos.
+        :param stable_after: Segundos de execução após os quais a espera volta ao mínimo.
+        :param start_method: Método de início dos processos do multiprocessing.
+        """
+        self.strategy = strategy
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.stable_after = stable_after
+        self.context = multiprocessing.get_context(start_method)
+        self.worker_options = {
+            "session_factory": session_factory,
+            "report_interval": report_interval,
+            "restart_delay": restart_delay,
+            "max_restart_delay": max_restart_delay,
+        }
+        workers = workers or os.cpu_count() or 1
+        self.workers = [WorkerState(worker_id, group)
+                        for worker_id, group in enumerate(shard(list(accounts), workers))]
+        self.metrics_queue = None
+        self.stopping = False
+
+    def start(self):
+        """Inicia todos os workers."""
+        self.metrics_queue = self.context.Queue()
+        self.stopping = False
+        for worker in self.workers:
+            self._spawn(worker)
+
+    def _spawn(self, worker):
+        worker.process = self.context.Process(
+            target=_worker_main,
+            args=(worker.worker_id, worker.accounts, self.strategy, self.metrics_queue, self.worker_options),
+            name=f"pocketoption-worker-{worker.worker_id}",
+            daemon=True,
+        )
+        worker.process.start()
+        worker.started_at = time.monotonic()
+        worker.restart_at = None
+
+    def poll(self):
+        """Lê as métricas publicadas e reinicia os workers que caíram."""
+        while True:
+            try:
+                worker_id, _, reported_at, metrics = self.metrics_queue.get_nowait()
+            except queue.Empty:
+                break
+            worker = self.workers[worker_id]
+            worker.metrics = metrics
+            worker.reported_at = reported_at
+
+        now = time.monotonic()
+        for worker in self.workers:
+            process = worker.process
+            if self.stopping or process is None or process.is_alive():
+                continue
+            if worker.restart_at is None:
+                worker.last_exitcode = process.exitcode
+                if process.exitcode == 0:
+                    continue  # todas as contas terminaram
+                if now - worker.started_at >= self.stable_after:
+                    worker.crashes = 0
+                worker.crashes += 1
+                delay = min(self.restart_delay * 2 ** (worker.crashes - 1), self.max_restart_delay)
+                worker.restart_at = now + delay
+                logger.warning(f"💥 Worker {worker.worker_id} caiu (exitcode {process.exitcode}) "
+                               f"- reiniciando em {delay:.1f}s")
+            elif now >= worker.restart_at:
+                worker.restarts += 1
+                self._spawn(worker)
+
+    @property
+    def running(self):
+        """True enquanto algum worker está vivo ou aguardando reinício."""
+        return any(worker.process is not None and
+                   (worker.process.is_alive() or worker.restart_at is not None or worker.process.exitcode != 0)
+                   for worker in self.workers)
+
+    def aggregate(self):
+        """
+        Métricas agregadas de todos os workers.
+
+        Returns:
+            dict: totais, dados por worker e métricas por conta
+        """
+        accounts = {}
+        workers = {}
+        for worker in self.workers:
+            accounts.update(worker.metrics)
+            workers[worker.worker_id] = {
+                "pid": worker.process.pid if worker.process is not None else None,
+                "alive": worker.process is not None and worker.process.is_alive(),
+                "accounts": len(worker.accounts),
+                "restarts": worker.restarts,
+                "last_exitcode": worker.last_exitcode,
+                "reported_at": worker.reported_at,
+            }
+        rtts = [stats["rtt"] for stats in accounts.values() if stats.get("rtt") is not None]
+        return {
+            "accounts": sum(len(worker.accounts) for worker in self.workers),
+            "connected": sum(1 for stats in accounts.values() if stats.get("connected")),
+            "balance": sum(stats.get("balance") or 0 for stats in accounts.values()),
+            "open_orders": sum(stats.get("open_orders", 0) for stats in accounts.values()),
+            "exposure": sum(stats.get("exposure", 0.0) for stats in accounts.values()),
+            "session_restarts": sum(stats.get("restarts", 0) for stats in accounts.values()),
+            "worker_restarts": sum(worker.restarts for worker in self.workers),
+            "rtt": sum(rtts) / len(rtts) if rtts else None,
+            "workers": workers,
+            "by_account": accounts,
+        }
+
+    def run(self, duration: Optional[float] = None, poll_interval=1.0):
+        """
+        Roda o supervisor até todos os workers terminarem, ``duration`` segundos
+        ou Ctrl+C.
+        """
+        if self.metrics_queue is None:
+            self.start()
+        deadline = None if duration is None else time.monotonic() + duration
+        try:
+            while self.running and (deadline is None or time.monotonic() < deadline):
+                self.poll()
+                time.sleep(poll_interval)
+            self.poll()
+        except KeyboardInterrupt:
+            logger.info("⏹️ Interrompido pelo usuário")
+        finally:
+            self.stop()
+        return self.aggregate()
+
+    def stop(self, timeout=10.0):
+        """Encerra os workers."""
+        self.stopping = True
+        for worker in self.workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join()
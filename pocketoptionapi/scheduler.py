@@ -0,0 +1,418 @@
+"""
+Agendamento de ordens em instantes exatos do relógio do servidor.
+
+As ordens agendadas e os fechamentos de vela ficam em uma roda de
+temporização hierárquica (timer wheel) indexada pelo relógio monotônico do
+event loop. Uma única task acorda apenas quando há itens vencendo,
+compensando o atraso medido do loop e o deslocamento entre o relógio local e
+o do servidor. Até o relógio do servidor ser sincronizado (primeiro
+updateStream) os agendamentos ficam em espera.
+"""
+import asyncio
+import math
+from collections import defaultdict
+from typing import Optional
+
+from loguru import logger
+
+from pocketoptionapi.metrics import LatencyHistogram
+
+
+class TimerEntry(object):
+    """Item agendado na :class:`TimerWheel`."""
+
+    __slots__ = ("tick", "item", "cancelled")
+
+    def __init__(self, tick, item):
+        self.tick = tick
+        self.item = item
+        self.cancelled = False
+
+
+class TimerWheel(object):
+    """Roda de temporização hierárquica com inserção e expiração O(1)."""
+
+    def __init__(self, tick=0.001, slots=(256, 64, 64, 64), start=0.0):
+        """
+        :param tick: Resolução em segundos.
+        :param slots: Quantidade de posições por nível.
+        :param start: Tempo inicial (mesma base usada em :meth:`schedule`).
+        """
+        self.tick = tick
+        self.slots = slots
+        self.levels = [[[] for _ in range(size)] for size in slots]
+        # Largura de cada posição (em ticks) e alcance de cada nível
+        self.widths = []
+        width = 1
+        for size in slots:
+            self.widths.append(width)
+            width *= size
+        self.spans = self.widths[1:] + [width]
+        self.overflow = []
+        self.now_tick = self.to_tick(start)
+        self.pending = 0
+        self._level0_pending = 0
+
+    def to_tick(self, when):
+        """Converte um tempo em segundos para o tick correspondente."""
+        return int(math.ceil(when / self.tick - 1e-9))
+
+    def schedule(self, when, item):
+        """
+        Agenda um item.
+
+        :param when: Tempo de vencimento em segundos.
+        :returns: A :class:`TimerEntry` (use ``entry.cancelled = True`` para cancelar).
+        """
+        entry = TimerEntry(max(self.to_tick(when), self.now_tick), item)
+        self._insert(entry)
+        self.pending += 1
+        return entry
+
+    def _insert(self, entry):
+        delta = entry.tick - self.now_tick
+        for level, span in enumerate(self.spans):
+            if delta < span:
+                slot = (entry.tick // self.widths[level]) % self.slots[level]
+                self.levels[level][slot].append(entry)
+                if level == 0:
+                    self._level0_pending += 1
+                return
+        self.overflow.append(entry)
+
+    def _cascade(self, level):
+        """Redistribui as entradas da posição atual de ``level`` nos níveis inferiores."""
+        if level >= len(self.levels):
+            overflow, self.overflow = self.overflow, []
+            for entry in overflow:
+                self._insert(entry)
+            return
+        index = (self.now_tick // self.widths[level]) % self.slots[level]
+        if index == 0:
+            self._cascade(level + 1)
+        bucket = self.levels[level][index]
+        if bucket:
+            self.levels[level][index] = []
+            for entry in bucket:
+                self._insert(entry)
+
+    def next_tick(self):
+        """Próximo tick em que a roda precisa ser avançada (ou None se vazia)."""
+        if not self.pending:
+            return None
+        if self._level0_pending:
+            size = self.slots[0]
+            for offset in range(size):
+                if self.levels[0][(self.now_tick + offset) % size]:
+                    return self.now_tick + offset
+        # Nível 0 vazio: menor vencimento da posição ocupada mais próxima de cada
+        # nível superior. A posição atual só guarda itens uma volta à frente
+        # (a do período atual já desceu), então é a última a ser olhada.
+        ticks = [entry.tick for entry in self.overflow]
+        for level in range(1, len(self.levels)):
+            size = self.slots[level]
+            index = (self.now_tick // self.widths[level]) % size
+            for offset in list(range(1, size)) + [0]:
+                bucket = self.levels[level][(index + offset) % size]
+                if bucket:
+                    ticks.append(min(entry.tick for entry in bucket))
+                    break
+        return max(min(ticks), self.now_tick) if ticks else None
+
+    def advance(self, when):
+        """
+        Avança a roda até ``when`` e retorna os itens vencidos, em ordem.
+
+        :param when: Tempo atual em segundos.
+        """
+        target = int(math.floor(when / self.tick + 1e-9))
+        expired = []
+        size = self.slots[0]
+        while self.now_tick <= target:
+            if self.now_tick % size == 0:
+                self._cascade(1)
+            if not self._level0_pending:
+                # Nada no nível 0: pula direto para a próxima fronteira
+                self.now_tick = min(target + 1, (self.now_tick // size + 1) * size)
+                continue
+            bucket = self.levels[0][self.now_tick % size]
+            if bucket:
+                self.levels[0][self.now_tick % size] = []
+                self._level0_pending -= len(bucket)
+                self.pending -= len(bucket)
+                expired.extend(entry.item for entry in bucket if not entry.cancelled)
+            self.now_tick += 1
+        return expired
+
+
+class ServerTimer(object):
+    """Chamada agendada para um instante do relógio do servidor."""
+
+    def __init__(self, at_server_ts, callback, args=()):
+        self.at_server_ts = at_server_ts
+        self.callback = callback
+        self.args = args
+        self.fired_at = None
+        self.cancelled = False
+        self._entry = None
+
+    @property
+    def error(self) -> Optional[float]:
+        """Diferença em segundos entre o disparo e o instante alvo (positivo = atrasado)."""
+        if self.fired_at is None:
+            return None
+        return self.fired_at - self.at_server_ts
+
+    def cancel(self):
+        """Cancela a chamada se ainda não foi disparada."""
+        if self.fired_at is None:
+            self.cancelled = True
+            if self._entry is not None:
+                self._entry.cancelled = True
+
+
+class ServerClockScheduler(object):
+    """Executa chamadas em instantes do relógio do servidor a partir de uma única task."""
+
+    def __init__(self, clock, tick=0.001, lag_smoothing=0.2, synchronized=None):
+        """
+        :param clock: Função que retorna o timestamp atual do servidor em segundos.
+        :param tick: Resolução da roda em segundos.
+        :param lag_smoothing: Peso da média móvel do atraso do loop.
+        :param synchronized: (opcional) Função que diz se ``clock`` já está sincronizado;
+            até lá os agendamentos ficam em espera (ver :meth:`on_clock_synchronized`).
+        """
+        self.clock = clock
+        self.tick = tick
+        self.lag_smoothing = lag_smoothing
+        self.synchronized = synchronized or (lambda: True)
+        self.loop_lag = 0.0
+        self.firing_error = LatencyHistogram()
+        self._wheel = None
+        self._task = None
+        self._wakeup = None
+        # Chamadas em espera da sincronização do relógio
+        self._deferred = []
+
+    def call_at(self, at_server_ts, callback, *args):
+        """
+        Agenda ``callback(*args)`` para o instante ``at_server_ts`` do servidor.
+
+        :returns: :class:`ServerTimer`.
+        """
+        return self._schedule(ServerTimer(at_server_ts, callback, args))
+
+    def call_when_synchronized(self, callback):
+        """Chama ``callback()`` agora ou, se o relógio não está sincronizado, ao sincronizar."""
+        if self.synchronized():
+            callback()
+        else:
+            self._deferred.append(callback)
+
+    def on_clock_synchronized(self):
+        """Agenda as chamadas em espera; chamado a cada nova amostra do relógio."""
+        if not self._deferred or not self.synchronized():
+            return
+        deferred, self._deferred = self._deferred, []
+        for callback in deferred:
+            callback()
+
+    def _schedule(self, timer):
+        if not self.synchronized():
+            # Sem sincronização o relógio do servidor está parado no último valor conhecido
+            self._deferred.append(lambda: timer.cancelled or self._schedule(timer))
+            return timer
+        loop = asyncio.get_running_loop()
+        if self._wheel is None:
+            self._wheel = TimerWheel(self.tick, start=loop.time())
+        self._insert(timer, loop)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+        elif self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+        return timer
+
+    def _insert(self, timer, loop):
+        # Deslocamento relógio do servidor - relógio do loop
+        due = timer.at_server_ts - (self.clock() - loop.time())
+        timer._entry = self._wheel.schedule(due, timer)
+
+    async def _run(self):
+        """
+        Avança a roda e dispara os itens vencidos.
+
+        A task acorda ``loop_lag`` antes do vencimento e a roda avança até
+        ``agora + loop_lag``: com o atraso típico do loop, o disparo cai no
+        instante alvo.
+        """
+        loop = asyncio.get_running_loop()
+        wheel = self._wheel
+        while wheel.pending:
+            next_tick = wheel.next_tick()
+            wake_at = next_tick * wheel.tick - self.loop_lag
+            delay = wake_at - loop.time()
+            if delay > 0:
+                self._wakeup = loop.create_future()
+                try:
+                    await asyncio.wait_for(self._wakeup, delay)
+                    continue  # nova chamada agendada: recalcular o próximo vencimento
+                except asyncio.TimeoutError:
+                    pass
+                lateness = loop.time() - wake_at
+                self.loop_lag += self.lag_smoothing * (max(lateness, 0.0) - self.loop_lag)
+
+            horizon = loop.time() + self.loop_lag
+            fired = False
+            for timer in wheel.advance(horizon):
+                fired = self._fire(timer, loop, horizon) or fired
+            if not fired:
+                # Nada disparou (vencimento ainda a frações de tick ou reagendado): não monopolizar o loop
+                await asyncio.sleep(0)
+
+    def _fire(self, timer, loop, horizon):
+        """Dispara o item vencido na roda; retorna False se ele foi reagendado."""
+        # O relógio do servidor pode ter sido ajustado depois do agendamento
+        now = self.clock()
+        if timer.at_server_ts - (now - loop.time()) > horizon + self.tick:
+            self._insert(timer, loop)
+            return False
+
+        timer.fired_at = now
+        self.firing_error.record(int(abs(timer.error) * 1e9))
+        try:
+            timer.callback(*timer.args)
+        except Exception as e:
+            logger.error(f"Erro na chamada agendada: {e}")
+        return True
+
+    def stats(self):
+        """Erro absoluto dos disparos (ms) e atraso estimado do loop (ms)."""
+        summary = self.firing_error.summary()
+        summary["loop_lag"] = self.loop_lag * 1e3
+        return summary
+
+
+class ScheduledOrder(ServerTimer):
+    """Ordem agendada; aguarde o objeto para obter (sucesso, order_id)."""
+
+    def __init__(self, at_server_ts, template, send):
+        super(ScheduledOrder, self).__init__(at_server_ts, send)
+        self.args = (self,)
+        self.template = template
+        self.future = asyncio.get_running_loop().create_future()
+
+    def cancel(self):
+        """Cancela a ordem se ainda não foi disparada."""
+        if self.fired_at is None:
+            super(ScheduledOrder, self).cancel()
+            self.future.cancel()
+
+    def __await__(self):
+        return self.future.__await__()
+
+
+class OrderScheduler(ServerClockScheduler):
+    """Dispara ordens pré-serializadas em instantes do relógio do servidor."""
+
+    def __init__(self, pocket, tick=0.001, lag_smoothing=0.2):
+        """
+        :param pocket: Instância de :class:`PocketOption`.
+        :param tick: Resolução da roda em segundos.
+        :param lag_smoothing: Peso da média móvel do atraso do loop.
+        """
+        super(OrderScheduler, self).__init__(lambda: pocket.api.server_time(), tick, lag_smoothing,
+                                             synchronized=lambda: pocket.api.sync.synchronized)
+        self.pocket = pocket
+        # As amostras do relógio do servidor chegam com os ticks do updateStream
+        pocket.api.candle_builder.add_tick_listener(self._on_tick)
+
+    def schedule(self, at_server_ts, template):
+        """
+        Agenda uma ordem preparada com :meth:`PocketOption.prepare_order`.
+
+        :param at_server_ts: Instante (timestamp do servidor) do disparo.
+        :returns: :class:`ScheduledOrder`.
+        """
+        return self._schedule(ScheduledOrder(at_server_ts, template, self._send))
+
+    def _on_tick(self, asset, timestamp, price):
+        if self._deferred:
+            self.on_clock_synchronized()
+
+    def _send(self, order):
+        task = asyncio.ensure_future(self.pocket.buy_prepared(order.template))
+        task.add_done_callback(lambda done: self._resolve(order, done))
+
+    @staticmethod
+    def _resolve(order, task):
+        if order.future.done():
+            return
+        if task.cancelled():
+            order.future.cancel()
+        elif task.exception() is not None:
+            logger.error(f"Erro na ordem agendada: {task.exception()}")
+            order.future.set_exception(task.exception())
+        else:
+            order.future.set_result(task.result())
+
+
+class CandleCloseScheduler(object):
+    """
+    Chama callbacks no fechamento das velas, alinhado ao relógio do servidor.
+
+    Todas as assinaturas que fecham no mesmo instante compartilham um único
+    disparo do :class:`ServerClockScheduler`.
+    """
+
+    def __init__(self, scheduler, builder):
+        """
+        :param scheduler: :class:`ServerClockScheduler` usado para os disparos.
+        :param builder: :class:`CandleBuilder` com as velas em formação.
+        """
+        self.scheduler = scheduler
+        self.builder = builder
+        # período -> [(ativo, callback)]
+        self.subscriptions = defaultdict(list)
+        # instante do fechamento -> ServerTimer
+        self._timers = {}
+
+    def add(self, asset, period, callback):
+        """Chama ``callback(asset, period, vela)`` a cada fechamento de vela."""
+        self.builder.subscribe(asset, period)
+        self.subscriptions[period].append((asset, callback))
+        # O limite só é calculado com o relógio do servidor sincronizado
+        self.scheduler.call_when_synchronized(lambda: self._arm(period, self.scheduler.clock()))
+
+    def remove(self, asset, period, callback):
+        """Remove uma assinatura criada com :meth:`add`."""
+        subscribers = self.subscriptions.get(period, [])
+        if (asset, callback) in subscribers:
+            subscribers.remove((asset, callback))
+        if not any(subscribed == asset for subscribed, _ in subscribers):
+            self.builder.unsubscribe(asset, period)
+        if not subscribers:
+            self.subscriptions.pop(period, None)
+
+    def _arm(self, period, after):
+        boundary = (int(after) // period + 1) * period
+        if boundary not in self._timers:
+            self._timers[boundary] = self.scheduler.call_at(boundary, self._on_boundary, boundary)
+
+    def _on_boundary(self, boundary):
+        self._timers.pop(boundary, None)
+        for period, subscribers in list(self.subscriptions.items()):
+            if boundary % period:
+                continue
+            for asset, callback in list(subscribers):
+                bar = self.builder.close(asset, period, boundary)
+                if bar is None:
+                    continue
+                try:
+                    result = callback(asset, period, bar)
+                    if asyncio.iscoroutine(result):
+                        asyncio.ensure_future(result)
+                except Exception as e:
+                    logger.error(f"Erro no callback de fechamento de vela {asset}/{period}: {e}")
+            if subscribers:
+                self._arm(period, boundary)
@@ -0,0 +1,205 @@
+"""
+Autor: AdminhuDev
+Anel de ticks em memória compartilhada para consumidores em outros processos.
+
+O processo da conexão grava cada tick em um anel por ativo
+(``multiprocessing.shared_memory``) e os processos das estratégias leem por
+polling, sem locks e sem syscalls por tick.
+
+Layout de cada anel (little-endian):
+
+- cabeçalho ``<QQ``: capacidade (registros) e total de registros publicados;
+- registros de largura fixa ``<Qdd``: sequência, timestamp e preço.
+
+Cada registro é protegido por um seqlock: antes de gravar o registro ``n`` o
+escritor marca a sequência com ``2n + 1`` (ímpar = em gravação) e ao final com
+``2n + 2``; só então o total do cabeçalho é atualizado. O leitor confere a
+sequência antes e depois de copiar os dados e descarta leituras rasgadas ou
+de registros já sobrescritos. Há um único escritor por anel.
+"""
+import re
+import struct
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Tuple
+
+HEADER = struct.Struct("<QQ")
+RECORD = struct.Struct("<Qdd")
+# Offset do total de registros publicados no cabeçalho
+_WRITTEN = struct.calcsize("<Q")
+_COUNTER = struct.Struct("<Q")
+
+DEFAULT_PREFIX = "pocketoption"
+DEFAULT_CAPACITY = 4096
+
+
+def ring_name(asset, prefix=DEFAULT_PREFIX):
+    """Nome do segmento de memória compartilhada do ativo."""
+    return f"{prefix}_{re.sub(r'[^A-Za-z0-9_]', '_', asset)}"
+
+
+def _attach(name):
+    """Abre um segmento existente sem registrá-lo no resource_tracker (quem remove é o escritor)."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:  # Python < 3.13: não há track=False
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
+
+
+class TickRing(object):
+    """Anel de ticks de um ativo sobre um segmento de memória compartilhada."""
+
+    def __init__(self, segment, owner=False):
+        self.segment = segment
+        self.owner = owner
+        self.buffer = segment.buf
+        self.capacity = HEADER.unpack_from(self.buffer)[0]
+
+    @classmethod
+    def create(cls, asset, capacity=DEFAULT_CAPACITY, prefix=DEFAULT_PREFIX):
+        """Cria o anel do ativo (substitui um anel abandonado com o mesmo nome)."""
+        name = ring_name(asset, prefix)
+        size = HEADER.size + capacity * RECORD.size
+        try:
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        HEADER.pack_into(segment.buf, 0, capacity, 0)
+        return cls(segment, owner=True)
+
+    @classmethod
+    def open(cls, asset, prefix=DEFAULT_PREFIX):
+        """Abre para leitura o anel criado pelo processo da conexão."""
+        try:
+            segment = _attach(ring_name(asset, prefix))
+        except ValueError:
+            # Segmento criado mas ainda sem tamanho (mmap de arquivo vazio)
+            raise FileNotFoundError(f"Anel de {asset} ainda não inicializado") from None
+        if HEADER.unpack_from(segment.buf)[0] == 0:
+            # Segmento criado mas cabeçalho ainda não gravado pelo escritor
+            segment.close()
+            raise FileNotFoundError(f"Anel de {asset} ainda não inicializado")
+        return cls(segment)
+
+    @property
+    def written(self):
+        """Total de registros publicados desde a criação."""
+        return _COUNTER.unpack_from(self.buffer, _WRITTEN)[0]
+
+    def append(self, timestamp, price):
+        """Grava um tick (apenas o processo escritor)."""
+        buffer = self.buffer
+        n = _COUNTER.unpack_from(buffer, _WRITTEN)[0]
+        offset = HEADER.size + (n % self.capacity) * RECORD.size
+        _COUNTER.pack_into(buffer, offset, 2 * n + 1)
+        RECORD.pack_into(buffer, offset, 2 * n + 1, timestamp, price)
+        _COUNTER.pack_into(buffer, offset, 2 * n + 2)
+        _COUNTER.pack_into(buffer, _WRITTEN, n + 1)
+
+    def read(self, n) -> Optional[Tuple[float, float]]:
+        """
+        Lê o registro ``n``.
+
+        :returns: (timestamp, preço) ou None se o registro está em gravação,
+            ainda não existe ou já foi sobrescrito.
+        """
+        offset = HEADER.size + (n % self.capacity) * RECORD.size
+        sequence, timestamp, price = RECORD.unpack_from(self.buffer, offset)
+        if sequence != 2 * n + 2 or _COUNTER.unpack_from(self.buffer, offset)[0] != sequence:
+            return None
+        return timestamp, price
+
+    def close(self):
+        """Libera o mapeamento; o escritor também remove o segmento."""
+        self.buffer = None
+        self.segment.close()
+        if self.owner:
+            self.segment.unlink()
+
+
+class TickRingReader(object):
+    """Leitor por polling do anel de um ativo."""
+
+    def __init__(self, asset, prefix=DEFAULT_PREFIX, from_start=False):
+        """
+        :param asset: Ativo a ler.
+        :param prefix: Prefixo dos segmentos usado pelo escritor.
+        :param from_start: Se True, começa pelos registros ainda presentes no anel;
+            por padrão lê apenas os ticks gravados a partir de agora.
+        """
+        self.asset = asset
+        self.ring = TickRing.open(asset, prefix)
+        written = self.ring.written
+        self.next = max(0, written - self.ring.capacity) if from_start else written
+        # Registros perdidos por o leitor ter ficado uma volta inteira atrás
+        self.lapped = 0
+
+    def poll(self, limit=None) -> List[Tuple[float, float]]:
+        """Retorna os ticks novos desde a última chamada (sem bloquear)."""
+        ring = self.ring
+        written = ring.written
+        if written - self.next > ring.capacity:
+            self.lapped += written - ring.capacity - self.next
+            self.next = written - ring.capacity
+        if limit is not None:
+            written = min(written, self.next + limit)
+
+        ticks = []
+        while self.next < written:
+            record = ring.read(self.next)
+            if record is None:
+                if ring.written - self.next > ring.capacity:
+                    # Sobrescrito durante a leitura: volta ao início válido do anel
+                    self.lapped += 1
+                    self.next += 1
+                    continue
+                break
+            ticks.append(record)
+            self.next += 1
+        return ticks
+
+    def latest(self) -> Optional[Tuple[float, float]]:
+        """Último tick publicado (sem avançar a posição de leitura)."""
+        written = self.ring.written
+        return self.ring.read(written - 1) if written else None
+
+    def close(self):
+        self.ring.close()
+
+
+class TickRingWriter(object):
+    """Grava os ticks recebidos pela sessão em um anel por ativo."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, prefix=DEFAULT_PREFIX):
+        self.capacity = capacity
+        self.prefix = prefix
+        self.rings: Dict[str, TickRing] = {}
+        self._builder = None
+
+    def write(self, asset, timestamp, price):
+        """Grava um tick, criando o anel do ativo no primeiro uso."""
+        ring = self.rings.get(asset)
+        if ring is None:
+            ring = self.rings[asset] = TickRing.create(asset, self.capacity, self.prefix)
+        ring.append(timestamp, price)
+
+    def attach(self, pocket):
+        """Passa a gravar todos os ticks do updateStream da sessão."""
+        self._builder = pocket.api.candle_builder
+        self._builder.add_tick_listener(self.write)
+
+    def close(self):
+        """Para de gravar e remove os segmentos."""
+        if self._builder is not None:
+            self._builder.remove_tick_listener(self.write)
+            self._builder = None
+        for ring in self.rings.values():
+            ring.close()
+        self.rings.clear()
@@ -11,12 +11,21 @@ from loguru import logger
 import operator
 import pocketoptionapi.global_value as global_value
 from pocketoptionapi.ssid_parser import process_ssid_input, validate_ssid_format
+from pocketoptionapi.journal import OrderJournal
+from pocketoptionapi.recorder import FrameRecorder
+from pocketoptionapi.paper import PaperAccount
+from pocketoptionapi.expiration import ExpirationGrid
+from pocketoptionapi.risk import RiskEngine
+from pocketoptionapi.scheduler import CandleCloseScheduler, OrderScheduler
 from collections import defaultdict
 from collections import deque
 from datetime import datetime, timezone
 
 local_zone_name = get_localzone()
 
+# Segundos após o vencimento para liberar a reserva de uma ordem sem resposta
+ORDER_ACK_GRACE = 30
+
 def nested_dict(n, type):
     """Create nested dict with depth n"""
     if n == 1:
@@ -46,8 +55,20 @@ class PocketOption:
     
     __version__ = "1.0.0"
 
-    def __init__(self, ssid, demo):
-        """Clean docstring"""
+    def __init__(self, ssid, demo, journal_path=None, risk_limits=None, record_path=None, paper=False):
+        """
+        :param ssid: SSID no formato completo 42["auth",{...}]
+        :param demo: Se True, usa conta demo
+        :param journal_path: (opcional) Arquivo do diário de ordens. Ordens abertas
+            registradas nele são retomadas e fechadas pelo próximo updateClosedDeals.
+        :param risk_limits: (opcional) :class:`RiskLimits` verificados antes de cada
+            ordem; por padrão os limites de API_LIMITS.
+        :param record_path: (opcional) Arquivo onde gravar os frames brutos do
+            websocket (ver :class:`FrameReplayer` para reproduzi-los).
+        :param paper: (opcional) Se True, as ordens não são enviadas: são registradas e
+            liquidadas localmente pelos ticks do updateStream (ver :class:`PaperAccount`,
+            saldo em ``self.paper.balance``).
+        """
         # Parse e validação do SSID
         logger.info("🔧 Processando SSID...")
         formatted_ssid, parsed_data = process_ssid_input(ssid, force_demo=demo)
@@ -90,10 +111,73 @@ class PocketOption:
         self.SESSION_COOKIE = {}
         self.api = PocketOptionAPI()
         # Usar apenas métodos assíncronos
+        self.expirations = ExpirationGrid(self.api.server_time)
+        self.risk = RiskEngine(risk_limits)
+        self.api.order_book.add_close_listener(self.risk.on_order_closed)
+        self.api.add_order_ack_listener(self._on_order_ack)
+        self.scheduler = OrderScheduler(self)
+        self.candle_closes = CandleCloseScheduler(self.scheduler, self.api.candle_builder)
+
+        self.journal = None
+        if journal_path:
+            self._open_journal(journal_path)
+
+        self.recorder = None
+        if record_path:
+            self.recorder = self.api.websocket_client.recorder = FrameRecorder(record_path)
+
+        self.paper = PaperAccount(self.api, self.api.order_book, pocket=self) if paper else None
+
+    def paper_account(self, balance=10000.0, **options):
+        """
+        Cria uma conta de papel independente sobre esta conexão.
+
+        Cada conta tem saldo e livro de ordens próprios e é liquidada pelos
+        mesmos ticks, então várias variantes de uma estratégia podem ser
+        comparadas ao mesmo tempo sem enviar ordens. Métodos que a conta não
+        implementa (``get_candles``, ``on_candle_close``...) são os desta sessão.
+
+        Uso:
+            variants = {name: api.paper_account(balance=1000) for name in ("a", "b")}
+            ...
+            print({name: account.stats() for name, account in variants.items()})
+
+        Returns:
+            PaperAccount: Conta com ``buy``, ``check_win``, ``get_balance`` e ``stats``
+        """
+        return PaperAccount(self.api, balance=balance, pocket=self, **options)
+
+    def _open_journal(self, journal_path):
+        """Abre o diário de ordens e retoma as ordens que ficaram abertas"""
+        self.journal = OrderJournal.open(journal_path)
+        for order_id, record in self.journal.state.open_orders.items():
+            self.api.order_book.on_open({key: value for key, value in record.items() if key != "type"})
+            self.risk.restore(order_id, record.get("amount", 0), record.get("asset"),
+                              "put" if record.get("command") == 1 else "call")
+        self.api.order_book.add_close_listener(self.journal.on_order_closed)
+
+        if self.journal.state.open_orders:
+            logger.info(f"📒 {len(self.journal.state.open_orders)} ordens abertas retomadas do diário")
+        if self.journal.state.pending_intents:
+            logger.warning(f"⚠️ {len(self.journal.state.pending_intents)} ordens sem confirmação no diário "
+                           f"(serão conciliadas pelo histórico de deals)")
 
     def get_server_timestamp(self):
-        """Get server timestamp"""
-        return self.api.time_sync.server_timestamp
+        """Get server timestamp (estimado continuamente entre os frames do servidor)"""
+        return self.api.server_time()
+
+    def get_server_time_ns(self):
+        """Timestamp atual do servidor em nanossegundos (leitura sem objetos datetime)"""
+        return self.api.server_time_ns()
+
+    def server_now(self):
+        """
+        Timestamp atual do servidor com a incerteza da estimativa.
+
+        Returns:
+            tuple: (timestamp em segundos, incerteza em segundos)
+        """
+        return self.api.server_now()
         
     def Stop(self):
         """Stop execution"""
@@ -110,22 +194,10 @@ class PocketOption:
 
     def get_async_order(self, buy_order_id):
         """Get async order info"""
-        import pocketoptionapi.global_value as global_value
-        
-        if global_value.order_data and isinstance(global_value.order_data, dict):
-            if global_value.order_data.get("id") == buy_order_id:
-                return global_value.order_data
-        
-        if not self.api.order_async or "deals" not in self.api.order_async:
-            return None
-            
-        if not self.api.order_async["deals"] or len(self.api.order_async["deals"]) == 0:
-            return None
-            
-        if self.api.order_async["deals"][0]["id"] == buy_order_id:
-            return self.api.order_async["deals"][0]
-        else:
+        order = self.api.order_book.get(buy_order_id)
+        if order is None:
             return None
+        return order.data
 
     def get_async_order_id(self, buy_order_id):
         return self.api.order_async["deals"][0][buy_order_id]
@@ -152,12 +224,28 @@ class PocketOption:
 
             global_value.websocket_is_connected = False
             global_value.balance_updated = False
+            # Também quando a conexão já tinha caído: envios aguardando a retomada desistem
+            self.api.session.close()
+
+            if self.journal:
+                self.journal.sync()
+            if self.recorder:
+                self.recorder.flush()
             
             logger.success("Desconexão realizada com sucesso.")
 
         except Exception as e:
             logger.error(f"Erro durante a desconexão: {e}")
 
+    async def wait_session_ready(self, timeout=10):
+        """
+        Aguarda a sessão autenticada (ou retomada após uma queda) ficar pronta.
+
+        Returns:
+            bool: True se a sessão está pronta, False se o tempo acabou
+        """
+        return await self.api.session.wait_ready(timeout)
+
     async def connect(self):
         """Connect to API"""
         try:
@@ -253,107 +341,280 @@ class PocketOption:
         """
         return global_value.order_open
         
-    @staticmethod
-    async def check_order_closed(ido):
-        """Clean docstring"""
+    async def check_order_closed(self, ido):
+        """
+        Aguarda o fechamento da ordem.
+
+        A espera é feita no livro de ordens: o fechamento acorda apenas as
+        corrotinas que aguardam esta ordem, sem polling.
+
+        Returns:
+            O id da ordem fechada
+        """
         logger.info(f"Aguardando fechamento da ordem {ido}")
-        
-        while ido not in global_value.order_closed:
-            await asyncio.sleep(0.1)  # Sleep assíncrono
 
-        for pack in global_value.stat:
-            if pack[0] == ido:
-               logger.success(f'Ordem {ido} fechada: {pack[1]}')
+        if ido not in global_value.order_closed:
+            await self.api.order_book.result(ido)
 
-        return pack[0]
+        logger.success(f'Ordem {ido} fechada: {global_value.stat.get(ido)}')
+        return ido
     
     async def buy(self, amount, active, action, expirations):
-        """Clean docstring"""
-        self.api.buy_multi_option = {}
-        self.api.buy_successful = None
-        req_id = "buy"
+        """
+        Envia uma ordem e aguarda a confirmação do servidor.
+
+        Cada ordem recebe um requestId único e a resposta é entregue pelo
+        requestId, então várias chamadas simultâneas não interferem entre si.
+
+        Returns:
+            tuple: (True, order_id) em caso de sucesso ou (False, None) em caso de falha
+        """
+        return await self._place_order(
+            amount, active, action, expirations,
+            lambda req_id: self.api.async_buyv3(amount, active, action, expirations, req_id))
+
+    async def buy_at_expiration(self, amount, active, action, duration):
+        """
+        Envia uma ordem que expira na próxima marca válida da grade de expirações.
+
+        :param duration: Duração em minutos (1-5 ou múltiplos de 15), ver :class:`ExpirationGrid`.
+
+        Returns:
+            tuple: (True, order_id) em caso de sucesso ou (False, None) em caso de falha
+        """
+        expired = self.expirations.expiration_for(duration)
+        return await self._place_order(
+            amount, active, action, expired - self.api.server_time(),
+            lambda req_id: self.api.async_buyv3_by_raw_expired(amount, active, action, expired, req_id))
+
+    def prepare_order(self, amount, active, action, expirations):
+        """
+        Prepara uma ordem com antecedência para envio com :meth:`buy_prepared`.
+
+        O frame openOrder fica pré-serializado; no disparo resta apenas inserir
+        o requestId e escrever no websocket.
+
+        Returns:
+            OrderTemplate: Modelo reutilizável da ordem
+        """
+        return self.api.prepare_order(amount, active, action, expirations)
+
+    async def buy_prepared(self, template):
+        """
+        Envia uma ordem preparada com :meth:`prepare_order`.
+
+        Returns:
+            tuple: (True, order_id) em caso de sucesso ou (False, None) em caso de falha
+        """
+        return await self._place_order(
+            template.amount, template.asset, template.action, template.duration,
+            lambda req_id: self.api.fire_order(template, req_id))
+
+    def schedule_order(self, at_server_ts, amount, active, action, expirations):
+        """
+        Agenda uma ordem para um instante exato do relógio do servidor.
+
+        A ordem é preparada imediatamente e disparada por :meth:`buy_prepared`
+        no instante ``at_server_ts``, compensando o atraso medido do event loop.
+
+        Uso:
+            order = api.schedule_order(api.api.server_time() + 2, 1, "EURUSD_otc", "call", 60)
+            success, order_id = await order
+            print(order.error)  # segundos entre o disparo e o instante alvo
+
+        Returns:
+            ScheduledOrder: Ordem agendada (aguardável; ``cancel()`` antes do disparo)
+        """
+        template = self.prepare_order(amount, active, action, expirations)
+        return self.scheduler.schedule(at_server_ts, template)
+
+    async def _place_order(self, amount, active, action, expirations, send):
+        """Registra o requestId, envia a ordem com ``send(req_id)`` e aguarda a confirmação."""
+        if self.paper is not None:
+            return await self.paper.buy(amount, active, action, expirations)
+
+        req_id = self.api.next_request_id()
+        rejected = await self.risk.acquire(req_id, amount, active, action, expirations)
+        if rejected:
+            logger.error(f"🛡️ Ordem rejeitada pelo controle de risco: {rejected}")
+            return False, None
+
+        self.api.latency.order_started(req_id, self.api.region_name)
+        order_future = self.api.register_order_request(req_id)
+        if self.journal:
+            self.journal.intent(req_id, amount, active, action, expirations)
 
         try:
-            if req_id not in self.api.buy_multi_option:
-                self.api.buy_multi_option[req_id] = {"id": None}
-            else:
-                self.api.buy_multi_option[req_id]["id"] = None
+            await send(req_id)
+        except asyncio.CancelledError:
+            # O frame pode ter sido enviado: a resposta ainda concilia a reserva
+            self._abandon_order_request(req_id, expirations)
+            raise
         except Exception as e:
-            logger.error(f"Erro ao inicializar buy_multi_option: {e}")
+            self.api.discard_order_request(req_id)
+            self.risk.release(req_id)
+            if self.journal:
+                self.journal.discard(req_id)
+            logger.error(f"Erro ao enviar ordem: {e}")
             return False, None
 
-        global_value.order_data = None
-        global_value.result = None
+        return await self._wait_order_confirmation(req_id, order_future, expirations)
 
-        await self.api.async_buyv3(amount, active, action, expirations, req_id)
+    async def _wait_order_confirmation(self, req_id, order_future, expirations, timeout=5):
+        """Aguarda a resposta do servidor para o requestId informado."""
+        try:
+            order_data = await asyncio.wait_for(order_future, timeout)
+        except asyncio.TimeoutError:
+            self._abandon_order_request(req_id, expirations)
+            logger.error("Erro desconhecido ocorreu durante a operação de compra")
+            return False, None
+        except asyncio.CancelledError:
+            self._abandon_order_request(req_id, expirations)
+            raise
 
-        start_t = time.time()
-        while True:
-            if global_value.result is not None and global_value.order_data is not None:
-                break
-            if time.time() - start_t >= 5:
-                if isinstance(global_value.order_data, dict) and "error" in global_value.order_data:
-                    logger.error(global_value.order_data["error"])
-                else:
-                    logger.error("Erro desconhecido ocorreu durante a operação de compra")
-                return False, None
-            await asyncio.sleep(0.1)  # Mudança principal: sleep assíncrono
+        # Reserva de risco e diário já conciliados por _on_order_ack
+        if "error" in order_data:
+            logger.error(order_data["error"])
+            return False, None
+        logger.success(f"Ordem executada com sucesso: {order_data.get('id')}")
+        return True, order_data.get("id", None)
 
-        logger.success(f"Ordem executada com sucesso: {global_value.order_data.get('id')}")
-        return global_value.result, global_value.order_data.get("id", None)
+    def _on_order_ack(self, order_data):
+        """
+        Concilia a reserva de risco e o diário com a resposta do servidor.
 
-    async def check_win(self, id_number):
-        """Clean docstring"""
-        start_t = time.time()
-        order_info = None
-        
+        Chamado para toda resposta com requestId (successopenOrder, failopenOrder,
+        updateOpenedDeals), inclusive as que chegam depois do timeout ou do
+        cancelamento de quem enviou a ordem.
+        """
+        req_id = str(order_data.get("requestId"))
+        pending = self.journal is not None and req_id in self.journal.state.pending_intents
+        if "error" in order_data:
+            self.risk.release(req_id)
+            if pending:
+                self.journal.discard(req_id)
+        elif "id" in order_data:
+            self.risk.confirm(req_id, order_data["id"])
+            if pending:
+                self.journal.confirm(req_id, order_data)
+
+    def _abandon_order_request(self, req_id, expirations):
+        """
+        Deixa de aguardar uma ordem sem resposta (timeout ou cancelamento).
+
+        A ordem pode ter sido aberta no servidor, então a reserva de risco e a
+        intenção no diário são mantidas para a resposta tardia conciliar; sem
+        resposta até o vencimento mais ``ORDER_ACK_GRACE``, são liberadas.
+        """
+        self.api.discard_order_request(req_id)
+        asyncio.get_running_loop().call_later(
+            expirations + ORDER_ACK_GRACE, self._release_unconfirmed, str(req_id))
+
+    def _release_unconfirmed(self, req_id):
+        # Após a confirmação a reserva é indexada pelo id da ordem: aqui não há nada a liberar
+        self.risk.release(req_id)
+        if self.journal and req_id in self.journal.state.pending_intents:
+            self.journal.discard(req_id)
+
+    async def buy_many(self, orders):
+        """
+        Envia várias ordens em paralelo e entrega cada confirmação assim que chega.
+
+        Uso:
+            async for index, success, order_id in api.buy_many(orders):
+                ...
+
+        :param list orders: Tuplas (amount, active, action, expirations) ou dicts com essas chaves.
+        :yields: Tuplas (índice da ordem em ``orders``, sucesso, order_id).
+        """
+        async def place(index, order):
+            if isinstance(order, dict):
+                success, order_id = await self.buy(**order)
+            else:
+                success, order_id = await self.buy(*order)
+            return index, success, order_id
+
+        tasks = [asyncio.ensure_future(place(index, order)) for index, order in enumerate(orders)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def check_win(self, id_number, timeout=120):
+        """
+        Aguarda o resultado de uma ordem.
+
+        O resultado é entregue pelo livro de ordens assim que o servidor
+        informa o fechamento (successcloseOrder ou updateClosedDeals).
+
+        Returns:
+            tuple: (profit, status) ou (None, "timeout")
+        """
         logger.info(f"Aguardando resultado da ordem {id_number}...")
 
-        import pocketoptionapi.global_value as global_value
-        
-        while True:
-            try:
-                if hasattr(self.api, 'order_async') and self.api.order_async:
-                    if "deals" in self.api.order_async and self.api.order_async["deals"]:
-                        for deal in self.api.order_async["deals"]:
-                            if str(deal.get("id")) == str(id_number):
-                                close_price = deal.get("closePrice", 0)
-                                if "profit" in deal and close_price != 0:
-                                    profit = deal["profit"]
-                                    logger.debug(f"🔍 DEBUG PROFIT - Deal completo: {deal}")
-                                    logger.debug(f"🔍 DEBUG PROFIT - Profit: {profit}")
-                                    
-                                    # Lógica corrigida: profit positivo = ganhou, profit negativo = perdeu
-                                    status = "ganhou" if profit > 0 else "perdeu"
-                                    
-                                    logger.success(f"Ordem {id_number} finalizada: {status} - Profit: {profit}")
-                                    return profit, status
-                
-                if global_value.order_data and str(global_value.order_data.get("id")) == str(id_number):
-                    close_price = global_value.order_data.get("closePrice", 0)
-                    if "profit" in global_value.order_data and global_value.order_data["profit"] != 0 and close_price != 0:
-                        profit = global_value.order_data["profit"]
-                        logger.debug(f"🔍 DEBUG PROFIT GLOBAL - Order_data completo: {global_value.order_data}")
-                        logger.debug(f"🔍 DEBUG PROFIT GLOBAL - Profit: {profit}")
-                        
-                        # Lógica corrigida: profit positivo = ganhou, profit negativo = perdeu
-                        status = "ganhou" if profit > 0 else "perdeu"
-                        
-                        logger.success(f"Ordem {id_number} resultado final: {status} - Profit: {profit}")
-                        return profit, status
-                
-            except Exception as e:
-                logger.debug(f"Erro ao obter resultado da ordem: {e}")
-
-            if time.time() - start_t >= 120:
-                logger.warning(f"⏰ Timeout: Ordem {id_number} ainda não finalizada após 120s")
-                # Retornar dados disponíveis mesmo sem resultado final
-                order_info = self.get_async_order(id_number)
-                if order_info:
-                    logger.info(f"📊 Dados disponíveis da ordem: {order_info}")
-                return None, "timeout"
-
-            await asyncio.sleep(2.0)  # Aguardar mais tempo entre verificações
+        try:
+            profit, status = await asyncio.wait_for(self.api.order_book.result(id_number), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⏰ Timeout: Ordem {id_number} ainda não finalizada após {timeout}s")
+            order = self.api.order_book.get(id_number)
+            if order is not None and order.data:
+                logger.info(f"📊 Dados disponíveis da ordem: {order.data}")
+            return None, "timeout"
+
+        logger.success(f"Ordem {id_number} finalizada: {status} - Profit: {profit}")
+        return profit, status
+
+    async def wait_results(self, order_ids, timeout=120):
+        """
+        Entrega o resultado de várias ordens conforme forem fechando.
+
+        Usa uma única inscrição nos eventos de fechamento do livro de ordens,
+        sem uma corrotina de verificação por ordem.
+
+        Uso:
+            async for order_id, profit, status in api.wait_results(order_ids):
+                ...
+
+        :param order_ids: Ids das ordens a aguardar.
+        :param timeout: Tempo máximo total de espera em segundos.
+        :yields: Tuplas (order_id, profit, status). Ordens não fechadas no prazo
+            são entregues ao final como (order_id, None, "timeout").
+        """
+        book = self.api.order_book
+        pending = set(order_ids)
+        closed_orders = asyncio.Queue()
+
+        def on_close(order):
+            if order.id in pending:
+                closed_orders.put_nowait(order)
+
+        book.add_close_listener(on_close)
+        try:
+            for order_id in list(pending):
+                order = book.get(order_id)
+                if order is not None and order.closed:
+                    pending.discard(order_id)
+                    yield order_id, order.profit, order.status
+
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            while pending:
+                try:
+                    order = await asyncio.wait_for(closed_orders.get(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if order.id in pending:
+                    pending.discard(order.id)
+                    yield order.id, order.profit, order.status
+
+            for order_id in pending:
+                logger.warning(f"⏰ Timeout: Ordem {order_id} ainda não finalizada após {timeout}s")
+                yield order_id, None, "timeout"
+        finally:
+            book.remove_close_listener(on_close)
 
     @staticmethod
     def last_time(timestamp, period):
@@ -544,6 +805,65 @@ class PocketOption:
         
         return processed_data, diff_valid
 
+    def get_latency_stats(self):
+        """
+        Latências das ordens por região e etapa (send, ack, payload, round_trip, close).
+
+        Returns:
+            dict: {região: {etapa: {count, mean, p50, p99, p999, max}}} em milissegundos
+        """
+        return self.api.latency.stats()
+
+    def get_connection_stats(self):
+        """
+        Heartbeat da conexão atual e métricas por região.
+
+        Returns:
+            dict: {"rtt", "ping_interval", "ping_timeout", "regions": {região: {...}}} (RTT em ms)
+        """
+        heartbeat = self.api.websocket.heartbeat
+        return {
+            "rtt": heartbeat.rtt * 1e3 if heartbeat.rtt is not None else None,
+            "ping_interval": heartbeat.ping_interval,
+            "ping_timeout": heartbeat.ping_timeout,
+            "regions": self.api.region_health.stats(),
+        }
+
+    def get_scheduler_stats(self):
+        """
+        Erro absoluto dos disparos agendados e atraso estimado do event loop.
+
+        Returns:
+            dict: {count, mean, p50, p99, p999, max, loop_lag} em milissegundos
+        """
+        return self.scheduler.stats()
+
+    async def on_candle_close(self, active, period, callback):
+        """
+        Chama ``callback(active, period, vela)`` no fechamento de cada vela.
+
+        O disparo acontece no limite da vela no relógio do servidor e entrega a
+        vela recém-fechada, construída com os ticks do updateStream. Assinaturas
+        que fecham no mesmo instante compartilham um único disparo. O callback
+        pode ser uma função ou uma corrotina.
+
+        Uso:
+            def on_close(active, period, candle):
+                print(active, candle["time"], candle["close"])
+
+            await api.on_candle_close("EURUSD_otc", 60, on_close)
+
+        :param period: Período da vela em segundos (um dos valores de ``self.size``).
+        """
+        if period not in self.size:
+            raise ValueError(f"Período {period} inválido; use um de {self.size}")
+        self.candle_closes.add(active, period, callback)
+        await self.api.change_symbol.async_call(active, period)
+
+    def remove_candle_close(self, active, period, callback):
+        """Remove um callback registrado com :meth:`on_candle_close`."""
+        self.candle_closes.remove(active, period, callback)
+
     def change_symbol(self, active, period):
         return self.api.change_symbol(active, period)
 
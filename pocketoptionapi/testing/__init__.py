@@ -0,0 +1,4 @@
+"""Ferramentas para testes e benchmarks sem rede."""
+from .server import MockPocketOptionServer
+
+__all__ = ['MockPocketOptionServer']
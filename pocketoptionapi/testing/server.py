@@ -0,0 +1,357 @@
+"""
+Autor: AdminhuDev
+Servidor local que imita o socket.io da PocketOption.
+
+Fala o mesmo framing Engine.IO/Socket.IO esperado pelo :class:`WebsocketClient`:
+
+- abertura ``0{sid,pingInterval,pingTimeout}`` -> ``40`` -> ``40{sid}``;
+- ``42["auth",{...}]`` -> ``successauth``, ``successupdateBalance``,
+  ``updateOpenedDeals`` e ``updateClosedDeals``;
+- eventos do servidor como cabeçalho ``451-[evento,{"_placeholder":true,"num":0}]``
+  seguido do anexo binário em JSON;
+- ``openOrder`` (abertura e fechamento no vencimento), ``loadHistoryPeriod``,
+  ``changeSymbol`` -> ``updateStream`` e ping/pong do Engine.IO.
+
+Latência e falhas são programáveis (ver os atributos de
+:class:`MockPocketOptionServer`). Para conectar o cliente ao servidor local use
+``REGION.override(server.url)`` ou a variável ``POCKETOPTION_WS_URL``.
+"""
+import asyncio
+import json
+import random
+import time
+import uuid
+from http import HTTPStatus
+
+import websockets
+from loguru import logger
+
+from pocketoptionapi.recorder import FrameReplayer
+
+PLACEHOLDER = {"_placeholder": True, "num": 0}
+
+
+class MockConnection(object):
+    """Conexão de um cliente com o servidor local."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.sid = uuid.uuid4().hex[:20]
+        self.uid = None
+        self.is_demo = 1
+        self.authenticated = False
+        self.streams = set()
+        self.tasks = []
+        self.pong = asyncio.Event()
+
+
+class MockPocketOptionServer(object):
+    """
+    Servidor socket.io local para testes e benchmarks sem rede.
+
+    Atributos programáveis:
+
+    - ``latency``: segundos antes de cada envio do servidor, ou função
+      ``latency(evento) -> segundos``;
+    - ``reject_auth``: responde ``NotAuthorized`` à autenticação;
+    - ``fail_orders``: True ou função ``fail_orders(payload) -> erro | None``;
+    - ``outcome``: função ``outcome(deal) -> "win" | "loss" | "draw"``; por
+      padrão o resultado vem do preço no vencimento;
+    - :meth:`reject_connections` recusa os próximos handshakes (HTTP 503) e
+      :meth:`drop_connections` derruba as conexões abertas.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, ping_interval=25.0, ping_timeout=20.0,
+                 balance=10000.0, payout=92, tick_interval=0.5, expiry_scale=1.0, latency=0.0, seed=None):
+        """
+        :param host: Endereço de escuta.
+        :param port: Porta (0 = escolhida pelo sistema).
+        :param ping_interval: pingInterval (segundos) anunciado na abertura.
+        :param ping_timeout: pingTimeout (segundos) anunciado na abertura.
+        :param balance: Saldo inicial da conta.
+        :param payout: Percentual pago nas ordens vencedoras.
+        :param tick_interval: Segundos entre frames do updateStream.
+        :param expiry_scale: Fator aplicado à duração das ordens (0.01 = vencem 100x mais rápido).
+        :param latency: Atraso de cada envio do servidor (segundos ou função do evento).
+        :param seed: (opcional) Semente dos preços simulados.
+        """
+        self.host = host
+        self.port = port
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self.balance = balance
+        self.payout = payout
+        self.tick_interval = tick_interval
+        self.expiry_scale = expiry_scale
+        self.latency = latency
+        self.reject_auth = False
+        self.fail_orders = False
+        self.outcome = None
+        self.random = random.Random(seed)
+        self.prices = {}
+        # id -> deal (abertas e fechadas)
+        self.deals = {}
+        # (evento, payload) recebidos dos clientes, na ordem
+        self.received = []
+        self.connections = set()
+        self.connection_count = 0
+        self._rejections = 0
+        self.server = None
+
+    @property
+    def url(self):
+        """URL a usar no cliente (``REGION.override(server.url)``)."""
+        return f"ws://{self.host}:{self.port}/socket.io/?EIO=4&transport=websocket"
+
+    async def start(self):
+        self.server = await websockets.serve(self._handle, self.host, self.port,
+                                             process_request=self._process_request, ping_interval=None)
+        self.port = next(iter(self.server.sockets)).getsockname()[1]
+        logger.debug(f"🧪 Servidor local ouvindo em {self.url}")
+        return self
+
+    async def stop(self):
+        for connection in list(self.connections):
+            for task in connection.tasks:
+                task.cancel()
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+    # ------------------------------------------------------------------
+    # Falhas programáveis
+
+    def reject_connections(self, count=1):
+        """Recusa os próximos ``count`` handshakes com HTTP 503."""
+        self._rejections += count
+
+    def drop_connections(self):
+        """Derruba as conexões abertas sem handshake de fechamento."""
+        for connection in list(self.connections):
+            connection.ws.transport.abort()
+
+    def _process_request(self, *args):
+        if self._rejections <= 0:
+            return None
+        self._rejections -= 1
+        connection = args[0]
+        if hasattr(connection, "respond"):
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "indisponível\n")
+        return HTTPStatus.SERVICE_UNAVAILABLE, [], b"indisponivel\n"  # API legada do websockets
+
+    # ------------------------------------------------------------------
+    # Envio
+
+    async def _delay(self, event):
+        latency = self.latency(event) if callable(self.latency) else self.latency
+        if latency > 0:
+            await asyncio.sleep(latency)
+
+    async def send_raw(self, connection, frame, event=None):
+        """Envia um frame de texto já montado."""
+        await self._delay(event)
+        await connection.ws.send(frame)
+
+    async def emit(self, connection, event, payload):
+        """Envia um evento no formato do servidor: cabeçalho 451 e anexo binário."""
+        await self._delay(event)
+        await connection.ws.send(f'451-{json.dumps([event, PLACEHOLDER])}')
+        await connection.ws.send(json.dumps(payload).encode())
+
+    async def broadcast(self, uid, event, payload):
+        """Envia um evento para as conexões autenticadas da conta."""
+        for connection in list(self.connections):
+            if connection.authenticated and connection.uid == uid:
+                try:
+                    await self.emit(connection, event, payload)
+                except websockets.ConnectionClosed:
+                    pass
+
+    async def replay(self, path, speed=1.0):
+        """
+        Reenvia aos clientes autenticados os frames recebidos em uma gravação do
+        :class:`FrameRecorder`, com a temporização original escalada por ``speed``.
+
+        Os pacotes de controle do Engine.IO (abertura, connect e ping/pong) são
+        do próprio servidor local e não são reenviados.
+        """
+        async def deliver(frame):
+            payload = frame.payload
+            if isinstance(payload, str) and (payload in ("2", "3") or payload[:1] == "0" or payload[:2] == "40"):
+                return
+            for connection in list(self.connections):
+                if connection.authenticated:
+                    try:
+                        await connection.ws.send(payload)
+                    except websockets.ConnectionClosed:
+                        pass
+
+        return await FrameReplayer(path).replay(deliver, speed)
+
+    # ------------------------------------------------------------------
+    # Conexão
+
+    async def _handle(self, ws, path=None):
+        connection = MockConnection(ws)
+        self.connections.add(connection)
+        self.connection_count += 1
+        try:
+            handshake = {"sid": connection.sid, "upgrades": [],
+                         "pingInterval": int(self.ping_interval * 1000),
+                         "pingTimeout": int(self.ping_timeout * 1000), "maxPayload": 1000000}
+            await self.send_raw(connection, "0" + json.dumps(handshake), "open")
+            connection.tasks.append(asyncio.ensure_future(self._ping(connection)))
+            async for message in ws:
+                await self._on_message(connection, message)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.connections.discard(connection)
+            for task in connection.tasks:
+                task.cancel()
+
+    async def _ping(self, connection):
+        """Ping do Engine.IO: sem "3" dentro do pingTimeout a conexão é fechada."""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            connection.pong.clear()
+            await connection.ws.send("2")
+            try:
+                await asyncio.wait_for(connection.pong.wait(), self.ping_timeout)
+            except asyncio.TimeoutError:
+                await connection.ws.close()
+                return
+
+    async def _on_message(self, connection, message):
+        if isinstance(message, bytes):
+            message = message.decode()
+        if message == "3":
+            connection.pong.set()
+        elif message == "40":
+            await self.send_raw(connection, "40" + json.dumps({"sid": connection.sid}), "connect")
+        elif message.startswith("42"):
+            packet = json.loads(message[2:])
+            event = packet[0]
+            payload = packet[1] if len(packet) > 1 else None
+            self.received.append((event, payload))
+            handler = getattr(self, f"_on_{event}", None)
+            if handler is not None:
+                await handler(connection, payload)
+
+    # ------------------------------------------------------------------
+    # Eventos
+
+    async def _on_auth(self, connection, payload):
+        if self.reject_auth:
+            await self.send_raw(connection, '42["NotAuthorized"]', "auth")
+            return
+        connection.uid = payload.get("uid")
+        connection.is_demo = payload.get("isDemo", 1)
+        connection.authenticated = True
+        await self.emit(connection, "successauth", {"id": connection.sid})
+        await self.emit(connection, "successupdateBalance", self._balance(connection))
+        deals = [deal for deal in self.deals.values() if deal["uid"] == connection.uid]
+        await self.emit(connection, "updateOpenedDeals", [deal for deal in deals if "closePrice" not in deal])
+        await self.emit(connection, "updateClosedDeals", [deal for deal in deals if "closePrice" in deal][-50:])
+
+    async def _on_openOrder(self, connection, payload):
+        request_id = payload.get("requestId")
+        error = self._order_error(payload)
+        if error:
+            await self.emit(connection, "failopenOrder", {"requestId": request_id, "error": error})
+            return
+
+        now = time.time()
+        amount = payload["amount"]
+        duration = payload["time"]
+        deal = {
+            "id": str(uuid.uuid4()),
+            "uid": connection.uid,
+            "requestId": request_id,
+            "asset": payload["asset"],
+            "amount": amount,
+            "command": 0 if payload["action"] == "call" else 1,
+            "percentProfit": self.payout,
+            "openPrice": self.price(payload["asset"]),
+            "openTimestamp": int(now),
+            "closeTimestamp": int(now + duration),
+            "isDemo": payload.get("isDemo", 1),
+        }
+        self.deals[deal["id"]] = deal
+        self.balance -= amount
+        await self.emit(connection, "successopenOrder", deal)
+        await self.emit(connection, "successupdateBalance", self._balance(connection))
+        asyncio.get_running_loop().call_later(duration * self.expiry_scale,
+                                              lambda: asyncio.ensure_future(self._close_deal(deal)))
+
+    async def _close_deal(self, deal):
+        close_price = self.price(deal["asset"], step=True)
+        outcome = self.outcome(deal) if self.outcome else None
+        if outcome is None:
+            moved = close_price - deal["openPrice"]
+            if moved == 0:
+                outcome = "draw"
+            else:
+                outcome = "win" if (moved > 0) == (deal["command"] == 0) else "loss"
+        profit = {"win": round(deal["amount"] * self.payout / 100, 2), "loss": -deal["amount"], "draw": 0}[outcome]
+        deal.update(closePrice=close_price, profit=profit)
+        self.balance += deal["amount"] + profit
+        await self.broadcast(deal["uid"], "successcloseOrder", {"profit": profit, "deals": [deal]})
+        await self.broadcast(deal["uid"], "successupdateBalance", {"uid": deal["uid"], "balance": self.balance,
+                                                                   "isDemo": deal["isDemo"]})
+
+    async def _on_changeSymbol(self, connection, payload):
+        connection.streams.add(payload["asset"])
+        if len(connection.streams) == 1:
+            connection.tasks.append(asyncio.ensure_future(self._stream(connection)))
+
+    async def _stream(self, connection):
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            now = round(time.time(), 3)
+            ticks = [[asset, now, self.price(asset, step=True)] for asset in sorted(connection.streams)]
+            await self.emit(connection, "updateStream", ticks)
+
+    async def _on_loadHistoryPeriod(self, connection, payload):
+        asset = payload["asset"]
+        period = payload.get("period", 60)
+        end = int(payload.get("time") or time.time())
+        count = min(int(payload.get("offset", 100)), 10000)
+        price = self.price(asset)
+        data = []
+        for index in range(count):
+            data.append({"time": end - index * period, "price": price})
+            price = round(price * (1 + self.random.gauss(0, 1e-4)), 5)
+        data.reverse()
+        await self.emit(connection, "loadHistoryPeriod", {"asset": asset, "period": period, "data": data})
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+
+    def price(self, asset, step=False):
+        """Preço simulado do ativo (passeio aleatório)."""
+        price = self.prices.get(asset)
+        if price is None:
+            price = self.prices[asset] = round(1 + self.random.random(), 5)
+        elif step:
+            price = self.prices[asset] = round(price * (1 + self.random.gauss(0, 1e-4)), 5)
+        return price
+
+    def _balance(self, connection):
+        return {"uid": connection.uid, "balance": self.balance, "isDemo": connection.is_demo}
+
+    def _order_error(self, payload):
+        if callable(self.fail_orders):
+            return self.fail_orders(payload)
+        if self.fail_orders:
+            return "Ordem recusada pelo servidor"
+        if payload.get("amount", 0) > self.balance:
+            return "Saldo insuficiente"
+        return None
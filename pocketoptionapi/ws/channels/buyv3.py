@@ -4,7 +4,35 @@ import time
 from pocketoptionapi.ws.channels.base import Base
 import logging
 import pocketoptionapi.global_value as global_value
-from pocketoptionapi.expiration import get_expiration_time
+
+
+class OrderTemplate(object):
+    """openOrder pré-serializado: no envio apenas o requestId é inserido."""
+
+    __slots__ = ("asset", "amount", "action", "duration", "_prefix", "_suffix")
+
+    def __init__(self, amount, active, direction, duration, is_demo):
+        self.asset = active
+        self.amount = amount
+        self.action = direction
+        self.duration = duration
+
+        data_dict = {
+            "asset": active,
+            "amount": amount,
+            "action": direction,
+            "isDemo": 1 if is_demo else 0,
+            "optionType": 100,
+            "time": duration
+        }
+        body = json.dumps(["openOrder", data_dict])
+        # '...,"time": 60}]' -> '...,"time": 60, "requestId": ' + id + '}]'
+        self._prefix = f'42{body[:-2]}, "requestId": '
+        self._suffix = "}]"
+
+    def render(self, request_id):
+        """Retorna o frame pronto para envio com o requestId informado."""
+        return self._prefix + str(request_id) + self._suffix
 
 
 class Buyv3(Base):
@@ -24,7 +52,7 @@ class Buyv3(Base):
             "asset": active,
             "amount": amount,
             "action": direction,
-            "isDemo": 1,
+            "isDemo": 1 if global_value.DEMO else 0,
             "requestId": request_id,
             "optionType": 100,
             "time": duration
@@ -41,7 +69,7 @@ class Buyv3(Base):
             "asset": active,
             "amount": amount,
             "action": direction,
-            "isDemo": 1,
+            "isDemo": 1 if global_value.DEMO else 0,
             "requestId": request_id,
             "optionType": 100,
             "time": duration
@@ -51,28 +79,37 @@ class Buyv3(Base):
 
         await self.async_send_websocket_request(self.name, message, str(request_id))
 
+    @staticmethod
+    def prepare(amount, active, direction, duration):
+        """Pré-serializa uma ordem para envio posterior com :meth:`async_fire`."""
+        return OrderTemplate(amount, active, direction, duration, global_value.DEMO)
+
+    async def async_fire(self, template, request_id):
+        """Envia uma ordem pré-serializada sem json.dumps nem lock de escrita."""
+        await self.api.send_frame(template.render(request_id))
+        self.api.latency.order_written(request_id)
+
 
 class Buyv3_by_raw_expired(Base):
     name = "sendMessage"
 
-    def __call__(self, price, active, direction, option, expired, request_id):
+    async def async_call(self, amount, active, direction, expired, request_id):
+        """Envia uma ordem que expira no timestamp absoluto ``expired``.
 
-        # thank Darth-Carrotpie's code
-        # https://github.com/Lu-Yi-Hsun/iqoptionapi/issues/6
-
-        if option == "turbo":
-            option_id = 3  # "turbo"
-        elif option == "binary":
-            option_id = 1  # "binary"
-        data = {
-            "body": {"price": price,
-                     "active_id": active,
-                     "expired": int(expired),
-                     "direction": direction.lower(),
-                     "option_type_id": option_id,
-                     "user_balance_id": int(global_value.balance_id)
-                     },
-            "name": "binary-options.open-option",
-            "version": "1.0"
+        O openOrder aceita apenas a duração, então ela é calculada contra o
+        relógio sincronizado do servidor no momento do envio.
+        """
+        duration = int(round(expired - self.api.server_time()))
+        data_dict = {
+            "asset": active,
+            "amount": amount,
+            "action": direction,
+            "isDemo": 1 if global_value.DEMO else 0,
+            "requestId": request_id,
+            "optionType": 100,
+            "time": duration
         }
-        self.send_websocket_request(self.name, data, str(request_id))
+
+        message = ["openOrder", data_dict]
+
+        await self.async_send_websocket_request(self.name, message, str(request_id))
@@ -23,3 +23,11 @@ class ChangeSymbol(Base):
             "period": interval}]
 
         self.send_websocket_request(self.name, data_stream)
+
+    async def async_call(self, active_id, interval):
+        """Versão assíncrona do método call para assinar o stream do ativo"""
+        data_stream = ["changeSymbol", {
+            "asset": active_id,
+            "period": interval}]
+
+        await self.async_send_websocket_request(self.name, data_stream)
@@ -1,6 +1,8 @@
 import asyncio
 from datetime import datetime, timedelta, timezone
+import inspect
 import os
+import time
 
 import websockets
 import json
@@ -12,12 +14,18 @@ from loguru import logger
 import pocketoptionapi.constants as OP_code
 import pocketoptionapi.global_value as global_value
 from pocketoptionapi.constants import REGION
-from pocketoptionapi.ws.objects.timesync import TimeSync
-from pocketoptionapi.ws.objects.time_sync import TimeSynchronizer
+from pocketoptionapi.ws.heartbeat import Heartbeat
 from pocketoptionapi.assets_parser import assets_parser
 
-timesync = TimeSync()
-sync = TimeSynchronizer()
+# Intervalo e timeout (segundos) dos testes de regiões com circuito aberto
+PROBE_INTERVAL = 5
+PROBE_TIMEOUT = 10
+# Sessões que caem antes disso (após a autenticação) reconectam com backoff exponencial
+STABLE_SESSION = 30
+MAX_RECONNECT_BACKOFF = 30
+# websockets >= 14 recebe os cabeçalhos em additional_headers; as versões antigas em extra_headers
+HEADERS_ARGUMENT = ("additional_headers" if "additional_headers" in inspect.signature(websockets.connect).parameters
+                    else "extra_headers")
 
 
 async def on_open():
@@ -26,22 +34,6 @@ async def on_open():
     global_value.websocket_is_connected = True
 
 
-async def send_ping(ws):
-    while global_value.websocket_is_connected is False:
-        await asyncio.sleep(0.1)
-    
-    while global_value.websocket_is_connected:
-        try:
-            await asyncio.sleep(20)
-            if global_value.websocket_is_connected:
-                ping_msg = '42["ps"]'
-                await ws.send(ping_msg)
-                # logger.debug("🏓 Ping enviado")
-        except Exception as e:
-            logger.warning(f"⚠️ Erro ao enviar ping: {e}")
-            break
-
-
 async def process_message(message):
     try:
         data = json.loads(message)
@@ -76,6 +68,7 @@ class WebsocketClient(object):
         self.updateStream = None
         self.history_data_ready = None
         self.successCloseOrder = False
+        self.failOpenOrder = False
         self.api = api
         self.message = None
         self.url = None
@@ -85,11 +78,27 @@ class WebsocketClient(object):
         self.loop = asyncio.get_event_loop()
         self.wait_second_message = False
         self._updateClosedDeals = False
+        self.updateOpenedDeals = False
+        self._order_ack_ns = None
+        # True quando a conexão foi fechada pelo usuário (não reconectar)
+        self.closing = False
+        # True quando o servidor recusou o SSID (NotAuthorized): não reconectar
+        self.auth_rejected = False
+        # Instante (monotônico) da autenticação na conexão atual
+        self.authenticated_at = None
+        self._handshake_latency = None
+        self._probe_task = None
+        # FrameRecorder opcional: grava os frames recebidos e enviados
+        self.recorder = None
+        self.heartbeat = Heartbeat(on_rtt=lambda rtt: self.api.region_health.record_rtt(self.url, rtt))
 
     async def websocket_listener(self, ws):
         logger.info("🎧 WebSocket listener iniciado")
         try:
+            recorder = self.recorder
             async for message in ws:
+                if recorder is not None:
+                    recorder.inbound(message)
                 try:
                     await self.on_message(message)
                 except Exception as msg_error:
@@ -106,6 +115,20 @@ class WebsocketClient(object):
             logger.error(f"❌ Erro no WebSocket listener: {e}")
             logger.debug(f"🔍 Detalhes do erro: {str(e)}")
             global_value.websocket_is_connected = False
+        finally:
+            global_value.websocket_is_connected = False
+            self.heartbeat.stop()
+            self.api.session.on_disconnect()
+
+    async def resume_session(self):
+        """Reenvia assinaturas e requisições pendentes após a autenticação em um novo socket."""
+        session = self.api.session
+        if session.established:
+            frames = session.replay_frames()
+            for frame in frames:
+                await self.websocket.send(frame)
+            logger.info(f"🔁 Sessão retomada: {len(frames)} assinaturas/requisições reenviadas")
+        session.on_ready()
 
     async def connect(self):
         ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
@@ -116,11 +139,16 @@ class WebsocketClient(object):
             await self.api.close()
         except:
             pass
+        self.closing = False
+        self.auth_rejected = False
+        # Uma sessão encerrada pelo usuário só fica pronta de novo após a autenticação
+        self.api.session.on_disconnect()
 
         logger.info("🔗 Iniciando conexão WebSocket...")
 
         # 🌐 Verificar se há servidor preferencial no .env
-        preferred_server = os.getenv('PREFERRED_SERVER', '').strip().upper()
+        # (ignorado quando as regiões foram substituídas, ex.: servidor local de testes)
+        preferred_server = '' if self.region.get_override() else os.getenv('PREFERRED_SERVER', '').strip().upper()
 
         # Escolher regiões baseado no modo demo com prioridade
         if global_value.DEMO:
@@ -139,36 +167,43 @@ class WebsocketClient(object):
         else:
             urls = self.region.get_priority_regions()
             logger.info("💰 Modo REAL - testando EUROPA primeiro, depois outros servidores prioritários")
+
+        # Regiões com menor RTT medido primeiro (o servidor preferencial continua na frente)
+        pinned = 1 if not global_value.DEMO and preferred_server and self.region.get_regions(preferred_server) else 0
+        urls = urls[:pinned] + self.api.region_health.rank(urls[pinned:])
         
         retry_count = 0
+        # Quedas seguidas de sessões que não chegaram a ficar estáveis
+        unstable_drops = 0
         max_retries = 2  # 🔄 Retry cada servidor até 2x antes de próximo
         use_proxy_fallback = False  # Começa SEM proxy
 
         proxy_enabled = os.getenv('PROXY_ENABLED', 'false').lower() == 'true'
         proxy_url = os.getenv('PROXY_URL', '').strip()
 
-        while not global_value.websocket_is_connected:
+        health = self.api.region_health
+        if self._probe_task is None or self._probe_task.done():
+            self._probe_task = asyncio.create_task(self.probe_regions(ssl_context))
+
+        while not global_value.websocket_is_connected and not self.closing:
+            session_dropped = False
+            attempted = False
             for url in urls:
+                if not health.allow(url):
+                    logger.debug(f"⛔ Região {REGION.get_region_name(url)} em resfriamento - pulando")
+                    continue
+                attempted = True
                 for attempt in range(max_retries):
                     if attempt > 0:
+                        if not health.allow(url):
+                            break  # circuito abriu: próxima região
                         backoff = min(2 ** attempt, 5)  # Backoff exponencial (máx 5s)
                         logger.debug(f"⏳ Aguardando {backoff}s antes do retry {attempt + 1}/{max_retries}...")
                         await asyncio.sleep(backoff)
 
                     logger.debug(f"🌐 Tentando conectar em: {url} (tentativa {attempt + 1}/{max_retries})")
 
-                    connect_kwargs = {
-                        "ssl": ssl_context,
-                        "open_timeout": 30,
-                        "close_timeout": 10,
-                        "ping_interval": 20,
-                        "ping_timeout": 10,
-                        "extra_headers": {
-                            "Origin": "https://pocketoption.com",
-                            "Cache-Control": "no-cache",
-                            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
-                        }
-                    }
+                    connect_kwargs = self._connect_kwargs(url, ssl_context)
 
                     # 🔐 Usar proxy APENAS se fallback estiver ativo
                     if use_proxy_fallback and proxy_enabled and proxy_url:
@@ -186,8 +221,16 @@ class WebsocketClient(object):
                         except Exception as e:
                             logger.warning(f"⚠️ Erro ao configurar proxy: {e}")
 
+                    handshake_started = time.perf_counter()
+                    handshake_done = False
                     try:
                         async with websockets.connect(url, **connect_kwargs) as ws:
+                            handshake_done = True
+                            # A região só conta como saudável após a autenticação (ver successauth)
+                            self._handshake_latency = time.perf_counter() - handshake_started
+                            self.authenticated_at = None
+                            if self.recorder is not None:
+                                ws = self.recorder.wrap(ws)
                             self.websocket = ws
                             self.url = url
                             global_value.websocket_is_connected = True
@@ -196,12 +239,22 @@ class WebsocketClient(object):
                             logger.info("🚀 Iniciando tarefas WebSocket (listener, sender, ping)")
                             on_message_task = asyncio.create_task(self.websocket_listener(ws))
                             sender_task = asyncio.create_task(self.send_message(self.message))
-                            ping_task = asyncio.create_task(send_ping(ws))
-
-                            await asyncio.gather(on_message_task, sender_task, ping_task)
+                            ping_task = asyncio.create_task(self.heartbeat.run(ws))
+
+                            # A sessão termina com o listener; sender e heartbeat não seguram a reconexão
+                            pending = {on_message_task, sender_task, ping_task}
+                            try:
+                                while on_message_task in pending:
+                                    _, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                            finally:
+                                for task in pending:
+                                    task.cancel()
+                                await asyncio.gather(*pending, return_exceptions=True)
 
                     except websockets.ConnectionClosed as e:
                         global_value.websocket_is_connected = False
+                        if not handshake_done:
+                            health.record_failure(url, e)
                         await self.on_close(e)
                         if attempt < max_retries - 1:
                             logger.debug(f"🔄 Retry servidor {url}...")
@@ -211,6 +264,8 @@ class WebsocketClient(object):
 
                     except Exception as e:
                         global_value.websocket_is_connected = False
+                        if not handshake_done:
+                            health.record_failure(url, e)
                         await self.on_error(e)
                         if attempt < max_retries - 1:
                             logger.debug(f"🔄 Retry servidor {url}...")
@@ -218,10 +273,48 @@ class WebsocketClient(object):
                             logger.warning(f"⚠️ Erro no servidor {url}: {str(e)[:50]}... - tentando próximo")
                         continue  # Próximo retry
 
-                    # Se chegou aqui, conectou com sucesso
+                    # Se chegou aqui, a sessão foi estabelecida e terminou
+                    session_dropped = True
+                    break
+
+                if session_dropped:
+                    break
+
+            if self.closing:
+                break
+
+            if not attempted:
+                # Todas as regiões em resfriamento: aguardar a primeira liberar
+                wait = min(health.retry_in(url) for url in urls)
+                logger.warning(f"⛔ Todas as regiões em resfriamento - nova tentativa em {wait:.0f}s")
+                await asyncio.sleep(wait)
+                continue
+
+            if session_dropped:
+                if self.auth_rejected:
+                    logger.error("❌ SSID recusado pelo servidor - reconexão cancelada")
                     break
+                lived = None if self.authenticated_at is None else time.monotonic() - self.authenticated_at
+                if lived is None:
+                    health.record_failure(self.url, "sessão encerrada antes da autenticação")
+                if lived is None or lived < STABLE_SESSION:
+                    # Sessão instável: a primeira reconexão é imediata, as seguintes esperam cada vez mais
+                    unstable_drops += 1
+                    backoff = min(2 ** (unstable_drops - 2), MAX_RECONNECT_BACKOFF) if unstable_drops > 1 else 0
+                    logger.warning(f"🔌 Sessão encerrada {'antes da autenticação' if lived is None else f'após {lived:.1f}s'}"
+                                   f" - reconectando em {backoff}s")
+                    await asyncio.sleep(backoff)
+                else:
+                    unstable_drops = 0
+                    retry_count = 0
+                    logger.warning("🔌 Sessão encerrada - reconectando para retomar assinaturas")
+                # Reconectar primeiro no mesmo servidor; a sessão é retomada após a autenticação
+                urls = [self.url] + [other for other in urls if other != self.url]
+                pinned = 1
+                continue
 
             retry_count += 1
+            urls = urls[:pinned] + health.rank(urls[pinned:])
 
             # 🔐 Ativar proxy fallback após primeira rodada falhar
             if retry_count == 1 and not use_proxy_fallback and proxy_enabled and proxy_url:
@@ -237,6 +330,51 @@ class WebsocketClient(object):
 
         return True
 
+    @staticmethod
+    def _connect_kwargs(url, ssl_context, open_timeout=30):
+        """Parâmetros do websockets.connect para as regiões da PocketOption."""
+        kwargs = {
+            "open_timeout": open_timeout,
+            "close_timeout": 10,
+            # Pings do websocket ficam a cargo do Heartbeat (intervalo do handshake)
+            "ping_interval": None,
+            HEADERS_ARGUMENT: {
+                "Origin": "https://pocketoption.com",
+                "Cache-Control": "no-cache",
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
+            }
+        }
+        # ws:// (servidor local) não aceita contexto SSL
+        if url.startswith("wss://"):
+            kwargs["ssl"] = ssl_context
+        return kwargs
+
+    async def probe_regions(self, ssl_context, interval=PROBE_INTERVAL):
+        """
+        Testa em segundo plano as regiões com circuito aberto e resfriamento vencido.
+
+        O teste é apenas o handshake websocket (tentativa meio-aberta): sucesso
+        fecha o circuito da região, falha o abre com resfriamento maior.
+        """
+        health = self.api.region_health
+        while not self.closing:
+            await asyncio.sleep(interval)
+            for url in health.due_probes():
+                if self.closing or not health.allow(url):
+                    continue
+                started = time.perf_counter()
+                try:
+                    async with websockets.connect(url, **self._connect_kwargs(url, ssl_context, PROBE_TIMEOUT)):
+                        health.record_success(url, time.perf_counter() - started)
+                    logger.info(f"🩺 Região {REGION.get_region_name(url)} respondeu ao teste - circuito fechado")
+                except asyncio.CancelledError:
+                    # Sem resultado: a região não pode ficar meio-aberta esperando este teste
+                    health.record_failure(url, "teste cancelado")
+                    raise
+                except Exception as e:
+                    health.record_failure(url, e)
+                    logger.debug(f"🩺 Região {REGION.get_region_name(url)} falhou no teste: {e}")
+
     async def send_message(self, message):
         while global_value.websocket_is_connected is False:
             await asyncio.sleep(0.1)
@@ -270,7 +408,8 @@ class WebsocketClient(object):
 
     async def on_message(self, message):
         """Método para processar mensagens do websocket."""
-        
+        self.heartbeat.on_message()
+
         # Primeiro converter bytes para string se necessário
         if type(message) is bytes:
             message2 = message.decode('utf-8')
@@ -305,25 +444,50 @@ class WebsocketClient(object):
                 global_value.balance_type = message["isDemo"]
                 logger.info(f"💰 Saldo atualizado: ${message['balance']}")
 
-            elif isinstance(message, dict) and "requestId" in message and message["requestId"] == 'buy':
+            elif self.failOpenOrder:
+                # Anexo do failopenOrder: nem sempre traz o requestId (às vezes só o texto do erro)
+                self.failOpenOrder = False
+                global_value.order_data = message
+                self.api.reject_order_request(message if isinstance(message, dict) else {"error": message})
+                logger.warning(f"📉 Ordem rejeitada pelo servidor: {message}")
+
+            elif isinstance(message, dict) and "requestId" in message:
                 global_value.order_data = message
+                if "id" in message and "error" not in message:
+                    self.api.order_book.on_open(message)
+                self.api.resolve_order_request(message, self._order_ack_ns)
                 logger.info("📈 Dados de ordem atualizados")
 
             elif self.wait_second_message and isinstance(message, list):
                 self.wait_second_message = False  # Resetar para futuras mensagens
                 self._updateClosedDeals = False  # Resetar o estado
+                self.api.order_book.on_close(deal for deal in message if isinstance(deal, dict) and "id" in deal)
+
+            elif self.updateOpenedDeals and isinstance(message, list):
+                self.updateOpenedDeals = False
+                for deal in message:
+                    if isinstance(deal, dict) and "id" in deal:
+                        self.api.order_book.on_open(deal)
+                        # Ordem enviada antes de uma queda cuja confirmação se perdeu
+                        if "requestId" in deal:
+                            self.api.resolve_order_request(deal)
 
             elif isinstance(message, dict) and self.successCloseOrder:
                 self.api.order_async = message
                 self.successCloseOrder = False  # Resetar para futuras mensagens
+                self.wait_second_message = False
+                self.api.order_book.on_close(message.get("deals") or [])
 
             elif self.history_data_ready and isinstance(message, dict):
                 self.history_data_ready = False
+                self.api.session.request_answered("loadHistoryPeriod", message)
                 self.api.history_data = message["data"]
 
             elif self.updateStream and isinstance(message, list):
                 self.updateStream = False
                 self.api.time_sync.server_timestamp = message[0][1]
+                self.api.sync.synchronize(max(tick[1] for tick in message))
+                self.api.candle_builder.on_ticks(message)
 
             elif self.updateHistoryNew and isinstance(message, dict):
                 self.updateHistoryNew = False
@@ -359,6 +523,7 @@ class WebsocketClient(object):
             pass
 
         if message.startswith('0') and "sid" in message:
+            self.heartbeat.on_open_packet(message)
             await self.websocket.send("40")
 
         elif message == "2":
@@ -384,21 +549,33 @@ class WebsocketClient(object):
 
             if message[0] == "successauth":
                 logger.debug("🎉 AUTENTICAÇÃO BEM SUCEDIDA!")
+                self.authenticated_at = time.monotonic()
+                if self.url:
+                    self.api.region_health.record_success(self.url, self._handshake_latency)
                 await on_open()
+                await self.resume_session()
 
             elif message[0] == "successupdateBalance":
                 global_value.balance_updated = True
                 logger.debug("💰 Balance update success")
             elif message[0] == "successopenOrder":
+                self._order_ack_ns = time.perf_counter_ns()
                 global_value.result = True
                 logger.debug("📈 Open order success")
 
+            elif message[0] == "failopenOrder":
+                self.failOpenOrder = True
+                logger.debug("📉 Open order falhou")
+
             elif message[0] == "updateClosedDeals":
                 # Estabelecemos que recebemos a primeira mensagem de interesse
                 self._updateClosedDeals = True
                 self.wait_second_message = True  # Estabelecemos que esperamos a segunda mensagem de interesse
                 await self.websocket.send('42["changeSymbol",{"asset":"AUDNZD_otc","period":60}]')
 
+            elif message[0] == "updateOpenedDeals":
+                self.updateOpenedDeals = True
+
             elif message[0] == "successcloseOrder":
                 self.successCloseOrder = True
                 self.wait_second_message = True  # Estabelecemos que esperamos a segunda mensagem de interesse
@@ -421,6 +598,7 @@ class WebsocketClient(object):
             global_value.websocket_is_connected = False
             global_value.check_websocket_if_error = True
             global_value.websocket_error_reason = "SSID inválido ou expirado"
+            self.auth_rejected = True
             global_value.ssl_Mutual_exclusion = False
             await self.websocket.close()
 
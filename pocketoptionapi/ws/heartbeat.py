@@ -0,0 +1,139 @@
+"""
+Autor: AdminhuDev
+Heartbeat do websocket derivado do handshake Engine.IO.
+
+O pacote de abertura ``0{...}`` informa pingInterval e pingTimeout. A cada meio
+intervalo o cliente envia um ping do websocket e mede o RTT até o pong; sem
+pong dentro do prazo (ou sem nenhum frame do servidor por pingInterval +
+pingTimeout) a conexão é considerada meio-aberta e é abortada, disparando a
+reconexão em no máximo um intervalo.
+"""
+import asyncio
+import json
+import time
+
+from loguru import logger
+
+import pocketoptionapi.global_value as global_value
+
+# Valores padrão do Engine.IO v4 (segundos)
+DEFAULT_PING_INTERVAL = 25.0
+DEFAULT_PING_TIMEOUT = 20.0
+# Keepalive de aplicação esperado pela plataforma
+APP_PING = '42["ps"]'
+
+
+class Heartbeat(object):
+    """Mede o RTT e detecta conexões meio-abertas."""
+
+    def __init__(self, on_rtt=None, clock=time.monotonic):
+        """
+        :param on_rtt: (opcional) Função chamada com cada amostra de RTT em segundos.
+        :param clock: Relógio monotônico em segundos.
+        """
+        self.on_rtt = on_rtt
+        self.clock = clock
+        self.ping_interval = DEFAULT_PING_INTERVAL
+        self.ping_timeout = DEFAULT_PING_TIMEOUT
+        self.rtt = None
+        self.last_received = clock()
+        self.last_app_ping = None
+        self._stopped = asyncio.Event()
+
+    def on_open_packet(self, message):
+        """Lê pingInterval/pingTimeout (ms) do pacote de abertura ``0{...}``."""
+        try:
+            handshake = json.loads(message[1:])
+        except (json.JSONDecodeError, TypeError):
+            return
+        if not isinstance(handshake, dict):
+            return
+        if handshake.get("pingInterval"):
+            self.ping_interval = handshake["pingInterval"] / 1000.0
+        if handshake.get("pingTimeout"):
+            self.ping_timeout = handshake["pingTimeout"] / 1000.0
+        # Conexão nova: o keepalive e o RTT da anterior não valem mais
+        self.last_app_ping = None
+        self.rtt = None
+        self.last_received = self.clock()
+        logger.debug(f"💓 Heartbeat: intervalo {self.ping_interval}s, timeout {self.ping_timeout}s")
+
+    def on_message(self):
+        """Qualquer frame do servidor prova que a conexão está viva."""
+        self.last_received = self.clock()
+
+    @property
+    def probe_interval(self):
+        """Intervalo entre pings: meio pingInterval, para detectar quedas em um intervalo."""
+        return self.ping_interval / 2
+
+    @property
+    def silent_for(self):
+        """Segundos desde o último frame recebido."""
+        return self.clock() - self.last_received
+
+    def is_stale(self):
+        """True se o servidor não enviou nada por pingInterval + pingTimeout."""
+        return self.silent_for > self.ping_interval + self.ping_timeout
+
+    async def probe(self, ws):
+        """
+        Envia um ping do websocket e aguarda o pong.
+
+        :returns: RTT em segundos ou None se o pong não chegou a tempo.
+        """
+        started = time.perf_counter()
+        try:
+            pong = await ws.ping()
+            await asyncio.wait_for(pong, min(self.ping_timeout, self.probe_interval))
+        except asyncio.TimeoutError:
+            return None
+        rtt = time.perf_counter() - started
+        self.rtt = rtt
+        if self.on_rtt is not None:
+            self.on_rtt(rtt)
+        return rtt
+
+    def stop(self):
+        """Acorda e encerra o loop em execução (chamado quando o socket cai)."""
+        self._stopped.set()
+
+    async def run(self, ws):
+        """Loop do heartbeat enquanto o websocket estiver conectado."""
+        stopped = self._stopped = asyncio.Event()
+        while global_value.websocket_is_connected is False:
+            await asyncio.sleep(0.1)
+
+        self.last_received = self.clock()
+        while global_value.websocket_is_connected:
+            try:
+                try:
+                    await asyncio.wait_for(stopped.wait(), self.probe_interval)
+                    break
+                except asyncio.TimeoutError:
+                    pass
+                if not global_value.websocket_is_connected:
+                    break
+                now = self.clock()
+                if self.last_app_ping is None or now - self.last_app_ping >= self.ping_interval:
+                    await ws.send(APP_PING)
+                    self.last_app_ping = now
+                rtt = await self.probe(ws)
+            except Exception as e:
+                logger.warning(f"⚠️ Erro no heartbeat: {e}")
+                break
+
+            if rtt is None or self.is_stale():
+                logger.warning(f"💔 Conexão meio-aberta detectada (sem resposta há {self.silent_for:.1f}s) - abortando")
+                self.abort(ws)
+                break
+
+    @staticmethod
+    def abort(ws):
+        """Fecha o socket sem o handshake de fechamento (o outro lado não responde)."""
+        global_value.websocket_is_connected = False
+        transport = getattr(ws, "transport", None)
+        if transport is not None:
+            transport.abort()
+        else:
+            asyncio.ensure_future(ws.close())
@@ -0,0 +1,107 @@
+"""
+Autor: AdminhuDev
+Construção de velas em tempo real a partir dos ticks do updateStream.
+"""
+from collections import defaultdict
+
+from pocketoptionapi.ws.objects.base import Base
+
+
+class CandleBuilder(Base):
+    """Agrega ticks em velas OHLC por ativo e período."""
+
+    def __init__(self):
+        super(CandleBuilder, self).__init__()
+        self.__name = "candle_builder"
+        # ativo -> períodos assinados (segundos)
+        self.periods = defaultdict(set)
+        # (ativo, período) -> vela em formação
+        self.bars = {}
+        # (ativo, período) -> última vela fechada
+        self.closed = {}
+        # ativo -> (timestamp, preço) do último tick
+        self.last_tick = {}
+        self._tick_listeners = []
+
+    def add_tick_listener(self, callback):
+        """Registra uma função chamada com ``(ativo, timestamp, preço)`` a cada tick.
+
+        :param callback: Função síncrona chamada no recebimento do updateStream.
+        """
+        self._tick_listeners.append(callback)
+
+    def remove_tick_listener(self, callback):
+        """Remove uma função registrada com :meth:`add_tick_listener`."""
+        try:
+            self._tick_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def subscribe(self, asset, period):
+        """Passa a construir velas de ``period`` segundos para o ativo."""
+        self.periods[asset].add(period)
+
+    def unsubscribe(self, asset, period):
+        """Para de construir velas de ``period`` segundos para o ativo."""
+        self.periods[asset].discard(period)
+        self.bars.pop((asset, period), None)
+        self.closed.pop((asset, period), None)
+
+    def on_ticks(self, ticks):
+        """Processa um frame do updateStream: lista de [ativo, timestamp, preço]."""
+        for tick in ticks:
+            self.on_tick(tick[0], tick[1], tick[2])
+
+    def on_tick(self, asset, timestamp, price):
+        """Atualiza as velas em formação do ativo com um tick."""
+        self.last_tick[asset] = (timestamp, price)
+        for callback in self._tick_listeners:
+            callback(asset, timestamp, price)
+        periods = self.periods.get(asset)
+        if not periods:
+            return
+
+        second = int(timestamp)
+        for period in periods:
+            start = second - second % period
+            key = (asset, period)
+            bar = self.bars.get(key)
+            if bar is None or start > bar["time"]:
+                if bar is not None:
+                    self.closed[key] = bar
+                self.bars[key] = {"time": start, "open": price, "high": price, "low": price, "close": price}
+            elif start == bar["time"]:
+                if price > bar["high"]:
+                    bar["high"] = price
+                elif price < bar["low"]:
+                    bar["low"] = price
+                bar["close"] = price
+            # Ticks atrasados de velas já fechadas são ignorados
+
+    def close(self, asset, period, boundary):
+        """
+        Fecha a vela que termina em ``boundary``.
+
+        :param boundary: Timestamp do servidor (múltiplo de ``period``) do fechamento.
+        :returns: A vela fechada; sem ticks no período, uma vela plana no último
+            preço conhecido; None se o ativo ainda não teve ticks.
+        """
+        key = (asset, period)
+        start = boundary - period
+        bar = self.bars.get(key)
+        if bar is not None and bar["time"] <= start:
+            del self.bars[key]
+            self.closed[key] = bar
+            if bar["time"] == start:
+                return bar
+        closed = self.closed.get(key)
+        if closed is not None and closed["time"] == start:
+            return closed
+
+        last = self.last_tick.get(asset)
+        if last is None:
+            return None
+        price = last[1]
+        bar = {"time": start, "open": price, "high": price, "low": price, "close": price}
+        self.closed[key] = bar
+        return bar
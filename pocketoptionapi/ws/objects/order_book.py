@@ -0,0 +1,200 @@
+"""
+Autor: AdminhuDev
+Livro de ordens em memória, indexado pelo id da ordem.
+
+As ordens fechadas ficam no livro (e em ``global_value.order_closed``/``stat``)
+para consultas posteriores até o limite de ``max_closed``; acima dele as mais
+antigas são descartadas. Ordens
+desconhecidas criadas só para aguardar um resultado são esquecidas quando a
+espera termina sem o fechamento (timeout ou cancelamento).
+"""
+import asyncio
+from collections import OrderedDict
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.ws.objects.base import Base
+
+
+class Order(object):
+    """Ordem acompanhada pelo livro de ordens."""
+
+    __slots__ = ("id", "data", "closed", "waiters", "_result")
+
+    def __init__(self, order_id):
+        self.id = order_id
+        self.data = {}
+        self.closed = False
+        self.waiters = 0
+        self._result = None
+
+    @property
+    def profit(self):
+        """Propriedade para obter o profit da ordem.
+
+        :returns: O profit informado pelo servidor ou None.
+        """
+        return self.data.get("profit")
+
+    @property
+    def status(self):
+        """Propriedade para obter o status da ordem.
+
+        :returns: "ganhou", "perdeu", "desconhecido" se o fechamento veio sem
+            profit, ou None se a ordem ainda está aberta.
+        """
+        if not self.closed:
+            return None
+        profit = self.profit
+        if profit is None:
+            return "desconhecido"
+        return "ganhou" if profit > 0 else "perdeu"
+
+    def update(self, data):
+        """Mescla os dados recebidos do servidor.
+
+        :param dict data: Dados da ordem.
+        """
+        self.data.update(data)
+
+    def close(self, data):
+        """Marca a ordem como fechada e acorda quem aguarda o resultado.
+
+        :param dict data: Dados finais da ordem.
+        :returns: True se a ordem acabou de ser fechada.
+        """
+        self.data.update(data)
+        if self.closed:
+            return False
+        self.closed = True
+        if self._result is not None and not self._result.done():
+            self._result.set_result((self.profit, self.status))
+        return True
+
+    async def result(self):
+        """Aguarda o fechamento da ordem.
+
+        :returns: Tupla (profit, status).
+        """
+        if self.closed:
+            return self.profit, self.status
+        if self._result is None:
+            self._result = asyncio.get_running_loop().create_future()
+        self.waiters += 1
+        try:
+            # shield: o timeout de um chamador não cancela o resultado dos demais
+            return await asyncio.shield(self._result)
+        finally:
+            self.waiters -= 1
+
+
+class OrderBook(Base):
+    """Classe para representar as ordens da sessão indexadas pelo id."""
+
+    def __init__(self, max_closed=1000):
+        """
+        :param max_closed: Quantidade de ordens fechadas mantidas no livro.
+        """
+        super(OrderBook, self).__init__()
+        self.__name = "orderBook"
+        self.orders = {}
+        self.max_closed = max_closed
+        # ids das ordens fechadas, da mais antiga para a mais recente
+        self._closed = OrderedDict()
+        self._close_listeners = []
+
+    def get(self, order_id):
+        """Método para obter uma ordem conhecida.
+
+        :param order_id: O id da ordem.
+        :returns: A :class:`Order` ou None.
+        """
+        return self.orders.get(order_id)
+
+    def order(self, order_id):
+        """Método para obter uma ordem, registrando-a se ainda não existir.
+
+        :param order_id: O id da ordem.
+        :returns: A :class:`Order`.
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            order = self.orders[order_id] = Order(order_id)
+        return order
+
+    async def result(self, order_id):
+        """Aguarda o fechamento de uma ordem.
+
+        Se a espera termina sem o fechamento (timeout ou cancelamento) e a
+        ordem nunca foi vista pelo servidor, ela é removida do livro.
+
+        :param order_id: O id da ordem.
+        :returns: Tupla (profit, status).
+        """
+        order = self.order(order_id)
+        try:
+            return await order.result()
+        finally:
+            if not order.closed and not order.data and not order.waiters and self.orders.get(order_id) is order:
+                del self.orders[order_id]
+
+    def add_close_listener(self, callback):
+        """Registra uma função chamada com cada :class:`Order` no momento do fechamento.
+
+        :param callback: Função síncrona que recebe a ordem fechada.
+        """
+        self._close_listeners.append(callback)
+
+    def remove_close_listener(self, callback):
+        """Remove uma função registrada com :meth:`add_close_listener`."""
+        try:
+            self._close_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def on_open(self, deal):
+        """Processa uma ordem aberta (successopenOrder/updateOpenedDeals).
+
+        :param dict deal: Dados da ordem.
+        """
+        order = self.order(deal["id"])
+        if not order.closed:
+            order.update(deal)
+            global_value.order_open.add(order.id)
+        return order
+
+    def on_close(self, deals):
+        """Processa ordens fechadas (successcloseOrder/updateClosedDeals).
+
+        :param deals: Iterável com os dados das ordens fechadas.
+        :returns: Lista das ordens que acabaram de ser fechadas.
+        """
+        # Estado da sessão resolvido uma vez por lote (cada acesso a global_value consulta o contexto)
+        values = global_value.current()
+        order_open, order_closed, stat = values.order_open, values.order_closed, values.stat
+        listeners = self._close_listeners
+        closed = []
+        for deal in deals:
+            order = self.order(deal["id"])
+            if order.close(deal):
+                order_id = order.id
+                order_open.discard(order_id)
+                order_closed.add(order_id)
+                stat[order_id] = order.profit
+                for callback in listeners:
+                    callback(order)
+                closed.append(order)
+                self._closed[order_id] = None
+        excess = len(self._closed) - self.max_closed
+        if excess > 0:
+            self._evict(excess, values)
+        return closed
+
+    def _evict(self, count, values):
+        """Descarta as ``count`` ordens fechadas mais antigas (resultado e listeners já entregues)."""
+        oldest, orders = self._closed, self.orders
+        order_closed, stat = values.order_closed, values.stat
+        for _ in range(count):
+            order_id = oldest.popitem(last=False)[0]
+            orders.pop(order_id, None)
+            order_closed.discard(order_id)
+            stat.pop(order_id, None)
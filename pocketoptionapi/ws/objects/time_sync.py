@@ -1,38 +1,154 @@
 """
 Módulo para sincronização de tempo com o servidor da PocketOption.
 Fornece funcionalidades para manter o tempo local sincronizado com o servidor.
+
+Cada timestamp recebido do servidor é uma amostra do deslocamento entre o
+relógio do servidor e o relógio monotônico local, somada ao atraso da rede.
+O atraso só reduz o deslocamento observado, então por janela de tempo fica
+apenas a amostra de maior deslocamento (menor atraso). Sobre essas amostras
+uma regressão linear estima a deriva, a reta é deslocada até envolver as
+amostras por cima e o relógio do servidor é extrapolado entre os frames.
+
+A leitura do relógio usa apenas time.monotonic_ns e o deslocamento em cache
+(inteiros em nanossegundos); objetos datetime só são criados quando pedidos.
 """
+import time
+from collections import deque
 from datetime import datetime, timezone
 
+# Deriva máxima aceita entre os relógios (1000 ppm)
+MAX_DRIFT = 1e-3
+# Deriva assumida ao extrapolar a incerteza (osciladores comuns, 100 ppm)
+DRIFT_UNCERTAINTY = 1e-4
+NS = 1_000_000_000
+
+
 class TimeSynchronizer:
-    def __init__(self):
+    def __init__(self, window=32, bucket=1.0, reset_threshold=1.0, clock=time.monotonic_ns):
+        """
+        :param window: Quantidade de janelas filtradas usadas na regressão.
+        :param bucket: Duração em segundos de cada janela do filtro de menor atraso.
+        :param reset_threshold: Salto (segundos) acima da estimativa que reinicia o filtro.
+        :param clock: Relógio monotônico local em nanossegundos.
+        """
+        self.bucket_ns = int(bucket * NS)
+        self.reset_threshold_ns = int(reset_threshold * NS)
+        self.clock = clock
+        # (tempo local, deslocamento) em ns da melhor amostra de cada janela encerrada
+        self.samples = deque(maxlen=window)
+        self._bucket_start = None
+        self._bucket_best = None
+        # Estimativa em cache: servidor = local + offset_ns + drift * (local - reference_ns)
+        self.reference_ns = 0
+        self.offset_ns = None
+        self.drift = 0.0
+        self.residual_ns = 0
+        self.last_sample_ns = None
         self.server_time_reference = None
-        self.local_time_reference = None
 
-    def synchronize(self, server_timestamp):
+    @property
+    def synchronized(self):
+        return self.offset_ns is not None
+
+    def reset(self):
+        """Descarta as amostras (ex.: o relógio do servidor foi ajustado)."""
+        self.samples.clear()
+        self._bucket_start = None
+        self._bucket_best = None
+        self.offset_ns = None
+        self.drift = 0.0
+        self.residual_ns = 0
+
+    def synchronize(self, server_timestamp, local_ns=None):
         """
-        Sincroniza o tempo local com o timestamp do servidor.
-        
+        Adiciona uma amostra do relógio do servidor.
+
         :param server_timestamp: O timestamp do servidor em segundos.
+        :param local_ns: (opcional) Instante local monotônico da recepção em ns.
         """
+        local = self.clock() if local_ns is None else local_ns
+        offset = int(server_timestamp * NS) - local
         self.server_time_reference = server_timestamp
-        self.local_time_reference = datetime.now(timezone.utc).timestamp()
+        self.last_sample_ns = local
 
-    def get_synced_datetime(self):
+        if self.offset_ns is not None and offset - self._offset_at(local) > self.reset_threshold_ns:
+            self.reset()
+
+        if self._bucket_start is None or local - self._bucket_start >= self.bucket_ns:
+            if self._bucket_best is not None:
+                self.samples.append(self._bucket_best)
+            self._bucket_start = local
+            self._bucket_best = (local, offset)
+        elif offset > self._bucket_best[1]:
+            self._bucket_best = (local, offset)
+        else:
+            return
+        self._fit()
+
+    def _offset_at(self, local):
+        if self.drift:
+            return self.offset_ns + int(self.drift * (local - self.reference_ns))
+        return self.offset_ns
+
+    def _fit(self):
+        points = list(self.samples)
+        points.append(self._bucket_best)
+        count = len(points)
+        # Regressão relativa à primeira amostra (valores pequenos, sem perda de precisão)
+        base_t, base_o = points[0]
+        mean_t = sum(point[0] - base_t for point in points) / count
+        mean_o = sum(point[1] - base_o for point in points) / count
+        var_t = sum((point[0] - base_t - mean_t) ** 2 for point in points)
+
+        drift = 0.0
+        if count >= 3 and var_t > 0:
+            covariance = sum((point[0] - base_t - mean_t) * (point[1] - base_o - mean_o) for point in points)
+            drift = max(-MAX_DRIFT, min(MAX_DRIFT, covariance / var_t))
+
+        # A reta passa a envolver as amostras por cima: o menor atraso observado.
+        # A altura da envoltória acima da reta média é a incerteza da estimativa.
+        envelope = max(point[1] - base_o - mean_o - drift * (point[0] - base_t - mean_t) for point in points)
+        self.reference_ns = base_t + int(mean_t)
+        self.offset_ns = base_o + int(mean_o + envelope)
+        self.drift = drift
+        self.residual_ns = int(envelope)
+
+    def server_time_ns(self):
         """
-        Retorna o datetime atual sincronizado com o servidor.
-        
-        :return: Um objeto datetime sincronizado com o servidor.
+        Retorna o timestamp atual do servidor em nanossegundos (inteiro).
+
         :raises ValueError: Se o tempo não foi sincronizado ainda.
         """
-        if self.server_time_reference is None or self.local_time_reference is None:
+        if self.offset_ns is None:
             raise ValueError("O tempo ainda não foi sincronizado.")
 
-        # Calcula o tempo decorrido desde a última sincronização
-        time_elapsed = datetime.now(timezone.utc).timestamp() - self.local_time_reference
+        local = self.clock()
+        return local + self._offset_at(local)
+
+    def server_time(self):
+        """
+        Retorna o timestamp atual do servidor em segundos.
 
-        # Ajusta o timestamp do servidor com o tempo decorrido
-        synced_timestamp = self.server_time_reference + time_elapsed
+        :raises ValueError: Se o tempo não foi sincronizado ainda.
+        """
+        return self.server_time_ns() / NS
 
-        # Converte para datetime
-        return datetime.fromtimestamp(synced_timestamp, timezone.utc)
+    def server_now(self):
+        """
+        Retorna o timestamp atual do servidor e a incerteza da estimativa.
+
+        :return: Tupla (timestamp em segundos, incerteza em segundos).
+        :raises ValueError: Se o tempo não foi sincronizado ainda.
+        """
+        now = self.server_time_ns()
+        uncertainty = self.residual_ns + abs(self.clock() - self.last_sample_ns) * DRIFT_UNCERTAINTY
+        return now / NS, uncertainty / NS
+
+    def get_synced_datetime(self):
+        """
+        Retorna o datetime atual sincronizado com o servidor.
+
+        :return: Um objeto datetime sincronizado com o servidor.
+        :raises ValueError: Se o tempo não foi sincronizado ainda.
+        """
+        return datetime.fromtimestamp(self.server_time(), timezone.utc)
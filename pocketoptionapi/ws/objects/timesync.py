@@ -66,6 +66,6 @@ class TimeSync(Base):
 
         :returns: The expiration timestamp.
         """
-        return time.mktime(self.expiration_datetime.timetuple())
+        return int(self.server_timestamp) + self.expiration_time * 60
 
 
@@ -0,0 +1,176 @@
+"""
+Autor: AdminhuDev
+Saúde das regiões (servidores websocket) usada para ordenar as conexões.
+
+Cada região tem um circuit breaker: depois de falhas seguidas o circuito abre
+e a região é pulada por um período de resfriamento (que dobra a cada nova
+abertura). Terminado o resfriamento a região fica meio-aberta e recebe uma
+única tentativa de teste; sucesso fecha o circuito, falha o abre de novo. Uma
+tentativa sem resultado em ``probe_timeout`` segundos libera uma nova.
+"""
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+from pocketoptionapi.constants import REGION
+
+# Peso das novas amostras na média móvel do RTT
+RTT_SMOOTHING = 0.2
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class RegionHealth(object):
+    """Métricas e estado do circuit breaker de uma região."""
+
+    __slots__ = ("url", "rtt", "rtt_samples", "successes", "failures", "consecutive_failures",
+                 "recent_errors", "handshake_latency", "state", "opened_at", "cooldown", "trips",
+                 "probe_started")
+
+    def __init__(self, url):
+        self.url = url
+        self.rtt: Optional[float] = None
+        self.rtt_samples = 0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        # (timestamp, erro) das últimas falhas
+        self.recent_errors = deque(maxlen=10)
+        self.handshake_latency: Optional[float] = None
+        self.state = CLOSED
+        self.opened_at = None
+        self.cooldown = 0.0
+        self.trips = 0
+        self.probe_started = None
+
+    @property
+    def success_rate(self):
+        total = self.successes + self.failures
+        return self.successes / total if total else None
+
+    def record_rtt(self, rtt):
+        """Registra uma amostra de RTT em segundos."""
+        if self.rtt is None:
+            self.rtt = rtt
+        else:
+            self.rtt += RTT_SMOOTHING * (rtt - self.rtt)
+        self.rtt_samples += 1
+
+    def summary(self):
+        """Resumo da região (latências em milissegundos)."""
+        return {
+            "state": self.state,
+            "rtt": self.rtt * 1e3 if self.rtt is not None else None,
+            "rtt_samples": self.rtt_samples,
+            "handshake_latency": self.handshake_latency * 1e3 if self.handshake_latency is not None else None,
+            "success_rate": self.success_rate,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "recent_errors": [error for _, error in self.recent_errors],
+        }
+
+
+class RegionMonitor(object):
+    """Acompanha a saúde de cada região e ordena as tentativas de conexão."""
+
+    def __init__(self, failure_threshold=3, base_cooldown=30.0, max_cooldown=600.0, probe_timeout=30.0,
+                 clock=time.monotonic):
+        """
+        :param failure_threshold: Falhas seguidas que abrem o circuito da região.
+        :param base_cooldown: Resfriamento (segundos) da primeira abertura.
+        :param max_cooldown: Resfriamento máximo (segundos).
+        :param probe_timeout: Segundos aguardando o resultado da tentativa meio-aberta.
+        :param clock: Relógio monotônico em segundos.
+        """
+        self.failure_threshold = failure_threshold
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.probe_timeout = probe_timeout
+        self.clock = clock
+        self.regions: Dict[str, RegionHealth] = {}
+
+    def get(self, url) -> RegionHealth:
+        """Retorna (criando se necessário) a saúde da região."""
+        health = self.regions.get(url)
+        if health is None:
+            health = self.regions[url] = RegionHealth(url)
+        return health
+
+    def record_rtt(self, url, rtt):
+        """Registra uma amostra de RTT (segundos) da região."""
+        if url:
+            self.get(url).record_rtt(rtt)
+
+    def record_success(self, url, handshake_latency=None):
+        """Handshake concluído: fecha o circuito da região."""
+        health = self.get(url)
+        health.successes += 1
+        health.consecutive_failures = 0
+        if handshake_latency is not None:
+            health.handshake_latency = handshake_latency
+        health.state = CLOSED
+        health.trips = 0
+        health.opened_at = None
+
+    def record_failure(self, url, error=None):
+        """Falha de conexão: abre o circuito ao atingir o limite (ou se estava meio-aberto)."""
+        health = self.get(url)
+        health.failures += 1
+        health.consecutive_failures += 1
+        health.recent_errors.append((time.time(), str(error)[:200] if error is not None else None))
+        if health.state == HALF_OPEN or health.consecutive_failures >= self.failure_threshold:
+            health.trips += 1
+            health.cooldown = min(self.base_cooldown * 2 ** (health.trips - 1), self.max_cooldown)
+            health.opened_at = self.clock()
+            health.state = OPEN
+
+    def retry_in(self, url):
+        """Segundos até a região poder ser testada novamente (0 se disponível)."""
+        health = self.regions.get(url)
+        if health is None or health.state == CLOSED:
+            return 0.0
+        if health.state == HALF_OPEN:
+            # A tentativa de teste em andamento ainda pode fechar ou reabrir o circuito
+            return max(0.0, health.probe_started + self.probe_timeout - self.clock())
+        return max(0.0, health.opened_at + health.cooldown - self.clock())
+
+    def allow(self, url):
+        """
+        Diz se uma tentativa de conexão na região é permitida.
+
+        Uma região aberta com resfriamento vencido passa a meio-aberta e recebe
+        uma tentativa; as demais tentativas esperam o resultado dela (ou
+        ``probe_timeout``, se ele não chegar).
+        """
+        health = self.regions.get(url)
+        if health is None or health.state == CLOSED:
+            return True
+        if self.retry_in(url) == 0:
+            health.state = HALF_OPEN
+            health.probe_started = self.clock()
+            return True
+        return False
+
+    def due_probes(self):
+        """Regiões abertas cujo resfriamento terminou (para testes em segundo plano)."""
+        return [url for url, health in self.regions.items() if health.state == OPEN and self.retry_in(url) == 0]
+
+    def rank(self, urls: Iterable[str]) -> List[str]:
+        """
+        Ordena as URLs para conexão: regiões com RTT medido primeiro, da menor
+        para a maior latência; as demais mantêm a ordem recebida. Regiões com
+        circuito aberto vão para o fim, pela ordem em que podem ser testadas.
+        """
+        urls = list(urls)
+        blocked = sorted((url for url in urls if self.retry_in(url) > 0), key=self.retry_in)
+        available = [url for url in urls if url not in blocked]
+        measured = sorted((url for url in available if url in self.regions and self.regions[url].rtt is not None),
+                          key=lambda url: self.regions[url].rtt)
+        return measured + [url for url in available if url not in measured] + blocked
+
+    def stats(self):
+        """Resumo por nome de região."""
+        return {REGION.get_region_name(url): health.summary() for url, health in self.regions.items()}
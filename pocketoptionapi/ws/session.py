@@ -0,0 +1,112 @@
+"""
+Autor: AdminhuDev
+Estado da sessão websocket para retomada após reconexão.
+
+Guarda as assinaturas ativas e as requisições idempotentes ainda sem
+resposta. Depois de uma queda, o cliente reenvia esses frames no novo socket,
+logo após a autenticação e antes de liberar o código do usuário. Ordens não
+são reenviadas: ordens abertas são conciliadas pelo updateOpenedDeals e pelo
+updateClosedDeals que o servidor envia a cada nova sessão.
+"""
+import asyncio
+from collections import OrderedDict, deque
+
+# Eventos que criam assinaturas mantidas pelo servidor durante a sessão
+SUBSCRIPTION_EVENTS = ("changeSymbol",)
+# Requisições que podem ser repetidas sem efeito colateral
+IDEMPOTENT_REQUESTS = ("loadHistoryPeriod",)
+# Campos do pedido repetidos na resposta, usados para achar o pedido respondido
+CORRELATION_FIELDS = {"loadHistoryPeriod": ("asset", "index", "period")}
+# Tempo máximo (segundos) que um envio aguarda a retomada da sessão
+RESUME_TIMEOUT = 10
+
+
+class SessionState(object):
+    """Assinaturas e requisições em andamento da sessão websocket."""
+
+    def __init__(self, max_pending=64):
+        # (evento, ativo, período) -> frame
+        self.subscriptions = OrderedDict()
+        # (evento, payload, frame) das requisições idempotentes aguardando resposta, na ordem de envio
+        self.pending_requests = deque(maxlen=max_pending)
+        self.established = False
+        self.resumptions = 0
+        self.ready = asyncio.Event()
+
+    @property
+    def resuming(self):
+        """True entre a queda de uma sessão autenticada e a retomada no novo socket."""
+        return self.established and not self.ready.is_set()
+
+    def track(self, msg, frame):
+        """
+        Registra um frame enviado pelo usuário.
+
+        :param msg: Mensagem [evento, payload] antes da serialização.
+        :param frame: Frame serializado (42[...]).
+        """
+        if not isinstance(msg, (list, tuple)) or not msg:
+            return
+        name = msg[0]
+        if name in SUBSCRIPTION_EVENTS:
+            payload = msg[1] if len(msg) > 1 and isinstance(msg[1], dict) else {}
+            key = (name, payload.get("asset"), payload.get("period"))
+            self.subscriptions[key] = frame
+            self.subscriptions.move_to_end(key)
+        elif name in IDEMPOTENT_REQUESTS:
+            payload = msg[1] if len(msg) > 1 and isinstance(msg[1], dict) else {}
+            self.pending_requests.append((name, payload, frame))
+
+    def request_answered(self, name, response=None):
+        """
+        A resposta de uma requisição do evento ``name`` chegou.
+
+        :param response: (opcional) Payload da resposta; os campos de
+            correlação presentes nele escolhem o pedido respondido. Sem eles
+            vale o pedido mais antigo do evento.
+        """
+        response = response if isinstance(response, dict) else {}
+        fields = [field for field in CORRELATION_FIELDS.get(name, ()) if field in response]
+        for index, (pending, payload, _) in enumerate(self.pending_requests):
+            if pending == name and all(payload.get(field) == response[field] for field in fields):
+                del self.pending_requests[index]
+                return
+
+    def forget_subscription(self, name, asset, period):
+        """Remove uma assinatura para que não seja reenviada."""
+        self.subscriptions.pop((name, asset, period), None)
+
+    def replay_frames(self):
+        """Frames a reenviar no novo socket: assinaturas e depois requisições pendentes."""
+        return list(self.subscriptions.values()) + [frame for _, _, frame in self.pending_requests]
+
+    def on_disconnect(self):
+        """O socket caiu: novos envios aguardam a retomada."""
+        self.ready.clear()
+
+    def on_ready(self):
+        """A sessão foi autenticada (e retomada, se necessário)."""
+        if self.established:
+            self.resumptions += 1
+        self.established = True
+        self.ready.set()
+
+    def close(self):
+        """Encerramento pelo usuário: a sessão não será retomada."""
+        self.established = False
+        self.subscriptions.clear()
+        self.pending_requests.clear()
+        # Acorda quem aguardava a retomada: wait_ready devolve False até a próxima conexão
+        self.ready.set()
+
+    async def wait_ready(self, timeout=RESUME_TIMEOUT):
+        """
+        Aguarda a sessão ficar pronta.
+
+        :returns: True se a sessão está pronta, False se o tempo acabou ou a sessão foi encerrada.
+        """
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return self.established
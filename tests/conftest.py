@@ -78,6 +78,17 @@ def cleanup_global_state():
     global_value.balance_updated = original_values['balance_updated']
 
 
+@pytest.fixture(autouse=True)
+def ensure_event_loop():
+    """Garantir um event loop corrente (testes assíncronos isolados o removem ao terminar)"""
+    policy = asyncio.get_event_loop_policy()
+    try:
+        policy.get_event_loop()
+    except RuntimeError:
+        policy.set_event_loop(policy.new_event_loop())
+    yield
+
+
 def pytest_configure(config):
     """Configuração global do pytest"""
     config.addinivalue_line(
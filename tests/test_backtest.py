@@ -0,0 +1,219 @@
+"""
+Testes unitários para o backtest em tempo virtual
+Autor: AdminhuDev
+"""
+
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timezone
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.backtest import Backtest, History, VirtualTimeLoop
+
+START = 1700000000
+
+
+def linear_history(count=600, step=60, slope=1e-5, asset="EURUSD_otc"):
+    """Histórico de preços subindo ``slope`` a cada ``step`` segundos"""
+    return History.from_ticks(asset, [(START + index * step, 1.1 + index * slope) for index in range(count)])
+
+
+class TestVirtualTimeLoop(unittest.TestCase):
+    """
+    Testes para o event loop com relógio virtual
+    """
+
+    def test_sleep_advances_virtual_clock(self):
+        """asyncio.sleep avança o relógio virtual sem esperar"""
+        loop = VirtualTimeLoop(START)
+
+        async def main():
+            await asyncio.sleep(3600)
+            await asyncio.wait_for(asyncio.sleep(86400), 90000)
+            return loop.time()
+
+        try:
+            self.assertEqual(loop.run_until_complete(main()), START + 3600 + 86400)
+        finally:
+            loop.close()
+
+    def test_timeout_in_virtual_time(self):
+        """Timeouts também correm no relógio virtual"""
+        loop = VirtualTimeLoop(START)
+
+        async def main():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(asyncio.sleep(120), 60)
+            return loop.time()
+
+        try:
+            self.assertEqual(loop.run_until_complete(main()), START + 60)
+        finally:
+            loop.close()
+
+
+class TestHistory(unittest.TestCase):
+    """
+    Testes para o histórico de preços
+    """
+
+    def test_price_at(self):
+        """O preço em um instante é o último tick até ele"""
+        history = History.from_ticks("EURUSD_otc", [(START, 1.0), (START + 60, 2.0)])
+        self.assertIsNone(history.price_at("EURUSD_otc", START - 1))
+        self.assertEqual(history.price_at("EURUSD_otc", START + 59), 1.0)
+        self.assertEqual(history.price_at("EURUSD_otc", START + 60), 2.0)
+        self.assertIsNone(history.price_at("GBPUSD_otc", START))
+
+    def test_from_candles(self):
+        """Velas OHLC viram pontos nas fronteiras (fechamento no fim de cada vela)"""
+        candles = [
+            {"time": datetime.fromtimestamp(START + 60, tz=timezone.utc), "open": 1.2, "high": 1.3, "low": 1.1,
+             "close": 1.25},
+            {"time": datetime.fromtimestamp(START, tz=timezone.utc), "open": 1.0, "high": 1.2, "low": 0.9,
+             "close": 1.2},
+        ]
+        history = History.from_candles("EURUSD_otc", candles, 60)
+        self.assertEqual(list(history.series["EURUSD_otc"][0]), [START, START + 60, START + 120])
+        self.assertEqual(history.price_at("EURUSD_otc", START + 130), 1.25)
+
+    def test_save_and_load(self):
+        """O histórico gravado é carregado igual"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, "history.json.gz")
+            linear_history(10).save(path)
+            loaded = History.load(path)
+            self.assertEqual(loaded.assets, ["EURUSD_otc"])
+            self.assertEqual(loaded.series["EURUSD_otc"], linear_history(10).series["EURUSD_otc"])
+        finally:
+            shutil.rmtree(tmpdir)
+
+
+class TestBacktest(unittest.TestCase):
+    """
+    Testes para o Backtest e a BacktestPocketOption
+    """
+
+    def test_orders_settle_at_historical_price(self):
+        """CALL ganha e PUT perde em um mercado subindo, com o payout configurado"""
+        results = []
+
+        async def strategy(api):
+            self.assertTrue(await api.connect())
+            self.assertEqual(await api.GetPayout("EURUSD_otc"), 80)
+            _, call_id = await api.buy(10, "EURUSD_otc", "call", 60)
+            _, put_id = await api.buy(10, "EURUSD_otc", "put", 120)
+            results.append(await api.check_win(call_id))
+            results.append(await api.check_win(put_id))
+            results.append(api.get_server_timestamp())
+
+        report = Backtest(linear_history(), strategy, payout=80, balance=100).run()
+        self.assertEqual(results, [(8.0, "ganhou"), (-10, "perdeu"), START + 120])
+        self.assertEqual((report["trades"], report["wins"], report["losses"]), (2, 1, 1))
+        self.assertEqual(report["balance"], 98.0)
+        self.assertEqual(report["max_drawdown"], 10.0)
+
+    def test_clock_stops_at_expiries(self):
+        """Sem timers antes do vencimento o relógio para nele e as ordens vencidas fecham em lote"""
+        closed = []
+
+        async def strategy(api):
+            api.order_book.add_close_listener(lambda order: closed.append((order.id, api.get_server_timestamp())))
+            _, first = await api.buy(10, "EURUSD_otc", "call", 60)
+            _, second = await api.buy(10, "EURUSD_otc", "put", 60)
+            _, third = await api.buy(10, "EURUSD_otc", "call", 90)
+            await api.check_win(third, 3600)
+            closed.append(("fim", api.get_server_timestamp()))
+
+        Backtest(linear_history(), strategy).run()
+        self.assertEqual(closed, [(1, START + 60), (2, START + 60), (3, START + 90), ("fim", START + 90)])
+
+    def test_flat_price_is_a_draw(self):
+        """Preço igual no vencimento devolve o valor da ordem"""
+        history = History.from_ticks("EURUSD_otc", [(START + index * 60, 1.1) for index in range(10)])
+
+        async def strategy(api):
+            _, order_id = await api.buy(10, "EURUSD_otc", "call", 60)
+            await api.check_win(order_id)
+
+        report = Backtest(history, strategy, balance=100).run()
+        self.assertEqual((report["draws"], report["balance"]), (1, 100.0))
+
+    def test_rejected_orders(self):
+        """Saldo insuficiente, ativo sem histórico e limites de risco rejeitam a ordem"""
+        results = []
+
+        async def strategy(api):
+            results.append(await api.buy(500, "EURUSD_otc", "call", 60))
+            results.append(await api.buy(10, "GBPUSD_otc", "call", 60))
+            results.append(await api.buy(10, "EURUSD_otc", "call", 1))
+            results.append(await api.get_balance())
+
+        Backtest(linear_history(), strategy, balance=100).run()
+        self.assertEqual(results, [(False, None)] * 3 + [100.0])
+
+    def test_get_candles_has_no_lookahead(self):
+        """get_candles só devolve dados até o instante atual da simulação"""
+        seen = []
+
+        async def strategy(api):
+            await asyncio.sleep(3600)
+            seen.append((api.get_server_timestamp(), await api.get_candles("EURUSD_otc", 300, count=100)))
+
+        Backtest(linear_history(), strategy).run()
+        now, candles = seen[0]
+        boundary = now // 300 * 300
+        self.assertLessEqual(candles[-1]["time"].timestamp(), boundary)
+        self.assertEqual(candles[-1]["close"], linear_history().price_at("EURUSD_otc", boundary))
+        self.assertTrue(all(candle["time"].timestamp() >= boundary - 3000 - 300 for candle in candles))
+
+    def test_endless_strategy_stops_at_end_of_history(self):
+        """Uma estratégia em loop infinito para no fim do histórico"""
+
+        async def strategy(api):
+            while True:
+                await api.buy(1, "EURUSD_otc", "call", 60)
+                await asyncio.sleep(60)
+
+        report = Backtest(linear_history(count=1441), strategy, end=START + 86400).run()
+        self.assertEqual(report["virtual_seconds"], 86400)
+        self.assertEqual(report["trades"], 1440)
+        self.assertEqual(report["open"], 0)
+        self.assertEqual(report["win_rate"], 1.0)
+
+    def test_check_win_loop_stops_at_end_of_history(self):
+        """Uma ordem por vela aguardando o check_win também para no fim, com a última ordem liquidada"""
+
+        async def strategy(api):
+            while True:
+                _, order_id = await api.buy(1, "EURUSD_otc", "call", 60)
+                await api.check_win(order_id)
+
+        report = Backtest(linear_history(count=61), strategy, end=START + 3600).run()
+        self.assertEqual(report["virtual_seconds"], 3600)
+        self.assertEqual((report["trades"], report["open"]), (60, 0))
+
+    def test_check_win_timeout_before_expiry(self):
+        """Vencimento depois do prazo do check_win é timeout, sem esperar o vencimento"""
+        results = []
+
+        async def strategy(api):
+            _, order_id = await api.buy(10, "EURUSD_otc", "call", 300)
+            results.append((await api.check_win(order_id, timeout=60), api.get_server_timestamp()))
+            results.append((await api.check_win("desconhecida", timeout=30), api.get_server_timestamp()))
+            results.append((await api.check_win(order_id, timeout=3600), api.get_server_timestamp()))
+
+        Backtest(linear_history(), strategy).run()
+        self.assertEqual(results, [((None, "timeout"), START + 60), ((None, "timeout"), START + 90),
+                                   ((9.2, "ganhou"), START + 300)])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,66 @@
+"""
+Testes unitários para a construção de velas em tempo real
+Autor: AdminhuDev
+"""
+
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.ws.objects.candle_builder import CandleBuilder
+
+
+class TestCandleBuilder(unittest.TestCase):
+    """
+    Testes para a classe CandleBuilder
+    """
+
+    def setUp(self):
+        self.builder = CandleBuilder()
+        self.builder.subscribe("EURUSD_otc", 60)
+        self.builder.subscribe("EURUSD_otc", 5)
+
+    def test_builds_ohlc_per_period(self):
+        """Os ticks formam velas OHLC de cada período assinado"""
+        self.builder.on_ticks([["EURUSD_otc", 120.1, 1.10], ["EURUSD_otc", 121.0, 1.12]])
+        self.builder.on_tick("EURUSD_otc", 126.5, 1.09)
+        self.assertEqual(self.builder.bars[("EURUSD_otc", 60)],
+                         {"time": 120, "open": 1.10, "high": 1.12, "low": 1.09, "close": 1.09})
+        self.assertEqual(self.builder.bars[("EURUSD_otc", 5)]["time"], 125)
+        self.assertEqual(self.builder.closed[("EURUSD_otc", 5)]["close"], 1.12)
+
+    def test_close_returns_finished_bar(self):
+        """close entrega a vela que termina no limite informado"""
+        self.builder.on_tick("EURUSD_otc", 130, 1.10)
+        self.builder.on_tick("EURUSD_otc", 170, 1.11)
+        bar = self.builder.close("EURUSD_otc", 60, 180)
+        self.assertEqual(bar, {"time": 120, "open": 1.10, "high": 1.11, "low": 1.10, "close": 1.11})
+        self.assertNotIn(("EURUSD_otc", 60), self.builder.bars)
+
+    def test_close_after_next_bar_started(self):
+        """Um tick do período seguinte antes do disparo não perde a vela fechada"""
+        self.builder.on_tick("EURUSD_otc", 170, 1.11)
+        self.builder.on_tick("EURUSD_otc", 180.2, 1.20)
+        self.assertEqual(self.builder.close("EURUSD_otc", 60, 180)["close"], 1.11)
+        self.assertEqual(self.builder.bars[("EURUSD_otc", 60)]["open"], 1.20)
+
+    def test_close_without_ticks(self):
+        """Sem ticks no período a vela é plana no último preço; sem histórico é None"""
+        self.assertIsNone(self.builder.close("EURUSD_otc", 60, 180))
+        self.builder.on_tick("EURUSD_otc", 100, 1.05)
+        self.assertEqual(self.builder.close("EURUSD_otc", 60, 120)["close"], 1.05)
+        bar = self.builder.close("EURUSD_otc", 60, 240)
+        self.assertEqual(bar, {"time": 180, "open": 1.05, "high": 1.05, "low": 1.05, "close": 1.05})
+
+    def test_unsubscribed_asset_is_ignored(self):
+        """Ativos sem assinatura só atualizam o último tick"""
+        self.builder.on_tick("GBPUSD_otc", 100, 1.30)
+        self.assertEqual(self.builder.bars, {})
+        self.assertEqual(self.builder.last_tick["GBPUSD_otc"], (100, 1.30))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
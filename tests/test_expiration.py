@@ -0,0 +1,87 @@
+"""
+Testes unitários para o cálculo de expirações
+Autor: AdminhuDev
+"""
+
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.expiration import ExpirationGrid, get_expiration_time
+
+# 2024-01-01 12:07:10 UTC
+NOW = 1704110830
+
+
+class TestExpirationGrid(unittest.TestCase):
+    """
+    Testes para a classe ExpirationGrid
+    """
+
+    def setUp(self):
+        self.clock_value = NOW
+        self.grid = ExpirationGrid(clock=lambda: self.clock_value)
+
+    def test_fixed_before_cutoff(self):
+        """Antes do segundo 30 a primeira expiração é o próximo minuto"""
+        self.assertEqual(self.grid.next_expiries(3), [NOW + 50, NOW + 110, NOW + 170])
+
+    def test_fixed_after_cutoff(self):
+        """Depois do segundo 30 a primeira expiração pula um minuto"""
+        self.clock_value = NOW + 25
+        self.assertEqual(self.grid.next_expiries(1), [NOW + 110])
+
+    def test_quarter_marks(self):
+        """Marcas de 15 minutos exigem mais de 5 minutos de antecedência"""
+        # 12:07 -> 12:15 tem mais de 5 minutos de antecedência
+        self.assertEqual(self.grid.expiration_for(15), NOW + 470)
+        self.assertEqual(self.grid.expiration_for(30), NOW + 470 + 900)
+        # 12:10 -> 12:15 não tem
+        self.clock_value = NOW + 180
+        self.assertEqual(self.grid.expiration_for(15), NOW + 470 + 900)
+
+    def test_seconds_to_expiry(self):
+        """Segundos até a expiração usam o relógio do servidor"""
+        self.clock_value = NOW + 0.5
+        self.assertAlmostEqual(self.grid.seconds_to_expiry(1), 49.5)
+
+    def test_vectorized(self):
+        """Forma vetorizada equivale a chamadas individuais"""
+        durations = [1, 2, 5, 15, 45, 7]
+        self.assertEqual(self.grid.expirations_for(durations),
+                         [self.grid.expiration_for(duration) for duration in durations])
+
+    def test_grid_refreshed_once_per_minute(self):
+        """A grade só é recalculada quando o minuto muda"""
+        self.grid.next_expiries()
+        fixed = self.grid._fixed
+        self.clock_value = NOW + 20
+        self.grid.next_expiries()
+        self.assertIs(self.grid._fixed, fixed)
+        self.clock_value = NOW + 60
+        self.grid.next_expiries()
+        self.assertIsNot(self.grid._fixed, fixed)
+
+    def test_expirations_listing(self):
+        """Lista com 5 expirações de minuto e 11 de 15 minutos"""
+        expirations = self.grid.expirations()
+        self.assertEqual([duration for duration, _ in expirations],
+                         [1, 2, 3, 4, 5] + [15 * index for index in range(1, 12)])
+
+
+class TestLegacyExpiration(unittest.TestCase):
+    """
+    Testes da função legada get_expiration_time
+    """
+
+    def test_legacy_offset(self):
+        """Mantém o segundo :30 e o deslocamento de duas horas"""
+        self.assertEqual(get_expiration_time(NOW, 1), NOW + 20 + 7200)
+        self.assertEqual(get_expiration_time(NOW + 25, 3), NOW + 80 + 120 + 7200)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
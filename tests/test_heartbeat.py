@@ -0,0 +1,249 @@
+"""
+Testes unitários para o heartbeat e a saúde das regiões
+Autor: AdminhuDev
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.ws.heartbeat import Heartbeat
+from pocketoptionapi.ws.region_health import CLOSED, HALF_OPEN, OPEN, RegionMonitor
+
+SSID = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+
+
+class FakeTransport(object):
+    def __init__(self):
+        self.aborted = False
+
+    def abort(self):
+        self.aborted = True
+
+
+class FakeSocket(object):
+    """Socket com pong opcional após ``delay`` segundos"""
+
+    def __init__(self, delay=0.0, answer=True):
+        self.delay = delay
+        self.answer = answer
+        self.sent = []
+        self.transport = FakeTransport()
+
+    async def send(self, data):
+        self.sent.append(data)
+
+    async def ping(self):
+        pong = asyncio.get_running_loop().create_future()
+        if self.answer:
+            asyncio.get_running_loop().call_later(self.delay, pong.set_result, self.delay)
+        return pong
+
+
+class TestHeartbeat(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para a classe Heartbeat
+    """
+
+    async def asyncTearDown(self):
+        global_value.websocket_is_connected = False
+
+    def test_reads_handshake(self):
+        """pingInterval e pingTimeout vêm do pacote de abertura"""
+        heartbeat = Heartbeat()
+        heartbeat.on_open_packet('0{"sid":"abc","upgrades":[],"pingInterval":25000,"pingTimeout":20000}')
+        self.assertEqual(heartbeat.ping_interval, 25.0)
+        self.assertEqual(heartbeat.ping_timeout, 20.0)
+        self.assertEqual(heartbeat.probe_interval, 12.5)
+
+        heartbeat.on_open_packet('0invalid')
+        self.assertEqual(heartbeat.ping_interval, 25.0)
+
+    async def test_probe_measures_rtt(self):
+        """O RTT do ping/pong é medido e repassado"""
+        samples = []
+        heartbeat = Heartbeat(on_rtt=samples.append)
+        rtt = await heartbeat.probe(FakeSocket(delay=0.02))
+        self.assertGreaterEqual(rtt, 0.02)
+        self.assertEqual(samples, [rtt])
+
+    async def test_half_open_connection_is_aborted(self):
+        """Sem pong a conexão é abortada em no máximo um intervalo"""
+        heartbeat = Heartbeat()
+        heartbeat.ping_interval = 0.1
+        heartbeat.ping_timeout = 1
+        socket = FakeSocket(answer=False)
+        global_value.websocket_is_connected = True
+
+        started = asyncio.get_running_loop().time()
+        await asyncio.wait_for(heartbeat.run(socket), 1)
+        self.assertLessEqual(asyncio.get_running_loop().time() - started, 0.15)
+        self.assertTrue(socket.transport.aborted)
+        self.assertFalse(global_value.websocket_is_connected)
+        self.assertEqual(socket.sent, ['42["ps"]'])
+
+    async def test_stop_wakes_the_loop(self):
+        """stop() encerra o loop na hora, sem esperar o intervalo"""
+        heartbeat = Heartbeat()
+        heartbeat.ping_interval = 60
+        socket = FakeSocket()
+        global_value.websocket_is_connected = True
+
+        task = asyncio.create_task(heartbeat.run(socket))
+        await asyncio.sleep(0.01)
+        global_value.websocket_is_connected = False
+        heartbeat.stop()
+        await asyncio.wait_for(task, 0.5)
+        self.assertEqual(socket.sent, [])
+
+    def test_open_packet_resets_connection_state(self):
+        """Uma conexão nova não herda o keepalive nem o RTT da anterior"""
+        heartbeat = Heartbeat()
+        heartbeat.last_app_ping = 123.0
+        heartbeat.rtt = 0.05
+        heartbeat.on_open_packet('0{"sid":"abc","pingInterval":25000,"pingTimeout":20000}')
+        self.assertIsNone(heartbeat.last_app_ping)
+        self.assertIsNone(heartbeat.rtt)
+
+    async def test_silent_server_is_stale(self):
+        """Pong sem nenhum frame do servidor por intervalo + timeout também é queda"""
+        clock = [0.0]
+        heartbeat = Heartbeat(clock=lambda: clock[0])
+        heartbeat.ping_interval = 10
+        heartbeat.ping_timeout = 5
+        heartbeat.on_message()
+        clock[0] = 14
+        self.assertFalse(heartbeat.is_stale())
+        clock[0] = 16
+        self.assertTrue(heartbeat.is_stale())
+
+
+class TestRegionMonitor(unittest.TestCase):
+    """
+    Testes para a classe RegionMonitor
+    """
+
+    def test_rank_by_rtt(self):
+        """Regiões medidas vêm primeiro, da menor para a maior latência"""
+        monitor = RegionMonitor()
+        monitor.record_rtt("wss://b", 0.2)
+        monitor.record_rtt("wss://c", 0.05)
+        self.assertEqual(monitor.rank(["wss://a", "wss://b", "wss://c", "wss://d"]),
+                         ["wss://c", "wss://b", "wss://a", "wss://d"])
+
+    def test_rtt_is_smoothed(self):
+        """O RTT da região é uma média móvel das amostras"""
+        monitor = RegionMonitor()
+        monitor.record_rtt("wss://a", 0.1)
+        monitor.record_rtt("wss://a", 0.2)
+        stats = monitor.stats()["wss://a"]
+        self.assertAlmostEqual(stats["rtt"], 120.0)
+        self.assertEqual(stats["rtt_samples"], 2)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    Testes do circuit breaker por região
+    """
+
+    def setUp(self):
+        self.clock = [0.0]
+        self.monitor = RegionMonitor(failure_threshold=2, base_cooldown=30, max_cooldown=100,
+                                     clock=lambda: self.clock[0])
+
+    def test_opens_after_consecutive_failures(self):
+        """Falhas seguidas abrem o circuito e a região é pulada"""
+        self.monitor.record_failure("wss://a", OSError("recusado"))
+        self.assertTrue(self.monitor.allow("wss://a"))
+        self.monitor.record_failure("wss://a", OSError("recusado"))
+        self.assertEqual(self.monitor.get("wss://a").state, OPEN)
+        self.assertFalse(self.monitor.allow("wss://a"))
+        self.assertEqual(self.monitor.retry_in("wss://a"), 30)
+        self.assertEqual(self.monitor.rank(["wss://a", "wss://b"]), ["wss://b", "wss://a"])
+
+        stats = self.monitor.stats()["wss://a"]
+        self.assertEqual(stats["success_rate"], 0.0)
+        self.assertEqual(stats["recent_errors"], ["recusado", "recusado"])
+
+    def test_half_open_single_attempt(self):
+        """Após o resfriamento há uma única tentativa; falha dobra o resfriamento"""
+        for _ in range(2):
+            self.monitor.record_failure("wss://a")
+        self.clock[0] = 30
+        self.assertEqual(self.monitor.due_probes(), ["wss://a"])
+        self.assertTrue(self.monitor.allow("wss://a"))
+        self.assertEqual(self.monitor.get("wss://a").state, HALF_OPEN)
+        self.assertFalse(self.monitor.allow("wss://a"))
+
+        self.monitor.record_failure("wss://a")
+        self.assertEqual(self.monitor.retry_in("wss://a"), 60)
+        self.clock[0] = 90
+        self.assertTrue(self.monitor.allow("wss://a"))
+        self.monitor.record_success("wss://a", handshake_latency=0.25)
+        health = self.monitor.get("wss://a")
+        self.assertEqual(health.state, CLOSED)
+        self.assertEqual(health.consecutive_failures, 0)
+        self.assertEqual(self.monitor.stats()["wss://a"]["handshake_latency"], 250.0)
+
+    def test_half_open_waits_for_probe(self):
+        """Durante o teste meio-aberto retry_in espera o resultado; sem ele, nova tentativa"""
+        for _ in range(2):
+            self.monitor.record_failure("wss://a")
+        self.clock[0] = 30
+        self.assertTrue(self.monitor.allow("wss://a"))
+        self.assertEqual(self.monitor.retry_in("wss://a"), 30)
+        self.assertEqual(self.monitor.rank(["wss://a", "wss://b"]), ["wss://b", "wss://a"])
+
+        self.clock[0] = 60
+        self.assertEqual(self.monitor.retry_in("wss://a"), 0)
+        self.assertTrue(self.monitor.allow("wss://a"))
+        self.assertFalse(self.monitor.allow("wss://a"))
+
+    def test_cooldown_is_capped(self):
+        """O resfriamento não passa de max_cooldown"""
+        for trip in range(5):
+            self.clock[0] += 1000
+            self.monitor.allow("wss://a")
+            for _ in range(2):
+                self.monitor.record_failure("wss://a")
+        self.assertEqual(self.monitor.get("wss://a").cooldown, 100)
+
+
+
+class TestRegionProbe(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes do teste de regiões em segundo plano
+    """
+
+    async def test_cancelled_probe_reopens_region(self):
+        """Um teste cancelado no meio do handshake não deixa a região meio-aberta"""
+        # Servidor que aceita a conexão TCP e nunca responde ao handshake
+        server = await asyncio.start_server(lambda reader, writer: None, "127.0.0.1", 0)
+        url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        client = PocketOption(SSID, True).api.websocket
+        health = client.api.region_health
+        health.base_cooldown = 0
+        for _ in range(health.failure_threshold):
+            health.record_failure(url)
+
+        task = asyncio.create_task(client.probe_regions(None, interval=0.01))
+        try:
+            await asyncio.sleep(0.1)
+            self.assertEqual(health.get(url).state, HALF_OPEN)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            server.close()
+        self.assertEqual(health.get(url).state, OPEN)
+        self.assertEqual(health.stats()[REGION.get_region_name(url)]["recent_errors"][-1], "teste cancelado")
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
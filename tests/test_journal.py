@@ -0,0 +1,124 @@
+"""
+Testes unitários para o diário de ordens
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.journal import OrderJournal
+from pocketoptionapi.stable_api import PocketOption
+
+
+class TestOrderJournal(unittest.TestCase):
+    """
+    Testes para a classe OrderJournal
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "orders.journal")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_replay_open_orders(self):
+        """Ordens confirmadas sem resultado continuam abertas após o replay"""
+        journal = OrderJournal.open(self.path)
+        journal.intent(1, 10, "EURUSD_otc", "call", 60)
+        journal.confirm(1, {"id": "a", "asset": "EURUSD_otc", "closeTimestamp": 100})
+        journal.intent(2, 10, "EURUSD_otc", "put", 60)
+        journal.confirm(2, {"id": "b", "asset": "EURUSD_otc", "closeTimestamp": 100})
+        journal.result("a", 9.2)
+        journal.close()
+
+        state = OrderJournal.replay(self.path)
+        self.assertEqual(list(state.open_orders), ["b"])
+        self.assertEqual(state.pending_intents, {})
+
+    def test_replay_ignores_truncated_line(self):
+        """Linha truncada por queda do processo é ignorada"""
+        journal = OrderJournal.open(self.path)
+        journal.intent(1, 10, "EURUSD_otc", "call", 60)
+        journal.confirm(1, {"id": "a"})
+        journal.close()
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write('{"type":"result","id":"a","pro')
+
+        state = OrderJournal.replay(self.path)
+        self.assertIn("a", state.open_orders)
+
+    def test_open_compacts_resolved_records(self):
+        """Ao abrir, o arquivo mantém apenas o estado não resolvido"""
+        journal = OrderJournal.open(self.path)
+        for request_id in range(10):
+            journal.intent(request_id, 1, "EURUSD_otc", "call", 60)
+            journal.confirm(request_id, {"id": request_id})
+            journal.result(request_id, 1)
+        journal.intent(99, 1, "EURUSD_otc", "call", 60)
+        journal.close()
+
+        OrderJournal.open(self.path).close()
+        with open(self.path, encoding="utf-8") as fh:
+            records = [json.loads(line) for line in fh]
+        self.assertEqual([record["requestId"] for record in records], [99])
+
+    def test_batched_fsync(self):
+        """fsync é feito a cada sync_every registros"""
+        journal = OrderJournal.open(self.path, sync_every=3, sync_interval=3600)
+        journal.intent(1, 1, "EURUSD_otc", "call", 60)
+        journal.intent(2, 1, "EURUSD_otc", "call", 60)
+        self.assertEqual(journal._unsynced, 2)
+        journal.intent(3, 1, "EURUSD_otc", "call", 60)
+        self.assertEqual(journal._unsynced, 0)
+        journal.close()
+
+
+class TestJournalRecovery(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes de retomada de ordens abertas a partir do diário
+    """
+
+    async def test_reattach_open_order(self):
+        """Ordem aberta no diário é fechada pelo próximo updateClosedDeals"""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "orders.journal")
+            journal = OrderJournal.open(path)
+            journal.intent(1, 10, "EURUSD_otc", "call", 60)
+            journal.confirm(1, {"id": "a", "asset": "EURUSD_otc"})
+            journal.close()
+
+            ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+            api = PocketOption(ssid, True, journal_path=path)
+            self.assertIn("a", api.api.order_book.orders)
+
+            client = api.api.websocket
+            client.websocket = _SinkWebsocket()
+            waiter = asyncio.ensure_future(api.check_win("a", timeout=1))
+            await client.on_message('451-["updateClosedDeals",{"_placeholder":true,"num":0}]')
+            await client.on_message(json.dumps([{"id": "a", "profit": 9, "closePrice": 1.0}]).encode())
+            self.assertEqual(await waiter, (9, "ganhou"))
+            api.journal.close()
+
+            self.assertEqual(OrderJournal.replay(path).open_orders, {})
+
+
+class _SinkWebsocket(object):
+    """Websocket falso que apenas guarda as mensagens enviadas"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
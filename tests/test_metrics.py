@@ -0,0 +1,92 @@
+"""
+Testes unitários para as métricas de latência
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import random
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.metrics import LatencyHistogram, LatencyRecorder
+from pocketoptionapi.stable_api import PocketOption
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    """
+    Testes para a classe LatencyHistogram
+    """
+
+    def test_percentiles_within_precision(self):
+        """Percentis ficam dentro da precisão das faixas (~3%)"""
+        rng = random.Random(7)
+        samples = [rng.randint(50_000, 50_000_000) for _ in range(20000)]
+        histogram = LatencyHistogram()
+        for sample in samples:
+            histogram.record(sample)
+
+        ordered = sorted(samples)
+        for percent in (50, 99, 99.9):
+            exact = ordered[int(len(ordered) * percent / 100.0) - 1]
+            self.assertAlmostEqual(histogram.percentile(percent) / exact, 1.0, delta=0.035)
+
+    def test_small_values_are_exact(self):
+        """Valores pequenos são registrados exatamente"""
+        histogram = LatencyHistogram()
+        for value in (1, 2, 3, 40):
+            histogram.record(value)
+        self.assertEqual(histogram.percentile(50), 2)
+        self.assertEqual(histogram.percentile(100), 40)
+
+    def test_empty_summary(self):
+        """Histograma vazio retorna zeros"""
+        self.assertEqual(LatencyHistogram().summary()["p99"], 0.0)
+
+
+class TestLatencyRecorder(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes de captura das etapas da ordem
+    """
+
+    async def test_order_stages(self):
+        """As etapas da ordem são agregadas por região"""
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        api = PocketOption(ssid, True)
+        client = api.api.websocket
+        client.url = "wss://demo-api-eu.po.market/socket.io/?EIO=4&transport=websocket"
+
+        async def send_frame(data):
+            request_id = json.loads(data[2:])[1]["requestId"]
+
+            async def respond():
+                await client.on_message('451-["successopenOrder",{"_placeholder":true,"num":0}]')
+                await client.on_message(json.dumps({"id": "lat-1", "requestId": request_id}).encode())
+
+            asyncio.ensure_future(respond())
+
+        api.api.send_frame = send_frame
+        success, order_id = await api.buy_prepared(api.prepare_order(1, "EURUSD_otc", "call", 60))
+        self.assertTrue(success)
+        api.api.order_book.on_close([{"id": order_id, "profit": 1, "closePrice": 1.0}])
+
+        stats = api.get_latency_stats()
+        self.assertEqual(set(stats["DEMO"]), {"send", "ack", "payload", "round_trip", "close"})
+        self.assertEqual(stats["DEMO"]["round_trip"]["count"], 1)
+
+    def test_discarded_order_is_forgotten(self):
+        """Ordens sem resposta não ficam acumuladas"""
+        recorder = LatencyRecorder()
+        recorder.order_started(1, "EUROPA")
+        recorder.order_written(1)
+        recorder.order_discarded(1)
+        self.assertEqual(recorder._requests, {})
+        self.assertEqual(recorder.stats()["EUROPA"]["send"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,146 @@
+"""
+Testes do cliente websocket contra o servidor local (sem rede)
+Autor: AdminhuDev
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.testing import MockPocketOptionServer
+
+SSID = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+
+
+async def wait_for(condition, timeout=5):
+    """Aguarda ``condition()`` ficar verdadeira"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condição não atingida a tempo")
+        await asyncio.sleep(0.01)
+
+
+class TestMockServer(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes do caminho de conexão completo contra o MockPocketOptionServer
+    """
+
+    async def asyncSetUp(self):
+        self.server = await MockPocketOptionServer(balance=1000.0, tick_interval=0.02, expiry_scale=0.01,
+                                                   seed=1).start()
+        REGION.override(self.server.url)
+        self.api = PocketOption(SSID, True)
+
+    async def asyncTearDown(self):
+        await self.api.disconnect()
+        await self.server.stop()
+        REGION.override(None)
+        global_value.websocket_is_connected = False
+
+    async def connect(self):
+        self.assertTrue(await self.api.connect())
+        self.assertTrue(await self.api.wait_session_ready(5))
+
+    async def test_handshake_auth_and_balance(self):
+        """Handshake Engine.IO, autenticação e saldo inicial"""
+        await self.connect()
+        self.assertEqual(await self.api.get_balance(), 1000.0)
+        self.assertEqual(self.server.received[0][0], "auth")
+        self.assertEqual(self.server.received[0][1]["uid"], 123456)
+        self.assertEqual(self.api.api.websocket.url, self.server.url)
+
+    async def test_order_lifecycle(self):
+        """openOrder é confirmado pelo requestId e fechado no vencimento"""
+        self.server.outcome = lambda deal: "win"
+        await self.connect()
+        success, order_id = await self.api.buy(10, "EURUSD_otc", "call", 60)
+        self.assertTrue(success)
+        self.assertIn(order_id, self.server.deals)
+
+        profit, status = await self.api.check_win(order_id, timeout=5)
+        self.assertEqual((profit, status), (9.2, "ganhou"))
+        await wait_for(lambda: global_value.balance == 1009.2)
+
+    async def test_rejected_order(self):
+        """Uma ordem recusada pelo servidor retorna falha sem esperar o timeout"""
+        self.server.fail_orders = lambda payload: "Ativo fechado" if payload["asset"] == "AAPL" else None
+        await self.connect()
+        self.assertEqual(await self.api.buy(10, "AAPL", "call", 60), (False, None))
+        self.assertEqual(self.api.risk.open_orders, 0)
+
+    async def test_stream_and_history(self):
+        """changeSymbol inicia o updateStream e loadHistoryPeriod devolve os ticks"""
+        await self.connect()
+        await self.api.api.change_symbol.async_call("EURUSD_otc", 60)
+        await wait_for(lambda: "EURUSD_otc" in self.api.api.candle_builder.last_tick)
+
+        candles = await self.api.get_candles("EURUSD_otc", 60, count=20)
+        self.assertGreater(len(candles), 0)
+        self.assertEqual(self.api.api.session.pending_requests, type(self.api.api.session.pending_requests)())
+
+    async def test_reconnect_resumes_session(self):
+        """Após uma queda o cliente reconecta e reenvia as assinaturas"""
+        await self.connect()
+        await self.api.api.change_symbol.async_call("EURUSD_otc", 60)
+        self.server.drop_connections()
+
+        await wait_for(lambda: self.api.api.session.resumptions == 1, timeout=10)
+        self.assertEqual(self.server.connection_count, 2)
+        # O servidor processa o reenvio de forma assíncrona
+        await wait_for(lambda: [payload["asset"] for event, payload in self.server.received
+                                if event == "changeSymbol"].count("EURUSD_otc") == 2)
+
+    async def test_latency_is_applied(self):
+        """A latência programada atrasa as respostas do servidor"""
+        await self.connect()
+        self.server.latency = lambda event: 0.2 if event == "successopenOrder" else 0
+        started = asyncio.get_running_loop().time()
+        success, _ = await self.api.buy(10, "EURUSD_otc", "put", 60)
+        self.assertTrue(success)
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - started, 0.2)
+
+    async def test_not_authorized(self):
+        """SSID recusado é reportado em global_value"""
+        self.server.reject_auth = True
+        connecting = asyncio.ensure_future(self.api.connect())
+        await wait_for(lambda: global_value.websocket_error_reason is not None)
+        self.assertEqual(global_value.websocket_error_reason, "SSID inválido ou expirado")
+        await self.api.disconnect()
+        connecting.cancel()
+
+    async def test_not_authorized_stops_reconnecting(self):
+        """Com o SSID recusado o cliente não fica reconectando em loop"""
+        self.server.reject_auth = True
+        connecting = asyncio.ensure_future(self.api.connect())
+        await wait_for(lambda: getattr(self.api, "websocket_task", None) is not None and self.api.websocket_task.done())
+        self.assertEqual(global_value.websocket_error_reason, "SSID inválido ou expirado")
+        await asyncio.sleep(0.2)
+        self.assertEqual(self.server.connection_count, 1)
+        self.assertFalse(global_value.websocket_is_connected)
+        connecting.cancel()
+
+    async def test_unstable_sessions_back_off(self):
+        """Sessões que caem logo após autenticar reconectam com espera crescente"""
+        await self.connect()
+        started = asyncio.get_running_loop().time()
+        for count in (2, 3):
+            self.server.drop_connections()
+            await wait_for(lambda: self.server.connection_count == count and self.api.api.session.ready.is_set())
+        self.server.drop_connections()
+        await asyncio.sleep(0.5)
+        # Terceira queda seguida: 1 s de espera antes de reconectar
+        self.assertEqual(self.server.connection_count, 3)
+        await wait_for(lambda: self.server.connection_count == 4)
+        self.assertGreaterEqual(asyncio.get_running_loop().time() - started, 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
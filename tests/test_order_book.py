@@ -0,0 +1,175 @@
+"""
+Testes unitários para o livro de ordens
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import unittest
+import sys
+import os
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.ws.objects.order_book import OrderBook
+import pocketoptionapi.global_value as global_value
+
+
+class TestOrderBook(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para a classe OrderBook
+    """
+
+    async def test_result_after_close(self):
+        """Ordem fechada antes do await entrega o resultado imediatamente"""
+        book = OrderBook()
+        book.on_open({"id": "a", "amount": 10, "closePrice": 0})
+        book.on_close([{"id": "a", "profit": 9.2, "closePrice": 1.1}])
+        self.assertEqual(await book.get("a").result(), (9.2, "ganhou"))
+
+    async def test_result_wakes_waiters(self):
+        """Fechamento acorda todos que aguardam a ordem"""
+        book = OrderBook()
+        waiters = [asyncio.ensure_future(book.order("a").result()) for _ in range(3)]
+        await asyncio.sleep(0)
+        book.on_close([{"id": "a", "profit": -10, "closePrice": 1.1}])
+        self.assertEqual(await asyncio.gather(*waiters), [(-10, "perdeu")] * 3)
+
+    async def test_waiter_timeout_keeps_result(self):
+        """Timeout de um chamador não afeta outros"""
+        book = OrderBook()
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(book.order("a").result(), 0.01)
+        book.on_close([{"id": "a", "profit": 5, "closePrice": 1.1}])
+        self.assertEqual(await book.order("a").result(), (5, "ganhou"))
+
+    def test_close_is_idempotent(self):
+        """O mesmo deal repetido não é fechado duas vezes"""
+        book = OrderBook()
+        self.assertEqual(len(book.on_close([{"id": "a", "profit": 1}])), 1)
+        self.assertEqual(len(book.on_close([{"id": "a", "profit": 1}])), 0)
+
+    async def test_close_without_profit(self):
+        """Deal fechado sem profit (ausente ou null) não quebra listeners nem o resultado"""
+        book = OrderBook()
+        closed = []
+        book.add_close_listener(lambda order: closed.append(order.status))
+        book.on_close([{"id": "a", "profit": None}, {"id": "b"}])
+        self.assertEqual(closed, ["desconhecido", "desconhecido"])
+        self.assertEqual(await book.get("a").result(), (None, "desconhecido"))
+
+    async def test_closed_orders_are_bounded(self):
+        """Só as ``max_closed`` ordens fechadas mais recentes ficam no livro"""
+        global_value.bind()
+        book = OrderBook(max_closed=2)
+        closed = []
+        book.add_close_listener(lambda order: closed.append(order.id))
+        book.on_open({"id": "open", "amount": 1})
+        book.on_close([{"id": order_id, "profit": 1} for order_id in ("a", "b", "c")])
+        self.assertEqual(closed, ["a", "b", "c"])
+        self.assertEqual(sorted(book.orders), ["b", "c", "open"])
+        self.assertIsNone(book.get("a"))
+        self.assertEqual(global_value.order_closed, {"b", "c"})
+        self.assertEqual(global_value.stat, {"b": 1, "c": 1})
+        self.assertEqual(global_value.order_open, {"open"})
+
+    async def test_unknown_order_is_forgotten_after_timeout(self):
+        """A ordem criada só para aguardar o resultado sai do livro no timeout"""
+        book = OrderBook()
+        other = asyncio.ensure_future(book.result("a"))
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(book.result("a"), 0.01)
+        self.assertIsNotNone(book.get("a"))
+
+        other.cancel()
+        await asyncio.gather(other, return_exceptions=True)
+        self.assertIsNone(book.get("a"))
+
+        book.on_open({"id": "b", "amount": 1})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(book.result("b"), 0.01)
+        self.assertIsNotNone(book.get("b"))
+
+
+class TestOrderBookFrames(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes do livro de ordens alimentado pelas mensagens do websocket
+    """
+
+    async def asyncSetUp(self):
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(ssid, True)
+        self.client = self.api.api.websocket
+
+    async def test_check_win_from_close_order(self):
+        """check_win retorna assim que successcloseOrder chega"""
+        waiter = asyncio.ensure_future(self.api.check_win("a", timeout=1))
+        await self.client.on_message('451-["successcloseOrder",{"_placeholder":true,"num":0}]')
+        payload = {"profit": 8.5, "deals": [{"id": "a", "profit": 8.5, "closePrice": 1.2}]}
+        await self.client.on_message(json.dumps(payload).encode())
+        self.assertEqual(await waiter, (8.5, "ganhou"))
+
+    async def test_check_win_from_closed_deals(self):
+        """Deals em updateClosedDeals não sobrescrevem uns aos outros"""
+        waiters = [asyncio.ensure_future(self.api.check_win(order_id, timeout=1)) for order_id in ("a", "b")]
+        self.client.websocket = _SinkWebsocket()
+        await self.client.on_message('451-["updateClosedDeals",{"_placeholder":true,"num":0}]')
+        deals = [{"id": "a", "profit": -1, "closePrice": 1.0}, {"id": "b", "profit": 0.9, "closePrice": 1.0}]
+        await self.client.on_message(json.dumps(deals).encode())
+        self.assertEqual(await asyncio.gather(*waiters), [(-1, "perdeu"), (0.9, "ganhou")])
+
+    async def test_check_order_closed(self):
+        """check_order_closed acorda apenas quem aguarda a ordem fechada"""
+        waiter_a = asyncio.ensure_future(self.api.check_order_closed("closed-a"))
+        waiter_b = asyncio.ensure_future(self.api.check_order_closed("closed-b"))
+        await asyncio.sleep(0)
+        self.api.api.order_book.on_close([{"id": "closed-a", "profit": 3, "closePrice": 1.0}])
+        self.assertEqual(await waiter_a, "closed-a")
+        self.assertFalse(waiter_b.done())
+        self.assertIn("closed-a", global_value.order_closed)
+        self.assertEqual(global_value.stat["closed-a"], 3)
+        waiter_b.cancel()
+
+    async def test_wait_results_as_completed(self):
+        """wait_results entrega cada ordem assim que fecha e o timeout das restantes"""
+        book = self.api.api.order_book
+        listeners = list(book._close_listeners)
+        book.on_close([{"id": "r1", "profit": 1, "closePrice": 1.0}])
+
+        async def close_later():
+            await asyncio.sleep(0.01)
+            book.on_close([{"id": "r3", "profit": -1, "closePrice": 1.0}])
+            await asyncio.sleep(0.01)
+            book.on_close([{"id": "r2", "profit": 2, "closePrice": 1.0}])
+
+        closer = asyncio.ensure_future(close_later())
+        results = [item async for item in self.api.wait_results(["r1", "r2", "r3", "r4"], timeout=0.1)]
+        await closer
+        self.assertEqual(results, [
+            ("r1", 1, "ganhou"),
+            ("r3", -1, "perdeu"),
+            ("r2", 2, "ganhou"),
+            ("r4", None, "timeout"),
+        ])
+        self.assertEqual(book._close_listeners, listeners)
+
+    async def test_check_win_timeout(self):
+        """check_win retorna timeout quando a ordem não fecha"""
+        self.assertEqual(await self.api.check_win("x", timeout=0.01), (None, "timeout"))
+        self.assertEqual(self.api.api.order_book.orders, {})
+
+
+class _SinkWebsocket(object):
+    """Websocket falso que apenas guarda as mensagens enviadas"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
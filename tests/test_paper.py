@@ -0,0 +1,152 @@
+"""
+Testes unitários para o paper trading
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.paper import PaperAccount, current_payout
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.testing import MockPocketOptionServer
+
+SSID = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+NOW = 1700000000.0
+PAYOUTS = json.dumps([[5, "EURUSD_otc", "EUR/USD OTC", "currency", 2, 80],
+                      [6, "GBPUSD_otc", "GBP/USD OTC", "currency", 2, 90]])
+
+
+class TestPaperAccount(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para a PaperAccount com ticks injetados no CandleBuilder
+    """
+
+    async def asyncSetUp(self):
+        global_value.bind()
+        global_value.PayoutData = PAYOUTS
+        self.api = PocketOptionAPI()
+        self.api.time_sync.server_timestamp = NOW
+        self.account = PaperAccount(self.api, balance=100)
+        self.tick("EURUSD_otc", NOW - 0.5, 1.1)
+
+    def tick(self, asset, timestamp, price):
+        self.api.candle_builder.on_tick(asset, timestamp, price)
+
+    def test_current_payout(self):
+        """O payout vem da lista de ativos da sessão"""
+        self.assertEqual(current_payout("GBPUSD_otc"), 90)
+        self.assertIsNone(current_payout("AUDNZD_otc"))
+
+    async def test_settles_at_last_tick_before_expiry(self):
+        """A ordem é liquidada pelo último tick até o vencimento, com o payout da abertura"""
+        success, order_id = await self.account.buy(10, "EURUSD_otc", "call", 60)
+        self.assertTrue(success)
+        self.assertEqual(await self.account.get_balance(), 90)
+        global_value.PayoutData = "{}"
+
+        self.tick("EURUSD_otc", NOW + 59.5, 1.2)
+        self.tick("EURUSD_otc", NOW + 59.9, 1.15)
+        self.assertIsNone(self.account.order_book.get(order_id).status)
+        self.tick("EURUSD_otc", NOW + 60.4, 1.0)
+
+        self.assertEqual(await self.account.check_win(order_id), (8.0, "ganhou"))
+        self.assertEqual(self.account.deals[0]["closePrice"], 1.15)
+        self.assertEqual(await self.account.get_balance(), 108)
+
+    async def test_tick_at_expiry_counts(self):
+        """Um tick exatamente no vencimento define o preço de fechamento"""
+        _, put_id = await self.account.buy(10, "EURUSD_otc", "put", 30)
+        _, call_id = await self.account.buy(10, "EURUSD_otc", "call", 30)
+        self.tick("EURUSD_otc", NOW + 30, 1.1)
+        self.assertEqual(await self.account.check_win(put_id, 1), (0, "perdeu"))
+        self.assertEqual(await self.account.check_win(call_id, 1), (0, "perdeu"))
+        self.assertEqual(self.account.stats()["draws"], 2)
+        self.assertEqual(self.account.balance, 100)
+
+    async def test_orders_settle_in_expiry_order(self):
+        """Ordens de vencimentos diferentes são liquidadas cada uma no seu preço"""
+        _, long_id = await self.account.buy(10, "EURUSD_otc", "call", 120)
+        _, short_id = await self.account.buy(10, "EURUSD_otc", "call", 60)
+        self.tick("EURUSD_otc", NOW + 61, 1.0)
+        self.tick("EURUSD_otc", NOW + 121, 1.3)
+        self.assertEqual(await self.account.check_win(short_id, 1), (0, "perdeu"))
+        self.assertEqual(await self.account.check_win(long_id, 1), (-10, "perdeu"))
+        self.assertEqual([deal["closePrice"] for deal in self.account.deals], [1.1, 1.0])
+
+    async def test_settles_without_ticks_after_grace(self):
+        """Sem ticks após o vencimento a ordem fecha pelo último preço conhecido"""
+        self.account.settle_grace = 0.05
+        _, order_id = await self.account.buy(10, "EURUSD_otc", "call", 0.05)
+        self.tick("EURUSD_otc", NOW + 0.01, 1.2)
+        self.assertEqual(await self.account.check_win(order_id, 1), (8.0, "ganhou"))
+        self.assertEqual(self.account.stats()["open"], 0)
+
+    async def test_rejected_orders(self):
+        """Saldo insuficiente, payout desconhecido e ativo sem ticks rejeitam a ordem"""
+        self.account.price_timeout = 0.05
+        self.assertEqual(await self.account.buy(500, "EURUSD_otc", "call", 60), (False, None))
+        self.assertEqual(await self.account.buy(10, "AUDNZD_otc", "call", 60), (False, None))
+        self.api.websocket_client.websocket = None
+        self.assertEqual(await self.account.buy(10, "GBPUSD_otc", "call", 60), (False, None))
+        self.assertEqual(self.account.balance, 100)
+
+    async def test_independent_accounts(self):
+        """Contas sobre a mesma conexão têm saldos e ordens independentes"""
+        other = PaperAccount(self.api, balance=50)
+        _, first = await self.account.buy(10, "EURUSD_otc", "call", 60)
+        _, second = await other.buy(20, "EURUSD_otc", "put", 60)
+        self.assertNotEqual(first, second)
+        self.assertIsNone(other.order_book.get(first))
+        self.tick("EURUSD_otc", NOW + 30, 1.2)
+        self.tick("EURUSD_otc", NOW + 61, 1.0)
+        self.assertEqual((self.account.balance, other.balance), (108, 30))
+        self.assertEqual(self.account.stats()["wins"], 1)
+        self.assertEqual(other.stats()["losses"], 1)
+
+
+class TestPaperSession(unittest.IsolatedAsyncioTestCase):
+    """
+    Modo paper da PocketOption contra o servidor local
+    """
+
+    async def asyncSetUp(self):
+        self.server = await MockPocketOptionServer(tick_interval=0.02, seed=1).start()
+        REGION.override(self.server.url)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        REGION.override(None)
+        global_value.websocket_is_connected = False
+
+    async def test_paper_orders_are_not_sent(self):
+        """Ordens de papel não chegam ao servidor e fecham pelos ticks recebidos"""
+        api = PocketOption(SSID, True, paper=True)
+        self.assertTrue(await api.connect())
+        self.assertTrue(await api.wait_session_ready(5))
+        global_value.PayoutData = PAYOUTS
+        variant = api.paper_account(balance=1000)
+
+        success, order_id = await api.buy(10, "EURUSD_otc", "call", 0.1)
+        self.assertTrue(success)
+        _, variant_id = await variant.buy(10, "EURUSD_otc", "put", 0.1)
+        profit, status = await api.check_win(order_id, 5)
+        self.assertIn(status, ("ganhou", "perdeu"))
+        self.assertIn((await variant.check_win(variant_id, 5))[1], ("ganhou", "perdeu"))
+        self.assertEqual(variant.size, api.size)
+
+        self.assertNotIn("openOrder", [event for event, _ in self.server.received])
+        self.assertIn("changeSymbol", [event for event, _ in self.server.received])
+        await api.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
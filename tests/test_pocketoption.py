@@ -4,6 +4,7 @@ Autor: AdminhuDev
 """
 
 import asyncio
+import json
 import unittest
 import sys
 import os
@@ -179,6 +180,93 @@ class TestPocketOption(unittest.TestCase):
         self.assertEqual(len(unique_times), 2)
 
 
+class TestConcurrentOrders(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes de ordens simultâneas roteadas por requestId
+    """
+
+    async def asyncSetUp(self):
+        self.valid_ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(self.valid_ssid, True)
+        self.sent = []
+        self.api.api.async_buyv3 = self.fake_buyv3
+
+    async def fake_buyv3(self, amount, active, action, expirations, req_id):
+        """Simula o servidor respondendo fora de ordem (maior valor responde antes)"""
+        self.sent.append(req_id)
+
+        async def respond():
+            await asyncio.sleep(0.05 / amount)
+            payload = {"id": f"order-{amount}", "amount": amount, "requestId": req_id}
+            await self.api.api.websocket.on_message(json.dumps(payload).encode())
+
+        asyncio.ensure_future(respond())
+
+    async def test_request_ids_are_unique(self):
+        """Cada ordem recebe um requestId diferente"""
+        await asyncio.gather(*(self.api.buy(amount, "EURUSD_otc", "call", 60) for amount in (1, 2, 3)))
+        self.assertEqual(len(set(self.sent)), 3)
+
+    async def test_concurrent_buys_are_routed_by_request_id(self):
+        """Ordens simultâneas recebem a própria confirmação"""
+        results = await asyncio.gather(*(self.api.buy(amount, "EURUSD_otc", "call", 60) for amount in (1, 2, 3)))
+        self.assertEqual(results, [(True, "order-1"), (True, "order-2"), (True, "order-3")])
+        self.assertEqual(self.api.api.buy_multi_option, {})
+
+    async def test_buy_many_yields_in_arrival_order(self):
+        """buy_many entrega as confirmações na ordem em que chegam"""
+        orders = [(1, "EURUSD_otc", "call", 60), {"amount": 4, "active": "EURUSD_otc", "action": "put", "expirations": 60}]
+        received = [item async for item in self.api.buy_many(orders)]
+        self.assertEqual(received, [(1, True, "order-4"), (0, True, "order-1")])
+
+    async def test_buy_error_response(self):
+        """Resposta com erro retorna falha sem afetar outras ordens"""
+        async def failing_buyv3(amount, active, action, expirations, req_id):
+            payload = {"error": "Saldo insuficiente", "requestId": req_id}
+            await self.api.api.websocket.on_message(json.dumps(payload).encode())
+
+        self.api.api.async_buyv3 = failing_buyv3
+        self.assertEqual(await self.api.buy(1, "EURUSD_otc", "call", 60), (False, None))
+
+
+class TestOrderTemplates(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes de ordens pré-serializadas
+    """
+
+    async def asyncSetUp(self):
+        self.valid_ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(self.valid_ssid, True)
+        self.frames = []
+
+        async def send_frame(data):
+            self.frames.append(data)
+            payload = json.loads(data[2:])[1]
+            response = {"id": "order-1", "requestId": payload["requestId"]}
+            asyncio.get_running_loop().call_soon(
+                asyncio.ensure_future, self.api.api.websocket.on_message(json.dumps(response).encode()))
+
+        self.api.api.send_frame = send_frame
+
+    async def test_template_matches_openorder_payload(self):
+        """O frame renderizado equivale ao openOrder montado pelo Buyv3"""
+        template = self.api.prepare_order(5, "EURUSD_otc", "put", 120)
+        name, payload = json.loads(template.render(123)[2:])
+        self.assertEqual(name, "openOrder")
+        self.assertEqual(payload, {
+            "asset": "EURUSD_otc", "amount": 5, "action": "put", "isDemo": 1,
+            "requestId": 123, "optionType": 100, "time": 120,
+        })
+
+    async def test_buy_prepared(self):
+        """buy_prepared reutiliza o modelo com requestIds diferentes"""
+        template = self.api.prepare_order(5, "EURUSD_otc", "call", 60)
+        self.assertEqual(await self.api.buy_prepared(template), (True, "order-1"))
+        self.assertEqual(await self.api.buy_prepared(template), (True, "order-1"))
+        request_ids = [json.loads(frame[2:])[1]["requestId"] for frame in self.frames]
+        self.assertEqual(len(set(request_ids)), 2)
+
+
 class TestPocketOptionIntegration(unittest.TestCase):
     """
     Testes de integração (requerem configuração real)
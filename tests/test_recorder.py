@@ -0,0 +1,158 @@
+"""
+Testes unitários para a gravação e reprodução de frames do websocket
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.api import PocketOptionAPI
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.recorder import INBOUND, OUTBOUND, FrameRecorder, FrameReplayer
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.testing import MockPocketOptionServer
+
+SSID = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+
+
+def stream_frames(count, start=1700000000.0):
+    """Frames de updateStream no formato do servidor (cabeçalho 451 e anexo binário)"""
+    header = '451-["updateStream",{"_placeholder":true,"num":0}]'
+    frames = []
+    for index in range(count):
+        frames.append(header)
+        frames.append(json.dumps([["EURUSD_otc", start + index, 1.1 + index / 1e4]]).encode())
+    return frames
+
+
+class TestFrameRecorder(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para FrameRecorder e FrameReplayer
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "frames.bin.gz")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_round_trip(self):
+        """Texto, binário e direção são preservados na ordem gravada"""
+        recorder = FrameRecorder(self.path)
+        recorder.inbound('0{"sid":"abc"}')
+        recorder.outbound("40")
+        recorder.inbound(b'{"balance": 10}')
+        recorder.close()
+
+        frames = list(FrameReplayer(self.path).frames(direction=None))
+        self.assertEqual([(frame.direction, frame.payload) for frame in frames],
+                         [(INBOUND, '0{"sid":"abc"}'), (OUTBOUND, "40"), (INBOUND, b'{"balance": 10}')])
+        self.assertLessEqual(frames[0].timestamp_ns, frames[2].timestamp_ns)
+        self.assertEqual([frame.payload for frame in FrameReplayer(self.path).frames(OUTBOUND)], ["40"])
+
+    def test_append_only(self):
+        """Uma nova gravação no mesmo arquivo é acrescentada ao final"""
+        for payload in ("a", "b"):
+            recorder = FrameRecorder(self.path)
+            recorder.inbound(payload)
+            recorder.close()
+        self.assertEqual([frame.payload for frame in FrameReplayer(self.path).frames()], ["a", "b"])
+
+    def test_unclosed_recording_is_readable(self):
+        """Frames já descarregados são lidos mesmo sem o close (queda do processo)"""
+        recorder = FrameRecorder(self.path, flush_every=2)
+        for payload in ("a", "b", "c"):
+            recorder.inbound(payload)
+        self.assertEqual([frame.payload for frame in FrameReplayer(self.path).frames()], ["a", "b"])
+        recorder.close()
+
+    async def test_replay_speed(self):
+        """A reprodução respeita os intervalos gravados, escalados pela velocidade"""
+        recorder = FrameRecorder(self.path)
+        recorder.inbound("a")
+        await asyncio.sleep(0.2)
+        recorder.inbound("b")
+        recorder.close()
+
+        replayer = FrameReplayer(self.path)
+        received = []
+        stats = await replayer.replay(lambda frame: received.append(frame.payload), speed=2.0)
+        self.assertEqual(received, ["a", "b"])
+        self.assertGreaterEqual(stats["elapsed"], 0.09)
+        self.assertLess(stats["elapsed"], 0.2)
+
+        stats = await replayer.replay(lambda frame: None, speed=None)
+        self.assertLess(stats["elapsed"], 0.05)
+
+    async def test_feed_client(self):
+        """Os frames gravados passam pelo on_message do cliente"""
+        recorder = FrameRecorder(self.path)
+        for frame in stream_frames(50):
+            recorder.inbound(frame)
+        recorder.close()
+
+        api = PocketOptionAPI()
+        stats = await FrameReplayer(self.path).feed(api.websocket_client)
+        self.assertEqual(stats["frames"], 100)
+        self.assertEqual(api.candle_builder.last_tick["EURUSD_otc"][0], 1700000049.0)
+
+
+class TestRecordingSession(unittest.IsolatedAsyncioTestCase):
+    """
+    Gravação de uma sessão real contra o servidor local e reprodução no servidor
+    """
+
+    async def asyncSetUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "session.bin.gz")
+        self.server = await MockPocketOptionServer(tick_interval=0.01, seed=1).start()
+        REGION.override(self.server.url)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        REGION.override(None)
+        global_value.websocket_is_connected = False
+        shutil.rmtree(self.tmpdir)
+
+    async def test_record_and_replay_session(self):
+        """Frames enviados e recebidos são gravados e podem ser reenviados pelo servidor"""
+        api = PocketOption(SSID, True, record_path=self.path)
+        self.assertTrue(await api.connect())
+        self.assertTrue(await api.wait_session_ready(5))
+        await api.api.change_symbol.async_call("EURUSD_otc", 60)
+        await asyncio.sleep(0.2)
+        await api.disconnect()
+        api.recorder.close()
+
+        frames = list(FrameReplayer(self.path).frames(direction=None))
+        outbound = [frame.payload for frame in frames if frame.direction == OUTBOUND]
+        self.assertIn("40", outbound)
+        self.assertIn(api.formatted_ssid, outbound)
+        self.assertTrue(frames[0].payload.startswith("0{"))
+        streamed = sum(1 for frame in frames if frame.payload[:19] == '451-["updateStream"')
+        self.assertGreater(streamed, 0)
+
+        # Um segundo cliente recebe os ticks gravados reenviados pelo servidor
+        self.server.tick_interval = 60
+        replay_client = PocketOption(SSID, True)
+        self.assertTrue(await replay_client.connect())
+        self.assertTrue(await replay_client.wait_session_ready(5))
+        stats = await self.server.replay(self.path, speed=None)
+        await asyncio.sleep(0.1)
+        self.assertGreater(stats["frames"], 0)
+        self.assertIn("EURUSD_otc", replay_client.api.candle_builder.last_tick)
+        await replay_client.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
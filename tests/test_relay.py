@@ -0,0 +1,145 @@
+"""
+Testes unitários para o relay de dados de mercado
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.relay import MarketDataRelay, RelayClient, RelayConnection, encode_tick, TICK_FRAME
+from pocketoptionapi.stable_api import PocketOption
+
+
+class FakeTransport(object):
+    def __init__(self, buffered):
+        self.buffered = buffered
+
+    def get_write_buffer_size(self):
+        return self.buffered
+
+
+class FakeWriter(object):
+    def __init__(self, buffered=0):
+        self.transport = FakeTransport(buffered)
+        self.written = []
+        self.closed = False
+
+    def write(self, data):
+        self.written.append(data)
+
+    def close(self):
+        self.closed = True
+
+
+@unittest.skipUnless(hasattr(asyncio, "start_unix_server"), "requer sockets Unix")
+class TestMarketDataRelay(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para a classe MarketDataRelay
+    """
+
+    async def asyncSetUp(self):
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(ssid, True)
+        self.sent = []
+
+        async def fake_send(name, msg, request_id=""):
+            self.sent.append(msg)
+
+        self.api.api.async_send_websocket_request = fake_send
+        self.directory = tempfile.TemporaryDirectory()
+        self.relay = MarketDataRelay(self.api, os.path.join(self.directory.name, "relay.sock"))
+        await self.relay.start()
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        await self.relay.stop()
+        self.directory.cleanup()
+
+    async def connect(self):
+        client = RelayClient(self.relay.path)
+        await client.connect()
+        self.clients.append(client)
+        return client
+
+    async def stream(self, ticks):
+        """Entrega ticks como o servidor: cabeçalho 451 seguido do payload binário"""
+        websocket = self.api.api.websocket
+        await websocket.on_message('451-["updateStream",{"_placeholder":true,"num":0}]')
+        await websocket.on_message(json.dumps(ticks).encode())
+
+    async def next_event(self, client):
+        return await asyncio.wait_for(client.read(), 1)
+
+    async def test_snapshot_on_join_and_single_upstream(self):
+        """Quem entra recebe o estado atual e o ativo é assinado uma vez na corretora"""
+        first = await self.connect()
+        await first.subscribe("EURUSD_otc", 60)
+        self.assertEqual(await self.next_event(first), ("snapshot", "EURUSD_otc"))
+
+        await self.stream([["EURUSD_otc", 1200.5, 1.1], ["EURUSD_otc", 1201.0, 1.3]])
+        self.assertEqual(await self.next_event(first), ("tick", "EURUSD_otc", 1200.5, 1.1))
+        self.assertEqual(await self.next_event(first), ("tick", "EURUSD_otc", 1201.0, 1.3))
+
+        second = await self.connect()
+        await second.subscribe("EURUSD_otc", 60)
+        self.assertEqual(await self.next_event(second), ("tick", "EURUSD_otc", 1201.0, 1.3))
+        kind, asset, period, bar, partial = await self.next_event(second)
+        self.assertEqual((kind, asset, period, partial), ("candle", "EURUSD_otc", 60, True))
+        self.assertEqual(bar, {"time": 1200, "open": 1.1, "high": 1.3, "low": 1.1, "close": 1.3})
+        self.assertEqual(await self.next_event(second), ("snapshot", "EURUSD_otc"))
+
+        self.assertEqual(self.sent, [["changeSymbol", {"asset": "EURUSD_otc", "period": 60}]])
+        self.assertEqual(self.relay.stats()["clients"], 2)
+
+    async def test_candles_are_fanned_out(self):
+        """Velas fechadas chegam a todos os consumidores do ativo e período"""
+        clients = [await self.connect() for _ in range(3)]
+        for client in clients:
+            await client.subscribe("GBPUSD_otc", 5)
+            await self.next_event(client)
+
+        self.relay._on_candle("GBPUSD_otc", 5, {"time": 100, "open": 1, "high": 2, "low": 0.5, "close": 1.5})
+        for client in clients:
+            event = await self.next_event(client)
+            self.assertEqual(event[:3], ("candle", "GBPUSD_otc", 5))
+            self.assertEqual(event[3]["close"], 1.5)
+            self.assertFalse(event[4])
+
+    async def test_invalid_period_returns_error(self):
+        """Um período inválido é respondido com erro em vez de derrubar a conexão"""
+        client = await self.connect()
+        await client.subscribe("EURUSD_otc", 7)
+        kind, message = await self.next_event(client)
+        self.assertEqual(kind, "error")
+        self.assertIn("7", message)
+        self.assertEqual(self.relay.upstream, set())
+
+    def test_slow_consumer_is_dropped(self):
+        """Um consumidor com buffer cheio é desconectado sem afetar os outros"""
+        relay = MarketDataRelay(self.api, "unused", max_buffer=100)
+        fast, slow = RelayConnection(FakeWriter()), RelayConnection(FakeWriter(buffered=1000))
+        relay.asset_ids["EURUSD_otc"] = 0
+        for client in (fast, slow):
+            client.subscriptions.add(("EURUSD_otc", 60))
+            relay.tick_subscribers["EURUSD_otc"].add(client)
+            relay.clients.add(client)
+
+        relay._on_tick("EURUSD_otc", 1.0, 1.1)
+        self.assertEqual(fast.writer.written, [encode_tick(0, 1.0, 1.1)])
+        self.assertEqual(len(fast.writer.written[0]), TICK_FRAME.size)
+        self.assertTrue(slow.writer.closed)
+        self.assertEqual(relay.tick_subscribers["EURUSD_otc"], {fast})
+        self.assertEqual(relay.stats()["dropped_clients"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,168 @@
+"""
+Testes unitários para o controle de risco pré-operação
+Autor: AdminhuDev
+"""
+
+import asyncio
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.constants import REGION
+from pocketoptionapi.risk import RiskEngine, RiskLimits
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.testing import MockPocketOptionServer
+from pocketoptionapi.ws.objects.order_book import OrderBook
+
+
+class TestRiskEngine(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para a classe RiskEngine
+    """
+
+    async def test_api_limits(self):
+        """Valor e duração fora de API_LIMITS são rejeitados"""
+        risk = RiskEngine()
+        self.assertIsNone(risk.check(10, "EURUSD_otc", "call", 60))
+        self.assertIn("mínimo", risk.check(0.5, "EURUSD_otc", "call", 60))
+        self.assertIn("máximo", risk.check(10, "EURUSD_otc", "call", 50000))
+        self.assertIn("mínimo", await risk.acquire(1, 10, "EURUSD_otc", "call", 1))
+        self.assertEqual(risk.open_orders, 0)
+
+    async def test_exposure_tracking(self):
+        """Exposição por conta, ativo e direção é reservada e liberada"""
+        risk = RiskEngine(RiskLimits(max_asset_exposure=25))
+        self.assertIsNone(await risk.acquire(1, 10, "EURUSD_otc", "call", 60))
+        self.assertIsNone(await risk.acquire(2, 10, "EURUSD_otc", "put", 60))
+        self.assertIn("EURUSD_otc", await risk.acquire(3, 10, "EURUSD_otc", "call", 60))
+        self.assertIsNone(await risk.acquire(4, 10, "GBPUSD_otc", "call", 60))
+        self.assertEqual(risk.exposure, 30)
+        self.assertEqual(risk.direction_exposure["call"], 20)
+
+        risk.release(2)
+        self.assertEqual(risk.asset_exposure["EURUSD_otc"], 10)
+        self.assertEqual(risk.open_orders, 2)
+
+    async def test_close_releases_confirmed_order(self):
+        """Fechamento no livro de ordens libera a exposição"""
+        book = OrderBook()
+        risk = RiskEngine(RiskLimits(max_concurrent_orders=1))
+        book.add_close_listener(risk.on_order_closed)
+
+        self.assertIsNone(await risk.acquire(1, 10, "EURUSD_otc", "call", 60))
+        risk.confirm(1, "a")
+        self.assertIsNotNone(risk.check(10, "EURUSD_otc", "call", 60))
+        book.on_close([{"id": "a", "profit": 1}])
+        self.assertIsNone(risk.check(10, "EURUSD_otc", "call", 60))
+        self.assertEqual(risk.exposure, 0)
+
+    async def test_queue_waits_for_capacity(self):
+        """Com queue_timeout a ordem aguarda uma vaga em vez de ser rejeitada"""
+        risk = RiskEngine(RiskLimits(max_concurrent_orders=1, queue_timeout=1))
+        self.assertIsNone(await risk.acquire(1, 10, "EURUSD_otc", "call", 60))
+        queued = asyncio.ensure_future(risk.acquire(2, 10, "EURUSD_otc", "call", 60))
+        await asyncio.sleep(0.01)
+        self.assertFalse(queued.done())
+        risk.release(1)
+        self.assertIsNone(await queued)
+        self.assertEqual(risk.open_orders, 1)
+
+    async def test_queue_timeout(self):
+        """Sem vaga dentro do prazo a ordem é rejeitada"""
+        risk = RiskEngine(RiskLimits(max_concurrent_orders=1, queue_timeout=0.01))
+        await risk.acquire(1, 10, "EURUSD_otc", "call", 60)
+        self.assertIsNotNone(await risk.acquire(2, 10, "EURUSD_otc", "call", 60))
+        self.assertEqual(risk._capacity_waiters, [])
+
+
+class TestRiskBeforeSend(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes do controle de risco no caminho de buy()
+    """
+
+    async def test_rejected_order_is_not_sent(self):
+        """Ordem rejeitada não chega ao websocket"""
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        api = PocketOption(ssid, True, risk_limits=RiskLimits(max_amount=100))
+        sent = []
+
+        async def fake_buyv3(*args):
+            sent.append(args)
+
+        api.api.async_buyv3 = fake_buyv3
+        self.assertEqual(await api.buy(500, "EURUSD_otc", "call", 60), (False, None))
+        self.assertEqual(sent, [])
+
+    async def test_failopen_without_request_id(self):
+        """Um failopenOrder sem requestId rejeita a ordem pendente mais antiga na hora"""
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        api = PocketOption(ssid, True)
+        client = api.api.websocket
+
+        async def rejecting_buyv3(*args):
+            await client.on_message('451-["failopenOrder",{"_placeholder":true,"num":0}]')
+            await client.on_message(b'{"error":"Saldo insuficiente","amount":10}')
+
+        api.api.async_buyv3 = rejecting_buyv3
+        started = asyncio.get_running_loop().time()
+        self.assertEqual(await api.buy(10, "EURUSD_otc", "call", 60), (False, None))
+        self.assertLess(asyncio.get_running_loop().time() - started, 1)
+        self.assertEqual(api.risk.open_orders, 0)
+        self.assertEqual(api.api.buy_multi_option, {})
+
+    async def test_late_ack_confirms_reservation(self):
+        """Resposta após o timeout ainda concilia a reserva (aberta ou rejeitada)"""
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        api = PocketOption(ssid, True)
+        for req_id in (1, 2):
+            await api.risk.acquire(req_id, 10, "EURUSD_otc", "call", 60)
+            future = api.api.register_order_request(req_id)
+            self.assertEqual(await api._wait_order_confirmation(req_id, future, 60, timeout=0.01), (False, None))
+        self.assertEqual(api.risk.open_orders, 2)
+
+        api.api.resolve_order_request({"requestId": 1, "id": "abc", "amount": 10})
+        api.api.resolve_order_request({"requestId": 2, "error": "Saldo insuficiente"})
+        self.assertEqual(api.risk.open_orders, 1)
+        api.api.order_book.on_close([{"id": "abc", "profit": 9.2}])
+        self.assertEqual(api.risk.open_orders, 0)
+
+
+class TestRiskWithServer(unittest.IsolatedAsyncioTestCase):
+    """
+    Reservas de risco com ordens canceladas contra o servidor local
+    """
+
+    async def asyncSetUp(self):
+        self.server = await MockPocketOptionServer(latency=0.1, expiry_scale=0.01, tick_interval=60).start()
+        REGION.override(self.server.url)
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+        REGION.override(None)
+        global_value.websocket_is_connected = False
+
+    async def test_cancelled_orders_release_exposure(self):
+        """Sair do buy_many antes das confirmações não deixa exposição presa"""
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        api = PocketOption(ssid, True)
+        self.assertTrue(await api.connect())
+        self.assertTrue(await api.wait_session_ready(5))
+
+        async for _ in api.buy_many([(1, "EURUSD_otc", "call", 10)] * 4):
+            break
+        self.assertGreater(api.risk.open_orders, 0)
+
+        deadline = asyncio.get_running_loop().time() + 5
+        while api.risk.open_orders and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.05)
+        self.assertEqual(api.risk.open_orders, 0)
+        self.assertEqual(len(self.server.deals), 4)
+        await api.disconnect()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,128 @@
+"""
+Testes unitários para o runner de múltiplas contas
+Autor: AdminhuDev
+"""
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.runner import Account, Supervisor, run_sessions, shard
+from pocketoptionapi.stable_api import PocketOption
+
+
+def make_ssid(uid):
+    return f'42["auth",{{"session":"session_{uid}","isDemo":1,"uid":{uid},"platform":2}}]'
+
+
+class FakePocket(PocketOption):
+    """Sessão que "conecta" sem rede e define o saldo a partir do uid"""
+
+    def __init__(self, ssid, demo, **options):
+        self.options = options
+        super().__init__(ssid, demo)
+
+    async def connect(self):
+        global_value.websocket_is_connected = True
+        global_value.balance = float(self.parsed_data["uid"])
+        return True
+
+    async def disconnect(self):
+        global_value.websocket_is_connected = False
+
+
+async def check_isolation(pocket, account):
+    """Cada conta enxerga apenas o próprio saldo, mesmo intercalando no loop"""
+    for _ in range(5):
+        await asyncio.sleep(0.001)
+        assert global_value.balance == float(pocket.parsed_data["uid"])
+        assert global_value.SSID == pocket.formatted_ssid
+
+
+async def crash_once(pocket, account):
+    """Derruba o processo worker na primeira execução"""
+    marker = pocket.options["marker"]
+    if not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(3)
+    await asyncio.sleep(0.1)
+
+
+class TestRunSessions(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes das sessões de várias contas no mesmo event loop
+    """
+
+    async def asyncTearDown(self):
+        global_value.websocket_is_connected = False
+
+    def test_shard_round_robin(self):
+        """As contas são distribuídas de forma equilibrada"""
+        accounts = [Account(make_ssid(uid)) for uid in range(7)]
+        groups = shard(accounts, 3)
+        self.assertEqual([len(group) for group in groups], [3, 2, 2])
+        self.assertEqual(len(shard(accounts[:2], 8)), 2)
+
+    async def test_sessions_have_isolated_state(self):
+        """global_value é próprio de cada sessão e não altera o estado padrão"""
+        balance = global_value.balance
+        accounts = [Account(make_ssid(uid), name=f"conta-{uid}") for uid in (101, 202, 303)]
+        reports = []
+        sessions = await run_sessions(accounts, check_isolation, session_factory=FakePocket,
+                                      report=reports.append, report_interval=0.01)
+
+        self.assertEqual(global_value.balance, balance)
+        for uid in (101, 202, 303):
+            session = sessions[f"conta-{uid}"]
+            self.assertTrue(session.finished)
+            self.assertIsNone(session.error)
+            self.assertEqual(session.values.balance, float(uid))
+        self.assertEqual(reports[-1]["conta-202"]["balance"], 202.0)
+
+    async def test_failed_session_is_restarted(self):
+        """Um erro da estratégia reinicia apenas a sessão daquela conta"""
+        calls = []
+
+        async def flaky(pocket, account):
+            calls.append(account.name)
+            if len(calls) == 1:
+                raise RuntimeError("falha")
+
+        sessions = await run_sessions([Account(make_ssid(1), name="a")], flaky,
+                                      session_factory=FakePocket, restart_delay=0.01)
+        self.assertEqual(calls, ["a", "a"])
+        self.assertEqual(sessions["a"].restarts, 1)
+        self.assertTrue(sessions["a"].finished)
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requer fork")
+class TestSupervisor(unittest.TestCase):
+    """
+    Testes do supervisor dos processos worker
+    """
+
+    def test_restarts_crashed_worker_and_aggregates(self):
+        """Um worker que cai é reiniciado e as métricas das contas são agregadas"""
+        with tempfile.TemporaryDirectory() as directory:
+            accounts = [Account(make_ssid(uid), name=f"conta-{uid}", marker=os.path.join(directory, str(uid)))
+                        for uid in (10, 20)]
+            supervisor = Supervisor(accounts, crash_once, workers=2, session_factory=FakePocket,
+                                    report_interval=0.02, restart_delay=0.05, start_method="fork")
+            stats = supervisor.run(duration=20, poll_interval=0.02)
+
+        self.assertEqual(stats["accounts"], 2)
+        self.assertEqual(stats["worker_restarts"], 2)
+        self.assertEqual(set(stats["by_account"]), {"conta-10", "conta-20"})
+        self.assertEqual(stats["balance"], 30.0)
+        self.assertTrue(all(worker["last_exitcode"] == 0 for worker in stats["workers"].values()))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
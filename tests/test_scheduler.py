@@ -0,0 +1,235 @@
+"""
+Testes unitários para o agendamento de ordens
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.scheduler import TimerWheel
+from pocketoptionapi.stable_api import PocketOption
+
+
+class TestTimerWheel(unittest.TestCase):
+    """
+    Testes para a classe TimerWheel
+    """
+
+    def test_expires_in_order(self):
+        """Itens vencem no tick correto e em ordem"""
+        wheel = TimerWheel(tick=1, slots=(8, 4, 4))
+        for when in (5, 1, 3):
+            wheel.schedule(when, when)
+        self.assertEqual(wheel.advance(0), [])
+        self.assertEqual(wheel.advance(3), [1, 3])
+        self.assertEqual(wheel.advance(10), [5])
+        self.assertEqual(wheel.pending, 0)
+
+    def test_cascades_from_upper_levels(self):
+        """Itens distantes descem pelos níveis e pelo overflow"""
+        wheel = TimerWheel(tick=1, slots=(8, 4, 4))
+        far = [9, 40, 127, 200]
+        for when in far:
+            wheel.schedule(when, when)
+        self.assertEqual(wheel.overflow[0].item, 200)
+
+        fired = []
+        for now in range(0, 260, 7):
+            for item in wheel.advance(now):
+                fired.append((item, now))
+        self.assertEqual([item for item, _ in fired], far)
+        for item, now in fired:
+            self.assertLess(now - item, 7)
+            self.assertGreaterEqual(now, item)
+
+    def test_next_tick_and_cancel(self):
+        """next_tick aponta o próximo vencimento; itens cancelados não disparam"""
+        wheel = TimerWheel(tick=1, slots=(8, 4, 4))
+        self.assertIsNone(wheel.next_tick())
+        entry = wheel.schedule(3, "a")
+        wheel.schedule(20, "b")
+        self.assertEqual(wheel.next_tick(), 3)
+        entry.cancelled = True
+        self.assertEqual(wheel.advance(30), ["b"])
+
+    def test_next_tick_in_upper_levels(self):
+        """Com o nível 0 vazio next_tick aponta o vencimento real, não a próxima volta do nível 0"""
+        wheel = TimerWheel(tick=1, slots=(8, 4, 4))
+        for when in (50, 20, 100):
+            wheel.schedule(when, when)
+        self.assertEqual(wheel.next_tick(), 20)
+        self.assertEqual(wheel.advance(20), [20])
+        self.assertEqual(wheel.next_tick(), 50)
+        self.assertEqual(wheel.advance(50), [50])
+        self.assertEqual(wheel.next_tick(), 100)
+
+
+class TestScheduleOrder(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes do disparo agendado de ordens
+    """
+
+    async def asyncSetUp(self):
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(ssid, True)
+        # Relógio do servidor 3 segundos adiantado em relação ao local
+        self.api.api.server_time = lambda: time.time() + 3
+        self.api.api.sync.synchronize(time.time() + 3)
+        self.frames = []
+
+        async def send_frame(data):
+            self.frames.append((self.api.api.server_time(), data))
+            payload = json.loads(data[2:])[1]
+            response = {"id": f"order-{payload['requestId']}", "requestId": payload["requestId"]}
+            asyncio.get_running_loop().call_soon(
+                asyncio.ensure_future, self.api.api.websocket.on_message(json.dumps(response).encode()))
+
+        self.api.api.send_frame = send_frame
+
+    async def test_fires_at_server_time(self):
+        """A ordem é enviada no instante alvo do relógio do servidor"""
+        target = self.api.api.server_time() + 0.1
+        order = self.api.schedule_order(target, 5, "EURUSD_otc", "call", 60)
+        self.assertEqual(self.frames, [])
+
+        success, order_id = await order
+        self.assertTrue(success)
+        self.assertTrue(order_id.startswith("order-"))
+        self.assertEqual(len(self.frames), 1)
+        self.assertLess(abs(order.error), 0.05)
+        self.assertGreaterEqual(self.frames[0][0], target - 0.005)
+        self.assertEqual(self.api.get_scheduler_stats()["count"], 1)
+
+    async def test_orders_fire_in_target_order(self):
+        """Ordens agendadas fora de ordem disparam na ordem dos instantes"""
+        now = self.api.api.server_time()
+        later = self.api.schedule_order(now + 0.08, 2, "EURUSD_otc", "put", 60)
+        sooner = self.api.schedule_order(now + 0.03, 1, "EURUSD_otc", "call", 60)
+        await asyncio.gather(later, sooner)
+        amounts = [json.loads(data[2:])[1]["amount"] for _, data in self.frames]
+        self.assertEqual(amounts, [1, 2])
+
+    async def test_waits_for_clock_synchronization(self):
+        """Antes do primeiro updateStream a ordem aguarda o relógio ser sincronizado"""
+        self.api.api.sync.reset()
+        target = self.api.api.server_time() + 0.05
+        order = self.api.schedule_order(target, 5, "EURUSD_otc", "call", 60)
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.frames, [])
+
+        self.api.api.sync.synchronize(time.time() + 3)
+        self.api.api.candle_builder.on_tick("EURUSD_otc", time.time() + 3, 1.1)
+        success, _ = await asyncio.wait_for(order, 1)
+        self.assertTrue(success)
+        self.assertEqual(len(self.frames), 1)
+
+    async def test_early_wakeup_does_not_starve_the_loop(self):
+        """Com atraso do loop estimado a ordem dispara sem monopolizar o event loop"""
+        self.api.scheduler.loop_lag = 0.05
+        turns = 0
+
+        async def count_turns():
+            nonlocal turns
+            while True:
+                turns += 1
+                await asyncio.sleep(0)
+
+        counter = asyncio.ensure_future(count_turns())
+        try:
+            order = self.api.schedule_order(self.api.api.server_time() + 0.1, 1, "EURUSD_otc", "call", 60)
+            success, _ = await asyncio.wait_for(order, 1)
+        finally:
+            counter.cancel()
+        self.assertTrue(success)
+        self.assertLess(order.error, 0.01)
+        self.assertGreater(turns, 1)
+
+    async def test_cancel(self):
+        """Ordem cancelada antes do instante alvo não é enviada"""
+        order = self.api.schedule_order(self.api.api.server_time() + 0.03, 1, "EURUSD_otc", "call", 60)
+        order.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await order
+        await asyncio.sleep(0.06)
+        self.assertEqual(self.frames, [])
+
+
+class TestCandleClose(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes dos callbacks de fechamento de vela
+    """
+
+    async def asyncSetUp(self):
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(ssid, True)
+        # Relógio do servidor parado 50 ms antes de um limite fixo de 5 segundos;
+        # start_clock() o faz andar junto com o relógio do loop
+        self.boundary = 1700000000
+        self.started_at = None
+        self.api.api.server_time = self.server_time
+        self.api.api.sync.synchronize(self.server_time())
+        self.sent = []
+
+        async def fake_send(name, msg, request_id=""):
+            self.sent.append(msg)
+
+        self.api.api.async_send_websocket_request = fake_send
+
+    def server_time(self):
+        elapsed = 0.0 if self.started_at is None else asyncio.get_running_loop().time() - self.started_at
+        return self.boundary - 0.05 + elapsed
+
+    def start_clock(self):
+        self.started_at = asyncio.get_running_loop().time()
+
+    async def stream(self, ticks):
+        """Entrega ticks como o servidor: cabeçalho 451 seguido do payload binário"""
+        websocket = self.api.api.websocket
+        await websocket.on_message('451-["updateStream",{"_placeholder":true,"num":0}]')
+        await websocket.on_message(json.dumps(ticks).encode())
+
+    async def test_callbacks_receive_closed_bar(self):
+        """Os callbacks recebem a vela recém-fechada no limite do servidor"""
+        closes = []
+        fired = asyncio.Event()
+
+        def on_close(asset, period, bar):
+            closes.append((asset, period, bar, self.api.api.server_time()))
+            if len(closes) == 2:
+                fired.set()
+
+        await self.api.on_candle_close("EURUSD_otc", 5, on_close)
+        await self.api.on_candle_close("GBPUSD_otc", 5, on_close)
+        self.assertEqual(self.sent[0], ["changeSymbol", {"asset": "EURUSD_otc", "period": 5}])
+        self.assertEqual(len(self.api.candle_closes._timers), 1)
+
+        await self.stream([["EURUSD_otc", self.boundary - 0.03, 1.10], ["GBPUSD_otc", self.boundary - 0.02, 1.30]])
+        await self.stream([["EURUSD_otc", self.boundary - 0.01, 1.11]])
+        self.assertEqual(closes, [])
+        self.start_clock()
+        await asyncio.wait_for(fired.wait(), 1)
+
+        bars = {asset: bar for asset, _, bar, _ in closes}
+        self.assertEqual(bars["EURUSD_otc"],
+                         {"time": self.boundary - 5, "open": 1.10, "high": 1.11, "low": 1.10, "close": 1.11})
+        self.assertEqual(bars["GBPUSD_otc"]["close"], 1.30)
+        for *_, fired_at in closes:
+            self.assertLess(abs(fired_at - self.boundary), 0.05)
+        # Próximo limite já agendado
+        self.assertIn(self.boundary + 5, self.api.candle_closes._timers)
+
+    async def test_invalid_period(self):
+        """Períodos fora de PocketOption.size são rejeitados"""
+        with self.assertRaises(ValueError):
+            await self.api.on_candle_close("EURUSD_otc", 7, lambda *args: None)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,161 @@
+"""
+Testes unitários para a retomada de sessão após reconexão
+Autor: AdminhuDev
+"""
+
+import asyncio
+import json
+import os
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import pocketoptionapi.global_value as global_value
+from pocketoptionapi.stable_api import PocketOption
+from pocketoptionapi.ws.session import SessionState
+
+
+class FakeSocket(object):
+    """Socket que apenas registra os frames enviados"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, data):
+        self.sent.append(data)
+
+
+class TestSessionState(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes para a classe SessionState
+    """
+
+    async def test_tracks_subscriptions_and_pending_requests(self):
+        """Assinaturas são deduplicadas e requisições respondidas saem da fila"""
+        session = SessionState()
+        for msg in (["changeSymbol", {"asset": "EURUSD_otc", "period": 60}],
+                    ["loadHistoryPeriod", {"asset": "EURUSD_otc", "period": 60, "index": 1}],
+                    ["changeSymbol", {"asset": "EURUSD_otc", "period": 60}],
+                    ["loadHistoryPeriod", {"asset": "EURUSD_otc", "period": 60, "index": 2}],
+                    ["openOrder", {"asset": "EURUSD_otc", "amount": 1}]):
+            session.track(msg, f"42{json.dumps(msg)}")
+        self.assertEqual(len(session.subscriptions), 1)
+
+        session.request_answered("loadHistoryPeriod")
+        frames = session.replay_frames()
+        self.assertEqual(len(frames), 2)
+        self.assertIn('"changeSymbol"', frames[0])
+        self.assertIn('"index": 2', frames[1])
+        self.assertFalse(any("openOrder" in frame for frame in frames))
+
+    async def test_answer_matches_request_by_asset(self):
+        """Respostas de históricos concorrentes saem da fila pelo ativo, não pela ordem de chegada"""
+        session = SessionState()
+        for asset in ("EURUSD_otc", "GBPUSD_otc"):
+            msg = ["loadHistoryPeriod", {"asset": asset, "period": 60, "index": 1, "offset": 100}]
+            session.track(msg, f"42{json.dumps(msg)}")
+
+        session.request_answered("loadHistoryPeriod", {"asset": "GBPUSD_otc", "period": 60, "data": []})
+        frames = session.replay_frames()
+        self.assertEqual(len(frames), 1)
+        self.assertIn("EURUSD_otc", frames[0])
+
+        # Resposta de um pedido que não está na fila não remove outro
+        session.request_answered("loadHistoryPeriod", {"asset": "AUDUSD_otc", "period": 60, "data": []})
+        self.assertEqual(len(session.replay_frames()), 1)
+
+    async def test_resuming_only_after_established_session(self):
+        """Antes da primeira autenticação os envios não são bloqueados"""
+        session = SessionState()
+        session.on_disconnect()
+        self.assertFalse(session.resuming)
+        session.on_ready()
+        session.on_disconnect()
+        self.assertTrue(session.resuming)
+        self.assertFalse(await session.wait_ready(0.01))
+
+    async def test_close_ends_resume(self):
+        """Fechar a sessão acorda quem aguardava a retomada e ela não é mais retomada"""
+        session = SessionState()
+        session.on_ready()
+        session.track(["changeSymbol", {"asset": "EURUSD_otc", "period": 60}], "42[]")
+        session.on_disconnect()
+        waiter = asyncio.ensure_future(session.wait_ready(5))
+        await asyncio.sleep(0)
+
+        session.close()
+        self.assertFalse(await asyncio.wait_for(waiter, 1))
+        self.assertFalse(session.resuming)
+        self.assertEqual(session.replay_frames(), [])
+        self.assertFalse(await session.wait_ready(0.01))
+
+        # Nova conexão: pronta só após a autenticação
+        session.on_disconnect()
+        session.on_ready()
+        self.assertTrue(await session.wait_ready(0.01))
+        self.assertEqual(session.resumptions, 0)
+
+
+class TestSessionResume(unittest.IsolatedAsyncioTestCase):
+    """
+    Testes da retomada de sessão no cliente websocket
+    """
+
+    async def asyncSetUp(self):
+        ssid = '42["auth",{"session":"test_session_123","isDemo":1,"uid":123456,"platform":2}]'
+        self.api = PocketOption(ssid, True)
+        self.client = self.api.api.websocket
+        self.socket = FakeSocket()
+        self.client.websocket = self.socket
+
+    async def asyncTearDown(self):
+        global_value.websocket_is_connected = False
+
+    async def test_replays_before_user_frames(self):
+        """No novo socket as assinaturas são reenviadas antes dos envios do usuário"""
+        await self.client.on_message('451-["successauth",{"_placeholder":true,"num":0}]')
+        await self.api.api.change_symbol.async_call("EURUSD_otc", 60)
+        self.assertEqual(len(self.socket.sent), 1)
+
+        # Queda: o próximo envio aguarda a retomada
+        self.api.api.session.on_disconnect()
+        self.socket = FakeSocket()
+        self.client.websocket = self.socket
+        pending = asyncio.ensure_future(self.api.api.change_symbol.async_call("GBPUSD_otc", 60))
+        await asyncio.sleep(0.01)
+        self.assertFalse(pending.done())
+
+        await self.client.on_message('451-["successauth",{"_placeholder":true,"num":0}]')
+        await asyncio.wait_for(pending, 1)
+        self.assertEqual(len(self.socket.sent), 2)
+        self.assertIn("EURUSD_otc", self.socket.sent[0])
+        self.assertIn("GBPUSD_otc", self.socket.sent[1])
+        self.assertEqual(self.api.api.session.resumptions, 1)
+
+    async def test_send_fails_when_session_is_not_resumed(self):
+        """Desconectar durante a queda faz os envios pendentes falharem em vez de seguir no socket morto"""
+        await self.client.on_message('451-["successauth",{"_placeholder":true,"num":0}]')
+        self.api.api.session.on_disconnect()
+        pending = [asyncio.ensure_future(self.api.api.change_symbol.async_call("EURUSD_otc", 60)),
+                   asyncio.ensure_future(self.api.api.send_frame('42["ps"]'))]
+        await asyncio.sleep(0.01)
+        await self.api.disconnect()
+        for task in pending:
+            with self.assertRaises(ConnectionError):
+                await asyncio.wait_for(task, 1)
+        self.assertEqual(self.socket.sent, [])
+        self.assertFalse(self.api.api.session.resuming)
+
+    async def test_opened_deals_resolve_lost_confirmation(self):
+        """Uma ordem cuja confirmação se perdeu é conciliada pelo updateOpenedDeals"""
+        future = self.api.api.register_order_request(42)
+        await self.client.on_message('451-["updateOpenedDeals",{"_placeholder":true,"num":0}]')
+        await self.client.on_message(json.dumps([{"id": "order-1", "requestId": 42, "amount": 1}]).encode())
+        self.assertEqual((await future)["id"], "order-1")
+        self.assertIsNotNone(self.api.api.order_book.get("order-1"))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+"""
+Testes unitários para o anel de ticks em memória compartilhada
+Autor: AdminhuDev
+"""
+
+import multiprocessing
+import os
+import sys
+import time
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.shm_ring import HEADER, RECORD, TickRingReader, TickRingWriter
+
+
+def write_ticks(prefix, count):
+    """Processo escritor: grava ``count`` ticks e aguarda o leitor"""
+    writer = TickRingWriter(capacity=2048, prefix=prefix)
+    for index in range(count):
+        writer.write("EURUSD_otc", 1000.0 + index, 1.0 + index / 1e5)
+    time.sleep(0.5)
+    writer.close()
+
+
+class TestTickRing(unittest.TestCase):
+    """
+    Testes para o anel de ticks
+    """
+
+    def setUp(self):
+        self.prefix = f"po_test_{os.getpid()}"
+        self.writer = TickRingWriter(capacity=4, prefix=self.prefix)
+
+    def tearDown(self):
+        self.writer.close()
+
+    def test_reader_gets_new_ticks(self):
+        """O leitor recebe os ticks gravados depois de abrir o anel"""
+        self.writer.write("EURUSD_otc", 1.0, 1.1)
+        reader = TickRingReader("EURUSD_otc", prefix=self.prefix)
+        self.assertEqual(reader.poll(), [])
+        self.assertEqual(reader.latest(), (1.0, 1.1))
+
+        self.writer.write("EURUSD_otc", 2.0, 1.2)
+        self.writer.write("EURUSD_otc", 3.0, 1.3)
+        self.assertEqual(reader.poll(limit=1), [(2.0, 1.2)])
+        self.assertEqual(reader.poll(), [(3.0, 1.3)])
+        reader.close()
+
+    def test_lapped_reader_skips_overwritten_records(self):
+        """Um leitor que ficou uma volta atrás pula para os registros ainda válidos"""
+        self.writer.write("EURUSD_otc", 0.0, 1.0)
+        reader = TickRingReader("EURUSD_otc", prefix=self.prefix, from_start=True)
+        for index in range(1, 10):
+            self.writer.write("EURUSD_otc", float(index), 1.0)
+        self.assertEqual([tick[0] for tick in reader.poll()], [6.0, 7.0, 8.0, 9.0])
+        self.assertEqual(reader.lapped, 6)
+        reader.close()
+
+    def test_record_being_written_is_not_read(self):
+        """Um registro com sequência ímpar (em gravação) não é entregue"""
+        self.writer.write("EURUSD_otc", 1.0, 1.1)
+        reader = TickRingReader("EURUSD_otc", prefix=self.prefix)
+        self.writer.write("EURUSD_otc", 2.0, 1.2)
+        ring = self.writer.rings["EURUSD_otc"]
+        offset = HEADER.size + 1 * RECORD.size
+        RECORD.pack_into(ring.buffer, offset, 3, 2.0, 9.9)
+
+        self.assertEqual(reader.poll(), [])
+        RECORD.pack_into(ring.buffer, offset, 4, 2.0, 1.2)
+        self.assertEqual(reader.poll(), [(2.0, 1.2)])
+        reader.close()
+
+    @unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "requer fork")
+    def test_cross_process(self):
+        """Ticks gravados em outro processo são lidos por polling"""
+        prefix = self.prefix + "_x"
+        process = multiprocessing.get_context("fork").Process(target=write_ticks, args=(prefix, 1000))
+        process.start()
+        reader = None
+        deadline = time.monotonic() + 5
+        while reader is None and time.monotonic() < deadline:
+            try:
+                reader = TickRingReader("EURUSD_otc", prefix=prefix, from_start=True)
+            except FileNotFoundError:
+                time.sleep(0.001)
+        ticks = []
+        while len(ticks) < 1000 and time.monotonic() < deadline:
+            ticks.extend(reader.poll())
+        process.join()
+        reader.close()
+
+        self.assertEqual(len(ticks), 1000)
+        self.assertEqual(ticks[-1], (1999.0, 1.0 + 999 / 1e5))
+        self.assertEqual(reader.lapped, 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
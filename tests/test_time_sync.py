@@ -0,0 +1,107 @@
+"""
+Testes unitários para a sincronização de tempo com o servidor
+Autor: AdminhuDev
+"""
+
+import os
+import random
+import sys
+import unittest
+
+# Adicionar o diretório raiz ao path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from pocketoptionapi.ws.objects.time_sync import TimeSynchronizer
+from pocketoptionapi.ws.objects.timesync import TimeSync
+
+
+class FakeClock(object):
+    """Relógio monotônico (ns) controlado pelo teste, avançado em segundos"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return int(self.now * 1e9)
+
+
+class TestTimeSynchronizer(unittest.TestCase):
+    """
+    Testes para a classe TimeSynchronizer
+    """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sync = TimeSynchronizer(clock=self.clock)
+        self.random = random.Random(7)
+
+    def feed(self, offset, seconds, drift=0.0, rate=10):
+        """Amostras com atraso de rede aleatório entre 5 e 200 ms"""
+        start = self.clock.now
+        for _ in range(int(seconds * rate)):
+            self.clock.now += 1.0 / rate
+            true_server = self.clock.now + offset + drift * (self.clock.now - start)
+            self.sync.synchronize(true_server - self.random.uniform(0.005, 0.2))
+        return start
+
+    def test_not_synchronized(self):
+        """Sem amostras o relógio não é estimado"""
+        self.assertFalse(self.sync.synchronized)
+        with self.assertRaises(ValueError):
+            self.sync.server_now()
+
+    def test_filters_network_delay(self):
+        """O deslocamento estimado fica próximo do menor atraso, não da média"""
+        self.feed(offset=500.0, seconds=30)
+        server, uncertainty = self.sync.server_now()
+        error = server - (self.clock.now + 500.0)
+        self.assertLess(abs(error), 0.02)
+        self.assertLess(uncertainty, 0.05)
+
+    def test_extrapolates_between_frames(self):
+        """Entre os frames o relógio avança e a incerteza cresce"""
+        self.feed(offset=-20.0, seconds=30)
+        before, uncertainty_before = self.sync.server_now()
+        self.clock.now += 10
+        after, uncertainty_after = self.sync.server_now()
+        self.assertAlmostEqual(after - before, 10, delta=0.01)
+        self.assertGreater(uncertainty_after, uncertainty_before)
+
+    def test_estimates_drift(self):
+        """A deriva entre os relógios é estimada pela regressão"""
+        start = self.feed(offset=0.0, seconds=60, drift=5e-4, rate=50)
+        self.assertAlmostEqual(self.sync.drift, 5e-4, delta=2e-4)
+        server = self.sync.server_time()
+        expected = self.clock.now + 5e-4 * (self.clock.now - start)
+        self.assertLess(abs(server - expected), 0.02)
+
+    def test_resets_on_server_clock_jump(self):
+        """Um salto do relógio do servidor descarta as amostras antigas"""
+        self.feed(offset=0.0, seconds=10)
+        self.feed(offset=3600.0, seconds=2)
+        self.assertLess(abs(self.sync.server_time() - (self.clock.now + 3600.0)), 0.05)
+
+    def test_nanosecond_clock(self):
+        """server_time_ns retorna inteiro coerente com server_time"""
+        self.feed(offset=1.7e9, seconds=5)
+        now_ns = self.sync.server_time_ns()
+        self.assertIsInstance(now_ns, int)
+        self.assertAlmostEqual(now_ns / 1e9, self.sync.server_time(), places=6)
+        self.assertAlmostEqual(self.sync.get_synced_datetime().timestamp(), now_ns / 1e9, places=5)
+
+
+class TestTimeSync(unittest.TestCase):
+    """
+    Testes para a classe TimeSync
+    """
+
+    def test_expiration_timestamp(self):
+        """A expiração é calculada sem passar por datetime"""
+        time_sync = TimeSync()
+        time_sync.server_timestamp = 1700000000.75
+        time_sync.expiration_time = 5
+        self.assertEqual(time_sync.expiration_timestamp, 1700000300)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)